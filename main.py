@@ -16,6 +16,16 @@ from src.api.a2a.routes import router_a2a
 from src.mcp.loader import load_all_tools
 import os
 from src.mcp.registry import get_all_tools
+from src.data.supaBase.supaBase_db import DB
+from src.data.supaBase.supaBase_async_db import AsyncDB
+from src.data.supaBase.supaBase_agent_db import SupaBaseAgentDB, AGENT_CHANGED_CHANNEL
+from src.data.supaBase.supaBase_listener import PgListener
+from src.utils import background
+from src.utils.telemetry_sink import RunsTelemetrySink
+from src.utils.memory_writer import ChatMessageWriter
+from src.services.history_cache import SessionHistoryCache, SESSION_CHANGED_CHANNEL
+from src.services.reviews.job_runner import ReviewJobRunner
+from src.services.reviews.github_client import close_http_client
 
 # Configura logs
 setup_logging()
@@ -28,7 +38,47 @@ async def lifespan(app: FastAPI):
     load_all_tools()
     print("TOOLS:", list(get_all_tools().keys()))
     logger.info('Tool loaded')
+    try:
+        DB.pool().warmup()
+        await AsyncDB.open_pool()
+        logger.info('DB pools ready')
+    except Exception as e:
+        logger.error(f'DB pool warmup failed: {e}')
+
+    agent_listener = None
+    if settings.AGENT_CONFIG_NOTIFY_ENABLED:
+        agent_listener = PgListener(
+            AGENT_CHANGED_CHANNEL,
+            on_notify=lambda agent_id: SupaBaseAgentDB.evict(agent_id or None),
+            on_reconnect=SupaBaseAgentDB.clear_cache,
+        )
+        agent_listener.start()
+
+    session_listener = None
+    if settings.HISTORY_CACHE_NOTIFY_ENABLED:
+        session_listener = PgListener(
+            SESSION_CHANGED_CHANNEL,
+            on_notify=SessionHistoryCache.on_notify,
+            on_reconnect=SessionHistoryCache.clear,
+        )
+        session_listener.start()
+
+    RunsTelemetrySink.start()
+    ChatMessageWriter.start()
+    await ReviewJobRunner.recover_stale()
     yield
+    if agent_listener is not None:
+        await agent_listener.stop()
+    if session_listener is not None:
+        await session_listener.stop()
+    await ReviewJobRunner.shutdown()
+    await close_http_client()
+    await background.drain()
+    # depois do drain: as tasks de finalização de stream ainda enfileiram telemetria e respostas
+    await RunsTelemetrySink.stop()
+    await ChatMessageWriter.stop()
+    await AsyncDB.close_pool()
+    DB.close_pool()
     logger.info('Shutdown Complete')
 
 app = FastAPI(
@@ -1,18 +1,42 @@
-from fastapi import APIRouter, Query
-from typing import Optional
+from datetime import datetime, timezone
+from fastapi import APIRouter, HTTPException, Query
+from typing import Literal, Optional
+from starlette.concurrency import run_in_threadpool
 
+from src.core.config import settings
 from src.data.supaBase.supaBase_db import DB  # seu core DB
+from src.data.supaBase.supaBase_rollup_db import SupaBaseRollupDB
+from src.utils import histogram
+from src.utils.run_rollups import GRANULARITY_STEP, truncate
+from src.utils.swr_cache import SWRCache
+from src.utils.telemetry_sink import RunsTelemetrySink
 
 router_view = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 
+# agregados do dashboard: TTL por endpoint + stale-while-revalidate, uma query por chave por vez
+_cache = SWRCache("dashboard", max_size=settings.DASHBOARD_CACHE_MAX_SIZE)
+
+
+async def _cached(key: tuple, ttl_s: float, stale_s: float, fn, *args):
+    return await _cache.get(
+        key,
+        lambda: run_in_threadpool(fn, *args),
+        ttl_s=ttl_s,
+        stale_s=stale_s,
+    )
+
 
 @router_view.get("/overview")
-def dashboard_overview(agent_id: Optional[str] = Query(default=None)):
+async def dashboard_overview(agent_id: Optional[str] = Query(default=None)):
     """
     Visão geral (totais all-time), opcionalmente filtrado por agent_id.
     Retorna JSON direto do Postgres via fn_dashboard_overview_total.
     """
-    row = DB.fetch_one(
+    row = await _cached(
+        ("overview", agent_id),
+        settings.DASHBOARD_OVERVIEW_TTL_S,
+        settings.DASHBOARD_OVERVIEW_STALE_S,
+        DB.fetch_one,
         "select public.fn_dashboard_overview_total(%s::text) as data;",
         (agent_id,),
     )
@@ -20,22 +44,26 @@ def dashboard_overview(agent_id: Optional[str] = Query(default=None)):
 
 
 @router_view.get("/totals-by-agent")
-def dashboard_totals_by_agent():
+async def dashboard_totals_by_agent():
     """
     Totais por agente (all-time).
     """
-    rows = DB.fetch_all(
+    rows = await _cached(
+        ("totals-by-agent",),
+        settings.DASHBOARD_TOTALS_TTL_S,
+        settings.DASHBOARD_TOTALS_STALE_S,
+        DB.fetch_all,
         """
         select *
         from public.vw_runs_totals_by_agent
         order by cost_usd_total desc nulls last;
-        """
+        """,
     )
     return {"items": rows}
 
 
 @router_view.get("/last-runs")
-def dashboard_last_runs(
+async def dashboard_last_runs(
     limit: int = Query(default=50, ge=1, le=200),
     agent_id: Optional[str] = Query(default=None),
     status: Optional[str] = Query(default=None),
@@ -67,5 +95,153 @@ def dashboard_last_runs(
     sql += " order by created_at desc limit %s"
     params.append(limit)
 
-    rows = DB.fetch_all(sql, tuple(params))
+    rows = await _cached(
+        ("last-runs", limit, agent_id, status),
+        settings.DASHBOARD_LAST_RUNS_TTL_S,
+        settings.DASHBOARD_LAST_RUNS_STALE_S,
+        DB.fetch_all,
+        sql,
+        tuple(params),
+    )
     return {"items": rows}
+
+
+# janela padrão por granularidade (em buckets) e teto de buckets por consulta
+_DEFAULT_BUCKETS = {"minute": 120, "hour": 48, "day": 30}
+_MAX_BUCKETS = 2000
+
+
+def _window(granularity: str, since: Optional[datetime], until: Optional[datetime]) -> tuple[datetime, datetime]:
+    """Janela alinhada aos buckets (chave de cache estável dentro do bucket corrente)."""
+    step = GRANULARITY_STEP[granularity]
+    until = truncate((until or datetime.now(timezone.utc)).astimezone(timezone.utc), granularity) + step
+    since = truncate(since.astimezone(timezone.utc), granularity) if since else until - step * _DEFAULT_BUCKETS[granularity]
+    if since >= until:
+        raise HTTPException(status_code=400, detail="since must be before until")
+    if (until - since) / step > _MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"window too large for granularity={granularity} (max {_MAX_BUCKETS} buckets)")
+    return since, until
+
+
+@router_view.get("/timeseries")
+async def dashboard_timeseries(
+    granularity: Literal["minute", "hour", "day"] = Query(default="hour"),
+    since: Optional[datetime] = Query(default=None, description="ISO 8601; padrão depende da granularidade"),
+    until: Optional[datetime] = Query(default=None, description="ISO 8601; padrão: agora"),
+    group_by: Optional[Literal["agent_id", "model", "status"]] = Query(default=None),
+    agent_id: Optional[str] = Query(default=None),
+    model: Optional[str] = Query(default=None),
+    status: Optional[str] = Query(default=None),
+):
+    """
+    Série temporal de runs (contagem, erros, tokens, custo, latência média)
+    lida de public.run_rollups — custo independe do total de runs.
+    """
+    since, until = _window(granularity, since, until)
+    rows = await _cache.get(
+        ("timeseries", granularity, since, until, group_by, agent_id, model, status),
+        lambda: SupaBaseRollupDB.timeseries(granularity, since, until, group_by, agent_id, model, status),
+        ttl_s=settings.DASHBOARD_TIMESERIES_TTL_S,
+        stale_s=settings.DASHBOARD_TIMESERIES_STALE_S,
+    )
+
+    points = []
+    for r in rows:
+        point = {k: v for k, v in r.items() if k not in ("duration_hist", "duration_ms_sum")}
+        point["avg_duration_ms"] = round(r["duration_ms_sum"] / r["runs"], 1) if r["runs"] else None
+        points.append(point)
+
+    return {
+        "granularity": granularity,
+        "since": since,
+        "until": until,
+        "group_by": group_by,
+        "points": points,
+    }
+
+
+_DISTRIBUTION_GROUPS = {
+    "agent_model": ("agent_id", "model"),
+    "agent_id": ("agent_id",),
+    "model": ("model",),
+    "none": (),
+}
+
+
+async def _distributions(granularity, since, until, group_by, agent_id, model) -> tuple[datetime, datetime, list[dict]]:
+    since, until = _window(granularity, since, until)
+    cols = _DISTRIBUTION_GROUPS[group_by]
+    rows = await _cache.get(
+        ("distributions", granularity, since, until, group_by, agent_id, model),
+        lambda: SupaBaseRollupDB.distributions(granularity, since, until, cols, agent_id, model),
+        ttl_s=settings.DASHBOARD_TIMESERIES_TTL_S,
+        stale_s=settings.DASHBOARD_TIMESERIES_STALE_S,
+    )
+    return since, until, rows
+
+
+def _group_key(row: dict, group_by: str) -> dict:
+    return {c: row[c] for c in _DISTRIBUTION_GROUPS[group_by]}
+
+
+@router_view.get("/latency")
+async def dashboard_latency(
+    granularity: Literal["minute", "hour", "day"] = Query(default="hour"),
+    since: Optional[datetime] = Query(default=None, description="ISO 8601; padrão depende da granularidade"),
+    until: Optional[datetime] = Query(default=None, description="ISO 8601; padrão: agora"),
+    group_by: Literal["agent_model", "agent_id", "model", "none"] = Query(default="agent_model"),
+    agent_id: Optional[str] = Query(default=None),
+    model: Optional[str] = Query(default=None),
+):
+    """
+    p50/p90/p99 de latência ponta a ponta (duration_ms), da chamada ao LLM
+    (telemetry.invoke_ms) e do overhead (duration - invoke) das runs com sucesso.
+    overhead_share = fração do tempo total fora do LLM (só runs com invoke_ms).
+    Hits do ResponseCache contam em `runs`, mas ficam fora dos percentis.
+    """
+    since, until, rows = await _distributions(granularity, since, until, group_by, agent_id, model)
+
+    items = []
+    for r in rows:
+        measured = (r["invoke_ms_sum"] or 0) + (r["overhead_ms_sum"] or 0)
+        items.append({
+            **_group_key(r, group_by),
+            "runs": r["runs"],
+            "duration_ms": histogram.summary(r["duration_hist"] or []),
+            "invoke_ms": histogram.summary(r["invoke_hist"] or []),
+            "overhead_ms": histogram.summary(r["overhead_hist"] or []),
+            "avg_duration_ms": round(r["duration_ms_sum"] / r["runs"], 1) if r["runs"] else None,
+            "overhead_share": round(r["overhead_ms_sum"] / measured, 4) if measured else None,
+        })
+
+    return {"granularity": granularity, "since": since, "until": until, "group_by": group_by, "items": items}
+
+
+@router_view.get("/tokens")
+async def dashboard_tokens(
+    granularity: Literal["minute", "hour", "day"] = Query(default="hour"),
+    since: Optional[datetime] = Query(default=None, description="ISO 8601; padrão depende da granularidade"),
+    until: Optional[datetime] = Query(default=None, description="ISO 8601; padrão: agora"),
+    group_by: Literal["agent_model", "agent_id", "model", "none"] = Query(default="agent_model"),
+    agent_id: Optional[str] = Query(default=None),
+    model: Optional[str] = Query(default=None),
+):
+    """
+    Distribuição de total_tokens por run (p50/p90/p99) das runs com sucesso
+    (sem os hits do ResponseCache, que têm tokens zerados).
+    """
+    since, until, rows = await _distributions(granularity, since, until, group_by, agent_id, model)
+
+    items = [
+        {**_group_key(r, group_by), "runs": r["runs"], "total_tokens": histogram.summary(r["tokens_hist"] or [])}
+        for r in rows
+    ]
+    return {"granularity": granularity, "since": since, "until": until, "group_by": group_by, "items": items}
+
+
+@router_view.get("/telemetry-sink")
+def dashboard_telemetry_sink():
+    """
+    Contadores do sink de telemetria deste processo (fila, lotes, descartes).
+    """
+    return RunsTelemetrySink.stats()
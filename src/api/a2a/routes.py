@@ -37,7 +37,7 @@ async def get_agent_card(request: Request):
         request.client.host if request.client else "unknown",
     )
 
-    card = AgentCardBuilder.build(base_url=base_url)
+    card = await AgentCardBuilder.build(base_url=base_url)
 
     return JSONResponse(
         content=card.model_dump(by_alias=True, exclude_none=True),
@@ -1,15 +1,23 @@
 from fastapi import APIRouter, Header, HTTPException, Depends
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
 
-from src.models.reviews.reviews_schemas import PRReviewRunRequest, PRReviewRunResponse
+from src.models.reviews.reviews_schemas import PRReviewRunRequest, PRReviewRunResponse, PRReviewJobAccepted
 from src.services.reviews.pipeline.graph import build_review_graph
+from src.services.reviews.job_runner import ReviewJobRunner, ReviewQueueFull
+from src.data.supaBase.supaBase_pr_review_db import SupaBasePRReviewDB
 from src.core.config import settings
 
 router_review = APIRouter(prefix="/api/v1/reviews", tags=["reviews"])
 graph = build_review_graph()
 security = HTTPBearer()
 
-@router_review.post("/pr/run", response_model=PRReviewRunResponse)
+@router_review.post(
+    "/pr/run",
+    response_model=PRReviewRunResponse,
+    responses={202: {"model": PRReviewJobAccepted}},
+)
 async def pr_run(
     payload: PRReviewRunRequest,
     credentials: HTTPAuthorizationCredentials = Depends(security),
@@ -29,9 +37,14 @@ async def pr_run(
         "head_sha": payload.head_sha,
         "base_sha": payload.base_sha,
         "user_id": "github-actions",
+        "force": payload.force,
+        "incremental": payload.incremental,
         "errors": [],
     }
 
+    if payload.async_mode:
+        return await _enqueue_review(payload, initial_state)
+
     final_state = await graph.ainvoke(initial_state)
 
     return PRReviewRunResponse(
@@ -40,3 +53,33 @@ async def pr_run(
         head_sha=payload.head_sha,
         result=final_state.get("final_report", {}),
     )
+
+
+async def _enqueue_review(payload: PRReviewRunRequest, initial_state: dict) -> JSONResponse:
+    if not ReviewJobRunner.has_capacity():
+        raise HTTPException(status_code=503, detail="Review queue is full, try again later")
+
+    job, enqueued = await run_in_threadpool(
+        SupaBasePRReviewDB.enqueue_job,
+        payload.repo_full_name,
+        payload.pr_number,
+        payload.head_sha,
+        payload.base_sha,
+        stale_after_s=settings.REVIEW_JOB_STALE_AFTER_S,
+    )
+    job_id = str(job["id"])
+
+    if enqueued:
+        try:
+            ReviewJobRunner.submit(graph, job_id, initial_state)
+        except ReviewQueueFull:
+            await run_in_threadpool(SupaBasePRReviewDB.mark_job_status, job_id, "failed", "review queue full")
+            raise HTTPException(status_code=503, detail="Review queue is full, try again later")
+
+    body = PRReviewJobAccepted(
+        job_id=job_id,
+        status=job["status"],
+        status_url=f"{router_review.prefix}/jobs/{job_id}",
+        enqueued=enqueued,
+    )
+    return JSONResponse(status_code=202, content=body.model_dump())
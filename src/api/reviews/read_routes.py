@@ -1,69 +1,76 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Query
+from src.core.config import settings
 from src.data.supaBase.supaBase_pr_review_read_db import SupaBasePRReviewReadDB
+from src.utils.cursor import decode_cursor, next_cursor
+from src.utils.http_cache import dump_json, etag_matches, json_response, make_etag, not_modified
+from src.utils.lru_cache import LRUCache
 
 router_reviews_read = APIRouter(prefix="/api/v1/reviews", tags=["reviews-read"])
 
+# etag -> corpo JSON já serializado
+_bodies = LRUCache("review_responses", max_size=settings.REVIEW_RESPONSE_CACHE_MAX_SIZE)
+
+
+def _cached_review(if_none_match: str | None, latest: bool, **selector):
+    """
+    ETag forte a partir de job (id/status/finished_at) + report (id/created_at),
+    lidos por uma query barata. Se o cliente já tem a versão: 304 sem tocar nos
+    findings; senão o corpo sai do LRU ou do get_review_payload.
+    """
+    version = SupaBasePRReviewReadDB.get_review_version(**selector)
+    if not version:
+        return None
+
+    etag = make_etag(
+        version["job_id"], version["status"], version["finished_at"],
+        version["report_id"], version["report_created_at"],
+    )
+    done = version["status"] in ("completed", "failed") and version["report_id"] is not None
+    # /pr/latest pode passar a apontar para outro job: sempre revalida
+    cache_control = "no-cache" if latest or not done else f"private, max-age={settings.REVIEW_HTTP_MAX_AGE_S}"
+
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, cache_control)
+
+    body = _bodies.get(etag)
+    if body is None:
+        payload = SupaBasePRReviewReadDB.get_review_payload(**selector)
+        if not payload:
+            return None
+        # o payload pode ser mais novo que a versão lida acima; a próxima leitura
+        # de versão gera outro etag e o corpo é buscado de novo
+        body = dump_json(payload)
+        _bodies.set(etag, body)
+
+    return json_response(body, etag, cache_control)
+
 
 @router_reviews_read.get("/pr/latest")
 def get_latest_review(
     repo_full_name: str = Query(..., description="Ex: WeslleySebastiao/chatllm-api"),
     pr_number: int = Query(..., description="Número do PR"),
+    if_none_match: str | None = Header(default=None),
 ):
-    job = SupaBasePRReviewReadDB.get_latest_job(repo_full_name, pr_number)
-    if not job:
+    # job pode existir mas ainda não terminou: report None e listas vazias
+    resp = _cached_review(if_none_match, latest=True, repo_full_name=repo_full_name, pr_number=pr_number)
+    if resp is None:
         raise HTTPException(status_code=404, detail="No review job found for this PR")
-
-    report = SupaBasePRReviewReadDB.get_report_by_job(job["id"])
-    if not report:
-        # job pode existir mas ainda não terminou
-        return {
-            "job": job,
-            "report": None,
-            "counts": {"BLOCKER": 0, "MAJOR": 0, "MINOR": 0, "NIT": 0},
-            "findings": [],
-            "tests_suggested": [],
-        }
-
-    findings = SupaBasePRReviewReadDB.get_findings(report["id"])
-    tests = SupaBasePRReviewReadDB.get_test_suggestions(report["id"])
-    counts = SupaBasePRReviewReadDB.get_counts_by_severity(report["id"])
-
-    return {
-        "job": job,
-        "report": report,
-        "counts": counts,
-        "findings": findings,
-        "tests_suggested": [t["suggestion"] for t in tests],
-    }
+    return resp
 
 
 @router_reviews_read.get("/jobs/{job_id}")
-def get_review_by_job(job_id: str):
-    job = SupaBasePRReviewReadDB.get_job(job_id)
-    if not job:
+def get_review_by_job(job_id: str, if_none_match: str | None = Header(default=None)):
+    resp = _cached_review(if_none_match, latest=False, job_id=job_id)
+    if resp is None:
         raise HTTPException(status_code=404, detail="Job not found")
+    return resp
 
-    report = SupaBasePRReviewReadDB.get_report_by_job(job_id)
-    if not report:
-        return {
-            "job": job,
-            "report": None,
-            "counts": {"BLOCKER": 0, "MAJOR": 0, "MINOR": 0, "NIT": 0},
-            "findings": [],
-            "tests_suggested": [],
-        }
-
-    findings = SupaBasePRReviewReadDB.get_findings(report["id"])
-    tests = SupaBasePRReviewReadDB.get_test_suggestions(report["id"])
-    counts = SupaBasePRReviewReadDB.get_counts_by_severity(report["id"])
 
-    return {
-        "job": job,
-        "report": report,
-        "counts": counts,
-        "findings": findings,
-        "tests_suggested": [t["suggestion"] for t in tests],
-    }
+def _decode(cursor: str | None):
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 
 @router_reviews_read.get("/pr/history")
@@ -72,8 +79,12 @@ def list_pr_history(
     pr_number: int = Query(...),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="next_cursor da página anterior (preferível a offset)"),
 ):
-    jobs = SupaBasePRReviewReadDB.list_jobs(repo_full_name, pr_number, limit=limit, offset=offset)
+    # limit + 1 para saber se há próxima página
+    jobs = SupaBasePRReviewReadDB.list_jobs(
+        repo_full_name, pr_number, limit=limit + 1, offset=offset, after=_decode(cursor)
+    )
 
     # payload leve para lista (sem findings)
     return {
@@ -81,31 +92,41 @@ def list_pr_history(
         "pr_number": pr_number,
         "limit": limit,
         "offset": offset,
-        "jobs": jobs,
+        "next_cursor": next_cursor(jobs, limit, "created_at", "id"),
+        "jobs": jobs[:limit],
     }
 
 @router_reviews_read.get("/repos")
 def list_reviewed_repos(
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="next_cursor da página anterior (preferível a offset)"),
 ):
-    repos = SupaBasePRReviewReadDB.list_reviewed_repos(limit=limit, offset=offset)
-    return {"limit": limit, "offset": offset, "repos": repos}
+    repos = SupaBasePRReviewReadDB.list_reviewed_repos(limit=limit + 1, offset=offset, after=_decode(cursor))
+    return {
+        "limit": limit,
+        "offset": offset,
+        "next_cursor": next_cursor(repos, limit, "last_review_at", "last_job_id"),
+        "repos": repos[:limit],
+    }
 
 @router_reviews_read.get("/prs")
 def list_reviewed_prs(
     repo_full_name: str = Query(..., description="Ex: WeslleySebastiao/chatllm-api"),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None, description="next_cursor da página anterior (preferível a offset)"),
 ):
     prs = SupaBasePRReviewReadDB.list_reviewed_prs_by_repo(
         repo_full_name=repo_full_name,
-        limit=limit,
+        limit=limit + 1,
         offset=offset,
+        after=_decode(cursor),
     )
     return {
         "repo_full_name": repo_full_name,
         "limit": limit,
         "offset": offset,
-        "prs": prs,
+        "next_cursor": next_cursor(prs, limit, "last_review_at", "last_job_id"),
+        "prs": prs[:limit],
     }
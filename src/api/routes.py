@@ -7,14 +7,20 @@ from src.services.agent_v2 import AgentManagerV2
 from src.mcp.registry import get_all_tools
 from src.data.supaBase.supaBase_agent_db import SupaBaseAgentDB
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+import json
+from contextlib import aclosing
 from src.mcp.request_context import set_request_context, RequestContext
+from src.services.agent_cache import CompiledAgentCache
+from src.utils.lru_cache import cache_stats
+from src.utils.swr_cache import swr_stats
 
 router = APIRouter(tags=['Agent Operation'])
 
 
 @router.post("/agent")
 async def create_agent(agent: AgentConfig):
-    agent = SupaBaseAgentDB.create_agent(
+    agent = await SupaBaseAgentDB.create_agent(
         name=agent.name,
         description=agent.description,
         provider=agent.provider,
@@ -33,7 +39,7 @@ async def create_agent(agent: AgentConfig):
 
 @router.patch("/agent/{agent_id}")
 async def update_agent(agent_id: UUID, payload: AgentUpdate):
-    existing = SupaBaseAgentDB.get_agent(agent_id)
+    existing = await SupaBaseAgentDB.get_agent(agent_id)
     if not existing:
         raise HTTPException(status_code=404, detail="Agente não encontrado")
 
@@ -45,7 +51,8 @@ async def update_agent(agent_id: UUID, payload: AgentUpdate):
             "agent": jsonable_encoder(existing),
         }
 
-    updated = SupaBaseAgentDB.update_agent(agent_id, patch)
+    updated = await SupaBaseAgentDB.update_agent(agent_id, patch)
+    CompiledAgentCache.invalidate(agent_id)
     if not updated:
         raise HTTPException(status_code=404, detail="Agente não encontrado")
 
@@ -56,7 +63,8 @@ async def update_agent(agent_id: UUID, payload: AgentUpdate):
 
 @router.delete("/agent/{agent_id}", status_code=204)
 async def delete_agent(agent_id: UUID):
-    deleted = SupaBaseAgentDB.delete_agent(agent_id)
+    deleted = await SupaBaseAgentDB.delete_agent(agent_id)
+    CompiledAgentCache.invalidate(agent_id)
 
     if not deleted:
         raise HTTPException(status_code=404, detail="Agente não encontrado")
@@ -65,7 +73,7 @@ async def delete_agent(agent_id: UUID):
 
 @router.get("/agent/{agent_id}")
 async def list_especific_agent(agent_id: UUID):
-    agent = SupaBaseAgentDB.get_agent(agent_id)
+    agent = await SupaBaseAgentDB.get_agent(agent_id)
 
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
@@ -80,7 +88,7 @@ async def list_especific_agent(agent_id: UUID):
 
 @router.get("/agent")
 async def list_agent():
-    agents = SupaBaseAgentDB.list_agents()
+    agents = await SupaBaseAgentDB.list_agents()
     # converter UUID/datetime pra string se necessário (depende do seu JSON encoder)
     for a in agents:
         a["id"] = str(a["id"])
@@ -105,7 +113,36 @@ async def list_tools_endpoint():
     return {"tools": response}
 
 
+@router.get("/cache/stats")
+async def cache_stats_endpoint():
+    """Tamanho e hit/miss dos caches em memória deste processo."""
+    # caches SWR: mesmos campos do LRU interno + fresh/stale/coalesced
+    return {**cache_stats(), **swr_stats()}
+
+
 @router.post("/agent/run/v2")
 async def run_agent_endpoint(run_request: AgentRunRequestV2):
     set_request_context(RequestContext(user_id=str(run_request.user_id)))
-    return await AgentManagerV2.run_agent_v2(run_request)
\ No newline at end of file
+    return await AgentManagerV2.run_agent_v2(run_request)
+
+
+async def _sse(events):
+    # aclosing: se o cliente desconectar, o finally do gerador de eventos roda na hora
+    async with aclosing(events):
+        async for ev in events:
+            data = json.dumps(ev["data"], default=str, ensure_ascii=False)
+            yield f"event: {ev['event']}\ndata: {data}\n\n"
+
+
+@router.post("/agent/run/v2/stream")
+async def run_agent_stream_endpoint(run_request: AgentRunRequestV2):
+    """
+    Mesmo contrato do /agent/run/v2, respondendo em Server-Sent Events:
+    session, token, tool_start, tool_end, usage (ou error).
+    """
+    set_request_context(RequestContext(user_id=str(run_request.user_id)))
+    return StreamingResponse(
+        _sse(AgentManagerV2.stream_agent_v2(run_request)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -16,6 +16,103 @@ class Settings(BaseSettings):
     SUPABASE_DB_PORT : int
     SUPABASE_DB_NAME : str
     SUPABASE_URL: str
+
+    # Pool de conexões Postgres (por processo)
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 10
+    DB_POOL_TIMEOUT_S: float = 10.0
+    DB_POOL_MAX_LIFETIME_S: float = 1800.0
+    DB_POOL_MAX_IDLE_S: float = 300.0
+    DB_POOL_HEALTHCHECK_IDLE_S: float = 30.0
+
+    # Cache de agentes compilados (ChatOpenAI + tools + grafo LangGraph)
+    AGENT_CACHE_MAX_SIZE: int = 64
+
+    # Cache read-through da config dos agentes (get_agent/list_agents)
+    AGENT_CONFIG_CACHE_TTL_S: float = 60.0
+    AGENT_CONFIG_CACHE_MAX_SIZE: int = 256
+    # invalidação entre workers via LISTEN/NOTIFY (exige conexão de sessão)
+    AGENT_CONFIG_NOTIFY_ENABLED: bool = False
+
+    # Telemetria de runs em lote (fora do caminho da request)
+    TELEMETRY_SINK_ENABLED: bool = True
+    TELEMETRY_QUEUE_MAX: int = 10000
+    TELEMETRY_BATCH_SIZE: int = 200
+    TELEMETRY_FLUSH_INTERVAL_S: float = 1.0
+    TELEMETRY_OVERFLOW_POLICY: str = "drop_newest"  # ou "drop_oldest"
+    TELEMETRY_OPEN_RUNS_MAX: int = 10000
+
+    # Memória conversacional: respostas do assistente gravadas em lote
+    MEMORY_WRITER_ENABLED: bool = True
+    MEMORY_WRITER_QUEUE_MAX: int = 5000
+    MEMORY_WRITER_BATCH_SIZE: int = 100
+    MEMORY_WRITER_FLUSH_INTERVAL_S: float = 0.1
+    # janela de histórico: até HISTORY_MAX_MESSAGES mensagens, as mais novas primeiro, no orçamento
+    # janela do modelo - max_tokens - prompt - HISTORY_RESERVE_TOKENS (teto HISTORY_MAX_TOKENS)
+    HISTORY_MAX_MESSAGES: int = 50
+    HISTORY_MAX_TOKENS: int = 16000
+    HISTORY_RESERVE_TOKENS: int = 1000
+    # resumo incremental de sessões longas (em background, depois da resposta)
+    SUMMARY_ENABLED: bool = True
+    SUMMARY_MODEL: str = "gpt-4o-mini"
+    SUMMARY_TRIGGER_TOKENS: int = 8000
+    SUMMARY_KEEP_TOKENS: int = 3000
+    SUMMARY_MAX_INPUT_TOKENS: int = 12000
+    SUMMARY_MAX_TOKENS: int = 800
+    # sessões marcadas para resumo aguardando o fim do turno (as mais antigas saem)
+    SUMMARY_PENDING_MAX: int = 1000
+    # histórico recente por sessão em memória (write-through); ver src/services/history_cache.py
+    HISTORY_CACHE_ENABLED: bool = True
+    HISTORY_CACHE_MAX_SESSIONS: int = 1000
+    HISTORY_CACHE_MESSAGES: int = 50
+    HISTORY_CACHE_TTL_S: float = 600.0
+    # invalidação entre workers via LISTEN/NOTIFY (exige conexão de sessão)
+    HISTORY_CACHE_NOTIFY_ENABLED: bool = False
+
+    # Cache de respostas exatas do LLM (só agentes com temperature 0; ver src/services/response_cache.py)
+    RESPONSE_CACHE_ENABLED: bool = False
+    RESPONSE_CACHE_BACKEND: str = "memory"  # ou "postgres"
+    RESPONSE_CACHE_TTL_S: float = 86400.0
+    RESPONSE_CACHE_MAX_ENTRIES: int = 1000
+    RESPONSE_CACHE_ALLOW_TOOLS: bool = False
+
+    # Pipeline de review de PR
+    REVIEW_SPECIALIST_CONCURRENCY: int = 3
+    REVIEW_SPECIALIST_TIMEOUT_S: float = 300.0
+    REVIEW_JOB_CONCURRENCY: int = 2
+    REVIEW_JOB_QUEUE_MAX: int = 20
+    REVIEW_JOB_STALE_AFTER_S: float = 1800.0
+    # chunks de diff: teto de tokens por chunk e folga para o resto do prompt
+    REVIEW_CHUNK_MAX_TOKENS: int = 30000
+    REVIEW_PROMPT_RESERVE_TOKENS: int = 2000
+    # map-reduce (PR com mais de um chunk): chamadas simultâneas no processo e máx. de chunks
+    REVIEW_MAP_REDUCE_ENABLED: bool = True
+    REVIEW_MAP_CONCURRENCY: int = 6
+    REVIEW_MAX_CHUNKS: int = 20
+    # janela usada para modelos fora de src/utils/tokens.py:CONTEXT_WINDOWS
+    DEFAULT_CONTEXT_WINDOW: int = 128000
+
+    # GitHub (aponte GITHUB_API_URL para um servidor fake em testes locais)
+    GITHUB_API_URL: str = "https://api.github.com"
+    GITHUB_ETAG_CACHE_MAX_SIZE: int = 128
+    GITHUB_ETAG_MAX_BODY_BYTES: int = 1_000_000
+
+    # leitura de reviews: LRU de respostas serializadas (por ETag) e max-age de jobs concluídos
+    REVIEW_RESPONSE_CACHE_MAX_SIZE: int = 256
+    REVIEW_HTTP_MAX_AGE_S: int = 60
+
+    # Cache do dashboard (TTL por endpoint; depois do TTL serve o valor velho por até
+    # *_STALE_S do endpoint enquanto atualiza em background; 0 = sempre busca de novo)
+    DASHBOARD_CACHE_MAX_SIZE: int = 256
+    DASHBOARD_OVERVIEW_TTL_S: float = 30.0
+    DASHBOARD_OVERVIEW_STALE_S: float = 120.0
+    DASHBOARD_TOTALS_TTL_S: float = 60.0
+    DASHBOARD_TOTALS_STALE_S: float = 300.0
+    DASHBOARD_LAST_RUNS_TTL_S: float = 5.0
+    DASHBOARD_LAST_RUNS_STALE_S: float = 0.0
+    DASHBOARD_TIMESERIES_TTL_S: float = 15.0
+    DASHBOARD_TIMESERIES_STALE_S: float = 60.0
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -0,0 +1,4 @@
+-- Hash das configs dos agentes (especialistas + aggregator) que geraram o report.
+-- Usado pelo cache de review: mesmo repo+pr+head_sha e mesmo hash => reaproveita result_json.
+alter table public.pr_review_reports
+    add column if not exists agents_config_hash text;
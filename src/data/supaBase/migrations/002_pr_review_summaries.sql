@@ -0,0 +1,119 @@
+-- Resumos por repositório e por PR para as listagens de /api/v1/reviews/repos e /prs,
+-- mantidos de forma incremental por trigger em pr_review_jobs (todos os caminhos de
+-- escrita: persist_review, enqueue_job, mark_job_status, fail_stale_jobs).
+-- Listar deixa de custar DISTINCT ON + GROUP BY sobre todo o histórico.
+
+create table if not exists public.pr_review_pr_summary (
+    repo_full_name text not null,
+    pr_number int not null,
+    last_job_id uuid not null,
+    last_head_sha text not null,
+    last_status text not null,
+    last_review_at timestamptz not null,
+    jobs_total int not null default 0,
+    primary key (repo_full_name, pr_number)
+);
+
+create index if not exists pr_review_pr_summary_keyset_idx
+    on public.pr_review_pr_summary (repo_full_name, last_review_at desc, last_job_id desc);
+
+create table if not exists public.pr_review_repo_summary (
+    repo_full_name text primary key,
+    last_job_id uuid not null,
+    last_status text not null,
+    last_review_at timestamptz not null,
+    prs_reviewed int not null default 0,
+    jobs_total int not null default 0
+);
+
+create index if not exists pr_review_repo_summary_keyset_idx
+    on public.pr_review_repo_summary (last_review_at desc, last_job_id desc);
+
+-- keyset de /pr/history
+create index if not exists pr_review_jobs_pr_keyset_idx
+    on public.pr_review_jobs (repo_full_name, pr_number, created_at desc, id desc);
+
+
+create or replace function public.pr_review_summary_sync() returns trigger
+language plpgsql as $$
+declare
+    new_pr boolean := false;
+begin
+    if tg_op = 'INSERT' then
+        insert into public.pr_review_pr_summary as s
+            (repo_full_name, pr_number, last_job_id, last_head_sha, last_status, last_review_at, jobs_total)
+        values
+            (new.repo_full_name, new.pr_number, new.id, new.head_sha, new.status::text, new.created_at, 1)
+        on conflict (repo_full_name, pr_number) do update set
+            jobs_total = s.jobs_total + 1,
+            last_job_id = case when excluded.last_review_at >= s.last_review_at then excluded.last_job_id else s.last_job_id end,
+            last_head_sha = case when excluded.last_review_at >= s.last_review_at then excluded.last_head_sha else s.last_head_sha end,
+            last_status = case when excluded.last_review_at >= s.last_review_at then excluded.last_status else s.last_status end,
+            last_review_at = greatest(s.last_review_at, excluded.last_review_at)
+        returning (xmax = 0) into new_pr;
+
+        insert into public.pr_review_repo_summary as r
+            (repo_full_name, last_job_id, last_status, last_review_at, prs_reviewed, jobs_total)
+        values
+            (new.repo_full_name, new.id, new.status::text, new.created_at, 1, 1)
+        on conflict (repo_full_name) do update set
+            jobs_total = r.jobs_total + 1,
+            prs_reviewed = r.prs_reviewed + case when new_pr then 1 else 0 end,
+            last_job_id = case when excluded.last_review_at >= r.last_review_at then excluded.last_job_id else r.last_job_id end,
+            last_status = case when excluded.last_review_at >= r.last_review_at then excluded.last_status else r.last_status end,
+            last_review_at = greatest(r.last_review_at, excluded.last_review_at);
+    else
+        -- update de status (created_at não muda, ver 007): só mexe se o job é o último
+        update public.pr_review_pr_summary set
+            last_job_id = new.id,
+            last_head_sha = new.head_sha,
+            last_status = new.status::text,
+            last_review_at = greatest(last_review_at, new.created_at)
+        where repo_full_name = new.repo_full_name
+          and pr_number = new.pr_number
+          and (last_job_id = new.id or new.created_at >= last_review_at);
+
+        update public.pr_review_repo_summary set
+            last_job_id = new.id,
+            last_status = new.status::text,
+            last_review_at = greatest(last_review_at, new.created_at)
+        where repo_full_name = new.repo_full_name
+          and (last_job_id = new.id or new.created_at >= last_review_at);
+    end if;
+    return new;
+end;
+$$;
+
+drop trigger if exists pr_review_summary_sync on public.pr_review_jobs;
+create trigger pr_review_summary_sync
+    after insert or update of status, created_at on public.pr_review_jobs
+    for each row execute function public.pr_review_summary_sync();
+
+
+-- Backfill (rodar com o tráfego de reviews parado; é idempotente)
+insert into public.pr_review_pr_summary
+    (repo_full_name, pr_number, last_job_id, last_head_sha, last_status, last_review_at, jobs_total)
+select distinct on (repo_full_name, pr_number)
+    repo_full_name,
+    pr_number,
+    id,
+    head_sha,
+    status::text,
+    created_at,
+    count(*) over (partition by repo_full_name, pr_number)::int
+from public.pr_review_jobs
+order by repo_full_name, pr_number, created_at desc, id desc
+on conflict (repo_full_name, pr_number) do nothing;
+
+insert into public.pr_review_repo_summary
+    (repo_full_name, last_job_id, last_status, last_review_at, prs_reviewed, jobs_total)
+select distinct on (repo_full_name)
+    repo_full_name,
+    last_job_id,
+    last_status,
+    last_review_at,
+    count(*) over (partition by repo_full_name)::int,
+    sum(jobs_total) over (partition by repo_full_name)::int
+from public.pr_review_pr_summary
+order by repo_full_name, last_review_at desc, last_job_id desc
+on conflict (repo_full_name) do nothing;
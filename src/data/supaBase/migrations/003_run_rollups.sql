@@ -0,0 +1,32 @@
+-- Agregados de runs por bucket de tempo (minute/hour/day) x agente x modelo x status,
+-- atualizados quando cada run termina (ver src/utils/run_rollups.py).
+-- Histogramas: bigint[] com os buckets de src/utils/histogram.py, somados elemento a elemento.
+
+create or replace function public.int8_array_add(a bigint[], b bigint[]) returns bigint[]
+language sql immutable as $$
+    select coalesce(array_agg(coalesce(x, 0) + coalesce(y, 0) order by i), '{}'::bigint[])
+    from unnest(a, b) with ordinality as t(x, y, i)
+$$;
+
+drop aggregate if exists public.int8_array_sum(bigint[]);
+create aggregate public.int8_array_sum(bigint[]) (
+    sfunc = public.int8_array_add,
+    stype = bigint[],
+    initcond = '{}'
+);
+
+create table if not exists public.run_rollups (
+    granularity text not null check (granularity in ('minute', 'hour', 'day')),
+    bucket_start timestamptz not null,
+    agent_id text not null,
+    model text not null default '',
+    status text not null,
+    runs bigint not null default 0,
+    prompt_tokens bigint not null default 0,
+    completion_tokens bigint not null default 0,
+    total_tokens bigint not null default 0,
+    cost_usd numeric(18, 8) not null default 0,
+    duration_ms_sum bigint not null default 0,
+    duration_hist bigint[] not null default '{}',
+    primary key (granularity, bucket_start, agent_id, model, status)
+);
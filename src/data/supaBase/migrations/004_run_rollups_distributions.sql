@@ -0,0 +1,11 @@
+-- Distribuições extras nos rollups: latência do LLM (metadata.telemetry.invoke_ms),
+-- overhead nosso (duration_ms - invoke_ms) e tokens por run.
+-- Buckets antigos ficam com arrays vazios: rode o backfill (python -m src.utils.run_rollups)
+-- para preencher o histórico.
+
+alter table public.run_rollups
+    add column if not exists invoke_ms_sum bigint not null default 0,
+    add column if not exists overhead_ms_sum bigint not null default 0,
+    add column if not exists invoke_hist bigint[] not null default '{}',
+    add column if not exists overhead_hist bigint[] not null default '{}',
+    add column if not exists tokens_hist bigint[] not null default '{}';
@@ -0,0 +1,15 @@
+-- Resumo incremental de sessões longas (ver src/services/session_summarizer.py).
+-- As mensagens até summarized_until estão dobradas em `summary` e saem da janela de histórico.
+
+create table if not exists public.chat_session_summaries (
+    session_id uuid primary key references public.chat_sessions (id) on delete cascade,
+    summary text not null,
+    summarized_until timestamptz not null,
+    summarized_messages int not null default 0,
+    model text not null default '',
+    updated_at timestamptz not null default now()
+);
+
+-- leitura da cauda não resumida (session_id, created_at > summarized_until)
+create index if not exists chat_messages_session_created_idx
+    on public.chat_messages (session_id, created_at);
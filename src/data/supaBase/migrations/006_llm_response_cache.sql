@@ -0,0 +1,17 @@
+-- Cache de respostas exatas do LLM (RESPONSE_CACHE_BACKEND=postgres; ver src/services/response_cache.py).
+-- Compartilhado entre workers; TTL por linha (expires_at) e teto de linhas aplicado pelo app.
+
+create table if not exists public.llm_response_cache (
+    key text primary key,
+    model text not null default '',
+    response text not null,
+    hits bigint not null default 0,
+    created_at timestamptz not null default now(),
+    expires_at timestamptz not null
+);
+
+create index if not exists llm_response_cache_expires_idx
+    on public.llm_response_cache (expires_at);
+
+create index if not exists llm_response_cache_created_idx
+    on public.llm_response_cache (created_at desc);
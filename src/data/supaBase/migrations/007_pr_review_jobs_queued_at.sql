@@ -0,0 +1,12 @@
+-- Início da execução atual do job (enqueue_job/persist_review). created_at fica imutável:
+-- ordena /pr/history (keyset created_at, id) e os resumos por repo/PR; re-enfileirar só
+-- move queued_at, que é o que o critério de job abandonado (fail_stale_jobs) lê.
+
+alter table public.pr_review_jobs
+    add column if not exists queued_at timestamptz;
+
+update public.pr_review_jobs set queued_at = created_at where queued_at is null;
+
+alter table public.pr_review_jobs
+    alter column queued_at set default now(),
+    alter column queued_at set not null;
@@ -1,14 +1,45 @@
+import copy
 import json
 from typing import Any, Dict, List, Optional
 from uuid import UUID
 
-from src.data.supaBase.supaBase_db import DB
+from src.core.config import settings
+from src.data.supaBase.supaBase_async_db import AsyncDB
+from src.utils.lru_cache import LRUCache
+
+AGENT_CHANGED_CHANNEL = "agent_config_changed"
+
+# read-through de get_agent/list_agents (as rotas alteram os dicts retornados, por isso sempre copiamos)
+_cache = LRUCache(
+    "agent_config",
+    max_size=settings.AGENT_CONFIG_CACHE_MAX_SIZE,
+    ttl_s=settings.AGENT_CONFIG_CACHE_TTL_S,
+)
+_LIST_KEY = ("list",)
 
 
 class SupaBaseAgentDB:
 
     @staticmethod
-    def create_agent(
+    def evict(agent_id: Optional[str | UUID] = None) -> None:
+        """Remove o agente (e sempre a listagem) do cache local."""
+        if agent_id:
+            _cache.pop(("agent", str(agent_id)))
+        _cache.pop(_LIST_KEY)
+
+    @staticmethod
+    def clear_cache() -> None:
+        _cache.clear()
+
+    @staticmethod
+    async def _notify_changed(agent_id: str | UUID) -> None:
+        """Avisa os outros workers (LISTEN em AGENT_CHANGED_CHANNEL) para evictarem o agente."""
+        if not settings.AGENT_CONFIG_NOTIFY_ENABLED:
+            return
+        await AsyncDB.execute("select pg_notify(%s, %s);", (AGENT_CHANGED_CHANNEL, str(agent_id)))
+
+    @staticmethod
+    async def create_agent(
         name: str,
         description: Optional[str],
         provider: str,
@@ -27,10 +58,14 @@ class SupaBaseAgentDB:
             id, name, description, provider, model, tools, prompt, temperature, max_tokens,
             created_at, updated_at;
         """
-        return DB.fetch_one(sql, (name, description, provider, model, json.dumps(tools), prompt, temperature, max_tokens))
+        row = await AsyncDB.fetch_one(sql, (name, description, provider, model, json.dumps(tools), prompt, temperature, max_tokens))
+        SupaBaseAgentDB.evict()
+        if row:
+            await SupaBaseAgentDB._notify_changed(row["id"])
+        return row
 
     @staticmethod
-    def list_agents() -> List[Dict[str, Any]]:
+    async def list_agents() -> List[Dict[str, Any]]:
         sql = """
         select
             id, name, description, provider, model, tools, prompt, temperature, max_tokens,
@@ -38,10 +73,14 @@ class SupaBaseAgentDB:
         from public.agents
         order by created_at desc;
         """
-        return DB.fetch_all(sql)
+        rows = _cache.get(_LIST_KEY)
+        if rows is None:
+            rows = await AsyncDB.fetch_all(sql)
+            _cache.set(_LIST_KEY, rows)
+        return copy.deepcopy(rows)
 
     @staticmethod
-    def get_agent(agent_id: str | UUID) -> Optional[Dict[str, Any]]:
+    async def get_agent(agent_id: str | UUID) -> Optional[Dict[str, Any]]:
         sql = """
         select
             id, name, description, provider, model, tools, prompt, temperature, max_tokens,
@@ -49,10 +88,17 @@ class SupaBaseAgentDB:
         from public.agents
         where id = %s;
         """
-        return DB.fetch_one(sql, (str(agent_id),))
+        key = ("agent", str(agent_id))
+        row = _cache.get(key)
+        if row is None:
+            row = await AsyncDB.fetch_one(sql, (str(agent_id),))
+            if row is None:
+                return None
+            _cache.set(key, row)
+        return copy.deepcopy(row)
 
     @staticmethod
-    def update_agent(agent_id: str | UUID, patch: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    async def update_agent(agent_id: str | UUID, patch: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         allowed = {"name", "description", "provider", "model", "prompt", "temperature", "max_tokens", "tools"}
         sets = []
         values = []
@@ -68,7 +114,7 @@ class SupaBaseAgentDB:
                 values.append(v)
 
         if not sets:
-            return SupaBaseAgentDB.get_agent(agent_id)
+            return await SupaBaseAgentDB.get_agent(agent_id)
 
         sets.append("updated_at = now()")
 
@@ -81,10 +127,16 @@ class SupaBaseAgentDB:
             created_at, updated_at;
         """
         values.append(str(agent_id))
-        return DB.fetch_one(sql, tuple(values))
+        row = await AsyncDB.fetch_one(sql, tuple(values))
+        SupaBaseAgentDB.evict(agent_id)
+        await SupaBaseAgentDB._notify_changed(agent_id)
+        return row
 
     @staticmethod
-    def delete_agent(agent_id: str | UUID) -> bool:
+    async def delete_agent(agent_id: str | UUID) -> bool:
         sql = "delete from public.agents where id = %s;"
-        rows = DB.execute(sql, (str(agent_id),))
-        return rows > 0
\ No newline at end of file
+        rows = await AsyncDB.execute(sql, (str(agent_id),))
+        SupaBaseAgentDB.evict(agent_id)
+        if rows > 0:
+            await SupaBaseAgentDB._notify_changed(agent_id)
+        return rows > 0
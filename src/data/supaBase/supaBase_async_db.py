@@ -0,0 +1,116 @@
+from __future__ import annotations
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Optional, Sequence
+
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row, tuple_row
+from psycopg_pool import AsyncConnectionPool
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDB:
+    """
+    Contraparte assíncrona do DB (psycopg 3 + psycopg_pool).
+    Mesma API (fetch_one/fetch_all/execute), mesmos placeholders %s,
+    mas sem bloquear o event loop. O DB síncrono continua para scripts
+    e para as rotas `def` (que o FastAPI já roda em threadpool).
+    """
+
+    _pool: Optional[AsyncConnectionPool] = None
+    _pool_pid: Optional[int] = None
+    _lock: Optional[asyncio.Lock] = None
+
+    @staticmethod
+    def conninfo() -> str:
+        return make_conninfo(
+            user=settings.SUPABASE_DB_USER,
+            password=settings.SUPABASE_DB_PASSWORD,
+            host=settings.SUPABASE_DB_HOST,
+            port=settings.SUPABASE_DB_PORT,
+            dbname=settings.SUPABASE_DB_NAME,
+            sslmode="require",
+        )
+
+    @staticmethod
+    async def pool() -> AsyncConnectionPool:
+        """Pool por processo, aberto no primeiro uso (ou no lifespan via open_pool)."""
+        pid = os.getpid()
+        if AsyncDB._pool is not None and AsyncDB._pool_pid == pid:
+            return AsyncDB._pool
+
+        if AsyncDB._lock is None:
+            AsyncDB._lock = asyncio.Lock()
+
+        async with AsyncDB._lock:
+            if AsyncDB._pool is None or AsyncDB._pool_pid != pid:
+                pool = AsyncConnectionPool(
+                    AsyncDB.conninfo(),
+                    min_size=settings.DB_POOL_MIN_SIZE,
+                    max_size=settings.DB_POOL_MAX_SIZE,
+                    timeout=settings.DB_POOL_TIMEOUT_S,
+                    max_lifetime=settings.DB_POOL_MAX_LIFETIME_S,
+                    max_idle=settings.DB_POOL_MAX_IDLE_S,
+                    check=AsyncConnectionPool.check_connection,
+                    # prepared statements não sobrevivem ao pooler do Supabase em modo transaction
+                    kwargs={"prepare_threshold": None},
+                    open=False,
+                    name="supabase-async",
+                )
+                await pool.open()
+                AsyncDB._pool = pool
+                AsyncDB._pool_pid = pid
+                logger.info(
+                    f"[ASYNC_DB] Pool aberto (min={settings.DB_POOL_MIN_SIZE}, max={settings.DB_POOL_MAX_SIZE})"
+                )
+        return AsyncDB._pool
+
+    @staticmethod
+    async def open_pool() -> None:
+        await AsyncDB.pool()
+
+    @staticmethod
+    async def close_pool() -> None:
+        pool = AsyncDB._pool
+        AsyncDB._pool = None
+        AsyncDB._pool_pid = None
+        if pool is not None:
+            await pool.close()
+
+    @staticmethod
+    @asynccontextmanager
+    async def cursor(dict_cursor: bool = False):
+        """
+        Commit ao sair sem erro, rollback em caso de exceção
+        (comportamento do `pool.connection()`), igual ao DB.cursor.
+        """
+        pool = await AsyncDB.pool()
+        async with pool.connection() as conn:
+            async with conn.cursor(row_factory=dict_row if dict_cursor else tuple_row) as cur:
+                yield conn, cur
+
+    @staticmethod
+    async def fetch_one(sql: str, params: Optional[Sequence[Any]] = None) -> Optional[dict]:
+        async with AsyncDB.cursor(dict_cursor=True) as (_, cur):
+            await cur.execute(sql, params or ())
+            return await cur.fetchone()
+
+    @staticmethod
+    async def fetch_all(sql: str, params: Optional[Sequence[Any]] = None) -> list[dict]:
+        async with AsyncDB.cursor(dict_cursor=True) as (_, cur):
+            await cur.execute(sql, params or ())
+            return await cur.fetchall()
+
+    @staticmethod
+    async def execute(sql: str, params: Optional[Sequence[Any]] = None) -> int:
+        """
+        Executa comando (INSERT/UPDATE/DELETE). Retorna rowcount.
+        """
+        async with AsyncDB.cursor(dict_cursor=False) as (_, cur):
+            await cur.execute(sql, params or ())
+            return cur.rowcount
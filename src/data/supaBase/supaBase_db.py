@@ -5,12 +5,14 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 from src.core.config import settings
 from psycopg2.extras import Json
+from src.data.supaBase.supaBase_pool import get_pool, close_pool
 
 
 class DB:
     """
     Núcleo de acesso ao Postgres (Supabase).
     Centraliza conexão, commit/rollback e fechamento de recursos.
+    As conexões vêm de um pool por processo (ver supaBase_pool.py).
     """
 
     @staticmethod
@@ -24,22 +26,34 @@ class DB:
             sslmode="require",
         )
 
+    @staticmethod
+    def pool():
+        return get_pool(DB.connect)
+
+    @staticmethod
+    def close_pool() -> None:
+        close_pool()
+
     @staticmethod
     @contextmanager
     def cursor(dict_cursor: bool = False):
-        conn = DB.connect()
+        pool = DB.pool()
+        conn = pool.getconn()
         cur = None
+        broken = False
         try:
             cur = conn.cursor(cursor_factory=RealDictCursor) if dict_cursor else conn.cursor()
             yield conn, cur
             conn.commit()
-        except Exception:
-            conn.rollback()
+        except Exception as e:
+            broken = isinstance(e, (psycopg2.OperationalError, psycopg2.InterfaceError)) or bool(conn.closed)
+            if not broken:
+                conn.rollback()
             raise
         finally:
-            if cur is not None:
+            if cur is not None and not cur.closed:
                 cur.close()
-            conn.close()
+            pool.putconn(conn, discard=broken)
 
     @staticmethod
     def fetch_one(sql: str, params: Optional[Sequence[Any]] = None) -> Optional[dict]:
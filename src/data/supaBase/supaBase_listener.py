@@ -0,0 +1,66 @@
+from __future__ import annotations
+import asyncio
+import logging
+from typing import Callable, Optional
+
+import psycopg
+
+from src.data.supaBase.supaBase_async_db import AsyncDB
+
+logger = logging.getLogger(__name__)
+
+
+class PgListener:
+    """
+    Escuta um canal Postgres (LISTEN/NOTIFY) numa conexão dedicada e chama
+    `on_notify(payload)` para cada notificação. Reconecta com backoff.
+
+    Obs: LISTEN precisa de conexão de sessão — no Supabase use a porta direta
+    ou o pooler em modo session (5432), não o modo transaction (6543).
+    """
+
+    def __init__(self, channel: str, on_notify: Callable[[str], None], on_reconnect: Optional[Callable[[], None]] = None):
+        self.channel = channel
+        self.on_notify = on_notify
+        # após reconectar podemos ter perdido notificações: quem escuta decide o que limpar
+        self.on_reconnect = on_reconnect
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name=f"pg-listen-{self.channel}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        first = True
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    AsyncDB.conninfo(), autocommit=True
+                ) as conn:
+                    await conn.execute(f'listen "{self.channel}"')
+                    logger.info(f"[PG_LISTEN] Escutando canal {self.channel}")
+                    if not first and self.on_reconnect:
+                        self.on_reconnect()
+                    first = False
+                    backoff = 1.0
+                    async for n in conn.notifies():
+                        try:
+                            self.on_notify(n.payload)
+                        except Exception as e:
+                            logger.warning(f"[PG_LISTEN] Erro tratando notify em {self.channel}: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[PG_LISTEN] Conexão de {self.channel} caiu: {type(e).__name__}: {e}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
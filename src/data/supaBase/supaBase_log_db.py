@@ -1,20 +1,32 @@
 # src/db/runs_repo.py
 from typing import Any, Dict, Optional
-from psycopg2.extras import Json
-from src.data.supaBase.supaBase_db import DB
+from psycopg.types.json import Json
+from src.data.supaBase.supaBase_async_db import AsyncDB
+from src.data.supaBase.supaBase_rollup_db import RUN_ROLLUP_SOURCE
+
+
+RUN_COLUMNS = (
+    "id", "created_at", "status", "agent_id", "agent_version", "user_id", "session_id",
+    "provider", "model", "metadata",
+    "finished_at", "duration_ms",
+    "prompt_tokens", "completion_tokens", "total_tokens",
+    "prompt_tokens_cached", "reasoning_tokens",
+    "cost_usd",
+    "error_type", "error_message", "error_hash",
+)
 
 
 class SupaBaseRunsDB:
 
     @staticmethod
-    def insert_run(row: dict) -> None:
+    async def insert_run(row: dict) -> None:
         sql = """
         insert into public.runs
             (id, created_at, status, agent_id, agent_version, user_id, session_id, provider, model, metadata)
         values
             (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb);
         """
-        DB.execute(sql, (
+        await AsyncDB.execute(sql, (
             row["id"],
             row["created_at"],
             row["status"],
@@ -28,7 +40,8 @@ class SupaBaseRunsDB:
         ))
 
     @staticmethod
-    def update_run(run_id: str, patch: Dict[str, Any]) -> None:
+    async def update_run(run_id: str, patch: Dict[str, Any]) -> Optional[dict]:
+        """Atualiza a run e devolve as colunas usadas nos rollups (None se não achou)."""
         allowed = {
             "finished_at", "duration_ms", "status", "session_id",
             "provider", "model",
@@ -47,17 +60,50 @@ class SupaBaseRunsDB:
                 continue
 
             if k == "metadata":
-                #sempre adaptar dict/list pra JSON
-                sets.append("metadata = %s::jsonb")
+                # merge raso, igual ao do sink: mantém o metadata do start (ex.: route)
+                sets.append("metadata = coalesce(metadata, '{}'::jsonb) || %s::jsonb")
                 values.append(Json(v if v is not None else {}))
             else:
                 sets.append(f"{k} = %s")
                 values.append(v)
 
         if not sets:
-            return
+            return None
 
-        sql = f"update public.runs set {', '.join(sets)} where id = %s;"
+        sql = f"update public.runs set {', '.join(sets)} where id = %s returning {RUN_ROLLUP_SOURCE};"
         values.append(run_id)
 
-        DB.execute(sql, tuple(values))
\ No newline at end of file
+        return await AsyncDB.fetch_one(sql, tuple(values))
+
+    @staticmethod
+    async def upsert_runs(rows: list[dict]) -> None:
+        """
+        Grava várias runs (linha completa: início + fim, se já terminou) num único
+        INSERT multi-row com upsert por id. Usado pelo sink de telemetria em lote.
+        """
+        if not rows:
+            return
+
+        placeholders = ", ".join("%s::jsonb" if c == "metadata" else "%s" for c in RUN_COLUMNS)
+        values_sql = ",\n".join(f"({placeholders})" for _ in rows)
+        updates = ",\n".join(f"{c} = excluded.{c}" for c in RUN_COLUMNS if c != "id")
+
+        params = []
+        for row in rows:
+            for c in RUN_COLUMNS:
+                if c == "metadata":
+                    params.append(Json(row.get("metadata") or {}))
+                elif c == "provider":
+                    params.append(row.get("provider", "openai"))
+                else:
+                    params.append(row.get(c))
+
+        sql = f"""
+        insert into public.runs
+            ({", ".join(RUN_COLUMNS)})
+        values
+            {values_sql}
+        on conflict (id) do update set
+            {updates};
+        """
+        await AsyncDB.execute(sql, tuple(params))
@@ -1,47 +1,167 @@
 # src/db/memory_repo.py
-from typing import List, Dict, Any, Optional
-from src.data.supaBase.supaBase_db import DB
+import json
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from src.data.supaBase.supaBase_async_db import AsyncDB
+
+# Uma ida ao banco por turno: valida (ou cria) a sessão, grava a mensagem do
+# usuário e lê as anteriores. json_populate_record tipa os valores pelas colunas
+# das tabelas (INSERT ... SELECT com parâmetros soltos chegaria como text).
+# O created_at da mensagem vem da aplicação, o mesmo relógio das respostas
+# gravadas em lote (ChatMessageWriter), para a ordem do histórico não depender
+# de relógios diferentes. CTEs não enxergam o INSERT da própria query: `history` traz só as mensagens
+# anteriores e quem chama acrescenta a do usuário no fim. Mensagens já dobradas
+# no resumo da sessão (chat_session_summaries) ficam de fora.
+_START_TURN_SQL = """
+with existing as (
+    select id from public.chat_sessions
+    where id = %(session_id)s and user_id = %(user_id)s and agent_id = %(agent_id)s
+),
+created as (
+    insert into public.chat_sessions (user_id, agent_id)
+    select r.user_id, r.agent_id
+    from json_populate_record(null::public.chat_sessions, %(session)s::json) r
+    where not exists (select 1 from existing)
+    returning id
+),
+session as (
+    select id from existing
+    union all
+    select id from created
+),
+summ as (
+    select summary, summarized_until
+    from public.chat_session_summaries
+    where session_id = (select id from session)
+),
+msg as (
+    insert into public.chat_messages (session_id, role, content, created_at)
+    select s.id, m.role, m.content, m.created_at
+    from session s, json_populate_record(null::public.chat_messages, %(message)s::json) m
+    returning session_id
+)
+select
+    s.id as session_id,
+    (select summary from summ) as summary,
+    coalesce((
+        select json_agg(json_build_object('role', h.role, 'content', h.content) order by h.created_at)
+        from (
+            select role, content, created_at
+            from public.chat_messages
+            where session_id = s.id
+              and created_at > coalesce((select summarized_until from summ), '-infinity'::timestamptz)
+            order by created_at desc
+            limit %(previous_limit)s
+        ) h
+    ), '[]'::json) as history
+from session s;
+"""
+
+# Resumo atual + cauda não resumida (mais antigas primeiro), para o passe de resumo
+_UNSUMMARIZED_SQL = """
+with summ as (
+    select summary, summarized_until, summarized_messages
+    from public.chat_session_summaries
+    where session_id = %(session_id)s
+)
+select
+    (select summary from summ) as summary,
+    (select summarized_until from summ) as summarized_until,
+    coalesce((select summarized_messages from summ), 0) as summarized_messages,
+    coalesce((
+        select json_agg(json_build_object('role', m.role, 'content', m.content, 'created_at', m.created_at) order by m.created_at)
+        from (
+            select role, content, created_at
+            from public.chat_messages
+            where session_id = %(session_id)s
+              and created_at > coalesce((select summarized_until from summ), '-infinity'::timestamptz)
+            order by created_at
+            limit %(limit)s
+        ) m
+    ), '[]'::json) as messages;
+"""
 
 
 class SupaBaseMemoryDB:
 
     @staticmethod
-    def get_or_create_session(user_id: str, agent_id: str, session_id: str | None = None) -> str:
-        # Se vier session_id, valida se existe e pertence ao user/agent
-        if session_id:
-            check_sql = """
-            select id from public.chat_sessions
-            where id=%s and user_id=%s and agent_id=%s;
-            """
-            row = DB.fetch_one(check_sql, (session_id, user_id, agent_id))
-            if row:
-                return session_id
-
-        # Cria nova sessão
-        insert_sql = """
-        insert into public.chat_sessions (user_id, agent_id)
-        values (%s, %s)
-        returning id;
-        """
-        row = DB.fetch_one(insert_sql, (user_id, agent_id))
-        return str(row["id"])
+    async def start_turn(
+        user_id: str,
+        agent_id: str,
+        session_id: str | None,
+        content: str,
+        created_at: datetime,
+        history_limit: int = 20,
+    ) -> Tuple[str, List[Dict[str, Any]], Optional[str]]:
+        """
+        Valida (ou cria) a sessão, grava a mensagem do usuário e lê o histórico numa query só.
+        `created_at` é o horário da mensagem do usuário (relógio da aplicação).
+        Retorna (session_id, histórico cronológico terminando na mensagem do usuário,
+        resumo das mensagens anteriores à janela ou None).
+        """
+        row = await AsyncDB.fetch_one(_START_TURN_SQL, {
+            "session_id": session_id,
+            "user_id": user_id,
+            "agent_id": agent_id,
+            "session": json.dumps({"user_id": user_id, "agent_id": agent_id}),
+            "message": json.dumps({"role": "user", "content": content, "created_at": created_at.isoformat()}),
+            "previous_limit": max(history_limit - 1, 0),
+        })
+        history = list(row["history"] or [])
+        history.append({"role": "user", "content": content})
+        return str(row["session_id"]), history[-history_limit:] if history_limit > 0 else [], row["summary"]
 
     @staticmethod
-    def save_message(session_id: str, role: str, content: str) -> None:
-        sql = """
-        insert into public.chat_messages (session_id, role, content)
-        values (%s, %s, %s);
+    async def save_messages(rows: List[Tuple[str, str, str, datetime]]) -> None:
+        """
+        INSERT multi-row de (session_id, role, content, created_at). O created_at
+        vem de quem chama: a mensagem gravada em lote mantém a ordem em que foi gerada.
+        """
+        if not rows:
+            return
+        sql = f"""
+        insert into public.chat_messages (session_id, role, content, created_at)
+        values {", ".join(["(%s, %s, %s, %s)"] * len(rows))};
+        """
+        await AsyncDB.execute(sql, [v for row in rows for v in row])
+
+    @staticmethod
+    async def notify_session_changed(channel: str, payload: str) -> None:
+        await AsyncDB.execute("select pg_notify(%s, %s);", (channel, payload))
+
+    @staticmethod
+    async def load_unsummarized(session_id: str, limit: int) -> Dict[str, Any]:
         """
-        DB.execute(sql, (session_id, role, content))
+        {"summary", "summarized_until", "summarized_messages", "messages"}: as
+        `limit` mensagens mais antigas ainda fora do resumo (created_at em ISO).
+        """
+        row = await AsyncDB.fetch_one(_UNSUMMARIZED_SQL, {"session_id": session_id, "limit": limit})
+        return {**row, "messages": list(row["messages"] or [])}
 
     @staticmethod
-    def load_history(session_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+    async def save_summary(
+        session_id: str,
+        summary: str,
+        summarized_until: str,
+        summarized_messages: int,
+        model: str,
+        previous_until: Optional[datetime],
+    ) -> bool:
+        """
+        Grava o resumo só se ninguém avançou a sessão desde a leitura
+        (`previous_until` = summarized_until lido). Retorna False se perdeu a corrida.
+        """
         sql = """
-        select role, content
-        from public.chat_messages
-        where session_id=%s
-        order by created_at desc
-        limit %s;
-        """
-        rows = DB.fetch_all(sql, (session_id, limit))
-        return list(reversed(rows))  # cronológico
+        insert into public.chat_session_summaries as s
+            (session_id, summary, summarized_until, summarized_messages, model)
+        values (%s, %s, %s::timestamptz, %s, %s)
+        on conflict (session_id) do update set
+            summary = excluded.summary,
+            summarized_until = excluded.summarized_until,
+            summarized_messages = excluded.summarized_messages,
+            model = excluded.model,
+            updated_at = now()
+        where s.summarized_until is not distinct from %s::timestamptz;
+        """
+        n = await AsyncDB.execute(sql, (session_id, summary, summarized_until, summarized_messages, model, previous_until))
+        return n > 0
@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from psycopg2 import extensions
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """Nenhuma conexão ficou livre dentro de DB_POOL_TIMEOUT_S."""
+
+
+class PgConnectionPool:
+    """
+    Pool de conexões psycopg2 thread-safe.
+
+    - min_size/max_size: conexões mantidas abertas / limite total.
+    - max_lifetime_s: conexões mais velhas que isso são descartadas no checkout/checkin.
+    - max_idle_s: conexões ociosas além do min_size são fechadas (reaping).
+    - healthcheck_idle_s: conexões ociosas há mais tempo que isso recebem um
+      `select 1` antes de serem entregues (evita conexão morta pelo pooler do Supabase).
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], "extensions.connection"],
+        *,
+        min_size: int,
+        max_size: int,
+        timeout_s: float,
+        max_lifetime_s: float,
+        max_idle_s: float,
+        healthcheck_idle_s: float,
+    ):
+        if max_size < 1 or min_size < 0 or min_size > max_size:
+            raise ValueError("DB pool: esperado 0 <= min_size <= max_size e max_size >= 1")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout_s = timeout_s
+        self.max_lifetime_s = max_lifetime_s
+        self.max_idle_s = max_idle_s
+        self.healthcheck_idle_s = healthcheck_idle_s
+
+        self._cond = threading.Condition()
+        # (conn, last_used) — conexões livres; a mais recente fica à direita (LIFO)
+        self._idle: deque[tuple[extensions.connection, float]] = deque()
+        # id(conn) -> created_at de todas as conexões abertas pelo pool
+        self._created: dict[int, float] = {}
+        self._opening = 0
+        self._closed = False
+        self._stop_reaper = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+
+        self.counters = {
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "checkouts": 0,
+            "healthcheck_failures": 0,
+            "timeouts": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+
+    def getconn(self) -> "extensions.connection":
+        deadline = time.monotonic() + self.timeout_s
+
+        while True:
+            candidate = None
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("DB pool já foi fechado")
+
+                if self._idle:
+                    candidate = self._idle.pop()
+                elif self._size() < self.max_size:
+                    # reserva o slot e abre a conexão fora do lock
+                    self._opening += 1
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.counters["timeouts"] += 1
+                        raise PoolTimeoutError(
+                            f"Nenhuma conexão livre em {self.timeout_s:.1f}s (max_size={self.max_size})"
+                        )
+                    self._cond.wait(remaining)
+                    continue
+
+            if candidate is None:
+                conn = self._open_reserved()
+                with self._cond:
+                    self.counters["checkouts"] += 1
+                return conn
+
+            conn, last_used = candidate
+            if self._is_usable(conn, last_used):
+                with self._cond:
+                    self.counters["checkouts"] += 1
+                return conn
+
+            self._discard(conn)
+
+    def putconn(self, conn: "extensions.connection", discard: bool = False) -> None:
+        if not discard and not self._closed:
+            discard = not self._reset(conn) or self._expired(conn)
+
+        if discard or self._closed:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+        self.reap()
+
+    def warmup(self) -> None:
+        """Abre conexões até min_size (chamado no startup para tirar o handshake da primeira request)."""
+        while True:
+            with self._cond:
+                if self._closed or self._size() >= self.min_size:
+                    return
+                self._opening += 1
+            conn = self._open_reserved()
+            with self._cond:
+                self._idle.appendleft((conn, time.monotonic()))
+                self._cond.notify()
+
+    def reap(self) -> None:
+        """Fecha conexões ociosas além do min_size que passaram de max_idle_s ou max_lifetime_s."""
+        now = time.monotonic()
+        to_close = []
+
+        with self._cond:
+            keep: deque[tuple[extensions.connection, float]] = deque()
+            # as mais antigas ficam à esquerda
+            while self._idle:
+                conn, last_used = self._idle.popleft()
+                over_min = len(self._created) - len(to_close) > self.min_size
+                if self._expired(conn, now) or (over_min and now - last_used > self.max_idle_s):
+                    to_close.append(conn)
+                else:
+                    keep.append((conn, last_used))
+            self._idle = keep
+
+        for conn in to_close:
+            self._discard(conn)
+
+    def start_reaper(self, interval_s: float) -> None:
+        """Thread daemon que chama reap() periodicamente, mesmo sem tráfego."""
+        if self._reaper is not None:
+            return
+
+        def _loop():
+            while not self._stop_reaper.wait(interval_s):
+                try:
+                    self.reap()
+                except Exception as e:
+                    logger.warning(f"[DB_POOL] Falha no reaper: {type(e).__name__}: {e}")
+
+        self._reaper = threading.Thread(target=_loop, name="db-pool-reaper", daemon=True)
+        self._reaper.start()
+
+    def closeall(self) -> None:
+        self._stop_reaper.set()
+        with self._cond:
+            self._closed = True
+            idle = [c for c, _ in self._idle]
+            self._idle.clear()
+            self._cond.notify_all()
+
+        for conn in idle:
+            self._discard(conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self._size(),
+                "idle": len(self._idle),
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                **self.counters,
+            }
+
+    # ------------------------------------------------------------------
+    # internos
+    # ------------------------------------------------------------------
+
+    def _size(self) -> int:
+        return len(self._created) + self._opening
+
+    def _open_reserved(self) -> "extensions.connection":
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._opening -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._opening -= 1
+            self._created[id(conn)] = time.monotonic()
+            self.counters["connections_opened"] += 1
+        return conn
+
+    def _discard(self, conn: "extensions.connection") -> None:
+        with self._cond:
+            self._created.pop(id(conn), None)
+            self.counters["connections_closed"] += 1
+            self._cond.notify()
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception:
+            pass
+
+    def _expired(self, conn: "extensions.connection", now: Optional[float] = None) -> bool:
+        created_at = self._created.get(id(conn))
+        if created_at is None:
+            return True
+        return ((now or time.monotonic()) - created_at) > self.max_lifetime_s
+
+    def _is_usable(self, conn: "extensions.connection", last_used: float) -> bool:
+        if conn.closed or self._expired(conn):
+            return False
+
+        if time.monotonic() - last_used < self.healthcheck_idle_s:
+            return True
+
+        try:
+            with conn.cursor() as cur:
+                cur.execute("select 1")
+            conn.rollback()
+            return True
+        except Exception as e:
+            with self._cond:
+                self.counters["healthcheck_failures"] += 1
+            logger.warning(f"[DB_POOL] Conexão descartada no health check: {type(e).__name__}: {e}")
+            return False
+
+    @staticmethod
+    def _reset(conn: "extensions.connection") -> bool:
+        """Garante que a conexão volta ao pool sem transação aberta. False = descartar."""
+        if conn.closed:
+            return False
+        try:
+            status = conn.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                return False
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            return True
+        except Exception:
+            return False
+
+
+_pool: Optional[PgConnectionPool] = None
+_pool_pid: Optional[int] = None
+_pool_lock = threading.Lock()
+
+
+def get_pool(connect: Callable[[], "extensions.connection"]) -> PgConnectionPool:
+    """
+    Pool único por processo, criado no primeiro uso.
+    Se o processo foi forkado (workers do uvicorn/gunicorn), cria um pool novo
+    em vez de reaproveitar sockets herdados do pai.
+    """
+    global _pool, _pool_pid
+
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            _pool = PgConnectionPool(
+                connect,
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=settings.DB_POOL_MAX_SIZE,
+                timeout_s=settings.DB_POOL_TIMEOUT_S,
+                max_lifetime_s=settings.DB_POOL_MAX_LIFETIME_S,
+                max_idle_s=settings.DB_POOL_MAX_IDLE_S,
+                healthcheck_idle_s=settings.DB_POOL_HEALTHCHECK_IDLE_S,
+            )
+            _pool_pid = pid
+            _pool.start_reaper(max(1.0, settings.DB_POOL_MAX_IDLE_S / 2))
+            logger.info(
+                f"[DB_POOL] Pool criado (min={settings.DB_POOL_MIN_SIZE}, max={settings.DB_POOL_MAX_SIZE})"
+            )
+    return _pool
+
+
+def close_pool() -> None:
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+        _pool = None
+        _pool_pid = None
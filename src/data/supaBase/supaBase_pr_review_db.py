@@ -3,134 +3,255 @@ from typing import Any, Optional
 from psycopg2.extras import Json
 from src.data.supaBase.supaBase_db import DB
 
+# upsert do job (idempotente por repo+pr+head_sha), sem "returning" para poder virar CTE
+_UPSERT_JOB_SQL = """
+        insert into public.pr_review_jobs
+        (repo_full_name, pr_number, head_sha, base_sha, status, trigger, error, started_at, finished_at)
+        values
+        (%s, %s, %s, %s, %s, %s, %s,
+        case when %s = 'running' then now() else null end,
+        case when %s in ('completed','failed') then now() else null end)
+        on conflict (repo_full_name, pr_number, head_sha)
+        do update set
+        base_sha = excluded.base_sha,
+        status = excluded.status,
+        trigger = excluded.trigger,
+        error = excluded.error,
+        started_at = coalesce(pr_review_jobs.started_at, excluded.started_at),
+        finished_at = excluded.finished_at
+"""
+
+
+def _job_params(repo_full_name, pr_number, head_sha, base_sha, status, trigger, error) -> tuple:
+    return (repo_full_name, pr_number, head_sha, base_sha, status, trigger, error, status, status)
+
 
 class SupaBasePRReviewDB:
     @staticmethod
-    def upsert_job(
+    def get_cached_report(
+        repo_full_name: str,
+        pr_number: int,
+        head_sha: str,
+        agents_config_hash: str,
+        required_agents: list[str],
+    ) -> Optional[dict]:
+        """
+        Report reaproveitável para o mesmo head_sha e as mesmas configs de agentes.
+        Não olha o status do job (no modo assíncrono ele já foi re-enfileirado);
+        reports de erro (parse_error/runtime_error) não contam, nem reports em que
+        algum agente de `required_agents` falhou (timeout/erro de especialista).
+        """
+        sql = """
+        select r.*
+        from public.pr_review_reports r
+        join public.pr_review_jobs j on j.id = r.job_id
+        where j.repo_full_name = %s
+        and j.pr_number = %s
+        and j.head_sha = %s
+        and r.agents_config_hash = %s
+        and coalesce(r.result_json->>'agent', '') not in ('parse_error', 'runtime_error')
+        and coalesce(r.agents_executed, '[]'::jsonb) @> %s::jsonb
+        limit 1;
+        """
+        return DB.fetch_one(
+            sql, (repo_full_name, pr_number, head_sha, agents_config_hash, Json(required_agents))
+        )
+
+    @staticmethod
+    def get_previous_completed(repo_full_name: str, pr_number: int, head_sha: str) -> Optional[dict]:
+        """
+        Último review concluído do PR em outro head_sha (base do modo incremental).
+        Retorna job + report_id.
+        """
+        sql = """
+        select j.*, r.id as report_id
+        from public.pr_review_jobs j
+        join public.pr_review_reports r on r.job_id = j.id
+        where j.repo_full_name = %s
+        and j.pr_number = %s
+        and j.head_sha <> %s
+        and j.status = 'completed'
+        and coalesce(r.result_json->>'agent', '') not in ('parse_error', 'runtime_error')
+        order by j.finished_at desc nulls last, j.created_at desc
+        limit 1;
+        """
+        return DB.fetch_one(sql, (repo_full_name, pr_number, head_sha))
+
+    @staticmethod
+    def enqueue_job(
         repo_full_name: str,
         pr_number: int,
         head_sha: str,
         base_sha: Optional[str],
-        status: str,
         trigger: str = "github_action",
-        error: Optional[str] = None,
-    ) -> dict:
+        stale_after_s: Optional[float] = None,
+    ) -> tuple[dict, bool]:
         """
-        Cria ou atualiza job (idempotente por repo+pr+head_sha).
-        Retorna a row (inclui id).
+        Coloca o job como 'queued' (modo assíncrono).
+        Se já existe job queued/running para o mesmo repo+pr+head_sha, não mexe nele,
+        a menos que esteja parado há mais de `stale_after_s` (processo que o rodava
+        caiu): nesse caso o job é assumido pela nova execução.
+        Retorna (row, enfileirado_agora).
         """
         sql = """
         insert into public.pr_review_jobs
         (repo_full_name, pr_number, head_sha, base_sha, status, trigger, error, started_at, finished_at)
         values
-        (%s, %s, %s, %s, %s, %s, %s,
-        case when %s = 'running' then now() else null end,
-        case when %s in ('completed','failed') then now() else null end)
+        (%s, %s, %s, %s, 'queued', %s, null, null, null)
         on conflict (repo_full_name, pr_number, head_sha)
         do update set
         base_sha = excluded.base_sha,
-        status = excluded.status,
+        status = 'queued',
         trigger = excluded.trigger,
-        error = excluded.error,
-        started_at = coalesce(pr_review_jobs.started_at, excluded.started_at),
-        finished_at = excluded.finished_at
+        error = null,
+        started_at = null,
+        finished_at = null,
+        -- nova execução: created_at fica (ordem do histórico); o critério de job abandonado usa queued_at
+        queued_at = now()
+        where pr_review_jobs.status not in ('queued', 'running')
+        or coalesce(pr_review_jobs.started_at, pr_review_jobs.queued_at)
+            < now() - make_interval(secs => %s::float8)
         returning *;
         """
-        return DB.fetch_one(
-            sql,
-            (
-                repo_full_name,
-                pr_number,
-                head_sha,
-                base_sha,
-                status,
-                trigger,
-                error,
-                status,
-                status,
-            ),
+        # stale_after_s None: a comparação dá null e job em andamento nunca é assumido
+        row = DB.fetch_one(sql, (repo_full_name, pr_number, head_sha, base_sha, trigger, stale_after_s))
+        if row:
+            return row, True
+
+        existing = DB.fetch_one(
+            """
+            select * from public.pr_review_jobs
+            where repo_full_name = %s and pr_number = %s and head_sha = %s
+            """,
+            (repo_full_name, pr_number, head_sha),
         )
+        return existing, False
+
+    @staticmethod
+    def mark_job_status(job_id: str, status: str, error: Optional[str] = None) -> Optional[dict]:
+        sql = """
+        update public.pr_review_jobs
+        set
+        status = %s,
+        error = %s,
+        started_at = case when %s = 'running' then coalesce(started_at, now()) else started_at end,
+        finished_at = case when %s in ('completed','failed') then now() else null end
+        where id = %s
+        returning *;
+        """
+        return DB.fetch_one(sql, (status, error, status, status, job_id))
+
+    @staticmethod
+    def fail_stale_jobs(stale_after_s: float) -> list[dict]:
+        """
+        Marca como 'failed' jobs queued/running há mais de `stale_after_s`
+        (processo que os rodava caiu). Retorna os jobs afetados.
+        """
+        sql = """
+        update public.pr_review_jobs
+        set
+        status = 'failed',
+        error = 'abandoned: worker stopped before the review finished',
+        finished_at = now()
+        where status in ('queued', 'running')
+        and coalesce(started_at, queued_at) < now() - make_interval(secs => %s)
+        returning id, repo_full_name, pr_number, head_sha;
+        """
+        return DB.fetch_all(sql, (stale_after_s,))
 
     @staticmethod
-    def upsert_report(
-        job_id: str,
+    def persist_review(
+        repo_full_name: str,
+        pr_number: int,
+        head_sha: str,
+        base_sha: Optional[str],
+        status: str,
+        trigger: str,
+        error: Optional[str],
         summary_md: Optional[str],
         result_json: dict,
-        agents_executed: Optional[list[str]] = None,
+        agents_executed: Optional[list[str]],
+        agents_config_hash: Optional[str],
+        findings: list[dict],
+        tests: list[str],
         duration_ms: Optional[int] = None,
     ) -> dict:
         """
-        Garante 1 report por job (unique job_id).
+        Grava job + report + findings + sugestões de teste numa transação só,
+        em 2 round trips: (1) upsert do job e do report via CTE; (2) deletes e
+        inserts multi-row num único comando. VALUES (e não INSERT ... SELECT)
+        para os parâmetros serem convertidos para o tipo de cada coluna. Se algo falhar, nada é gravado —
+        o report nunca fica sem os findings.
+        Retorna {"job_id", "report_id"}.
         """
-        sql = """
+        head_sql = f"""
+        with job as (
+        {_UPSERT_JOB_SQL}
+        returning id
+        ),
+        report as (
         insert into public.pr_review_reports
-        (job_id, summary_md, result_json, agents_executed, duration_ms)
-        values
-        (%s, %s, %s, %s, %s)
+        (job_id, summary_md, result_json, agents_executed, duration_ms, agents_config_hash)
+        values ((select id from job), %s, %s, %s, %s, %s)
         on conflict (job_id)
         do update set
         summary_md = excluded.summary_md,
         result_json = excluded.result_json,
         agents_executed = excluded.agents_executed,
         duration_ms = excluded.duration_ms,
+        agents_config_hash = excluded.agents_config_hash,
         created_at = now()
-        returning *;
-        """
-        return DB.fetch_one(
-            sql,
-            (
-                job_id,
-                summary_md,
-                Json(result_json),
-                Json(agents_executed) if agents_executed is not None else None,
-                duration_ms,
-            ),
+        returning id, job_id
         )
-
-    @staticmethod
-    def replace_findings(report_id: str, findings: list[dict]) -> None:
-        """
-        Remove findings antigos e insere os novos.
+        select job_id, id as report_id from report;
         """
-        DB.execute("delete from public.pr_review_findings where report_id = %s", (report_id,))
+        params = _job_params(repo_full_name, pr_number, head_sha, base_sha, status, trigger, error) + (
+            summary_md,
+            Json(result_json),
+            Json(agents_executed) if agents_executed is not None else None,
+            duration_ms,
+            agents_config_hash,
+        )
 
-        if not findings:
-            return
+        with DB.cursor(dict_cursor=True) as (_, cur):
+            cur.execute(head_sql, params)
+            ids = cur.fetchone()
+            report_id = ids["report_id"]
 
-        sql = """
-        insert into public.pr_review_findings
-        (report_id, severity, title, file, line_range, evidence, recommendation, confidence, source_agent)
-        values
-        (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        with DB.cursor(dict_cursor=False) as (_, cur):
-            for f in findings:
-                cur.execute(
-                    sql,
-                    (
-                        report_id,
-                        f.get("severity"),
-                        f.get("title"),
-                        f.get("file"),
-                        f.get("line_range"),
-                        f.get("evidence"),
-                        f.get("recommendation"),
-                        f.get("confidence"),
-                        f.get("source_agent"),
-                    ),
+            # literais sem tipo no VALUES do insert são convertidos para o tipo da coluna (ex.: enum de severity)
+            statements = [
+                cur.mogrify("delete from public.pr_review_findings where report_id = %s;", (report_id,)),
+                cur.mogrify("delete from public.pr_review_test_suggestions where report_id = %s;", (report_id,)),
+            ]
+            if findings:
+                rows = b",".join(
+                    cur.mogrify(
+                        "(%s, %s, %s, %s, %s, %s, %s, %s, %s)",
+                        (
+                            report_id,
+                            f.get("severity"),
+                            f.get("title"),
+                            f.get("file"),
+                            f.get("line_range"),
+                            f.get("evidence"),
+                            f.get("recommendation"),
+                            f.get("confidence"),
+                            f.get("source_agent"),
+                        ),
+                    )
+                    for f in findings
+                )
+                statements.append(
+                    b"insert into public.pr_review_findings "
+                    b"(report_id, severity, title, file, line_range, evidence, recommendation, confidence, source_agent) "
+                    b"values " + rows + b";"
+                )
+            if tests:
+                rows = b",".join(cur.mogrify("(%s, %s)", (report_id, t)) for t in tests)
+                statements.append(
+                    b"insert into public.pr_review_test_suggestions (report_id, suggestion) values " + rows + b";"
                 )
 
-    @staticmethod
-    def replace_test_suggestions(report_id: str, tests: list[str]) -> None:
-        DB.execute("delete from public.pr_review_test_suggestions where report_id = %s", (report_id,))
-
-        if not tests:
-            return
+            cur.execute(b"\n".join(statements))
 
-        sql = """
-        insert into public.pr_review_test_suggestions (report_id, suggestion)
-        values (%s, %s)
-        """
-        with DB.cursor(dict_cursor=False) as (_, cur):
-            for t in tests:
-                cur.execute(sql, (report_id, t))
+        return {"job_id": ids["job_id"], "report_id": report_id}
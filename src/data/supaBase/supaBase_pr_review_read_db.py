@@ -2,29 +2,60 @@ from __future__ import annotations
 from typing import Optional
 from src.data.supaBase.supaBase_db import DB
 
+SEVERITIES = ("BLOCKER", "MAJOR", "MINOR", "NIT")
 
-class SupaBasePRReviewReadDB:
-    @staticmethod
-    def get_latest_job(repo_full_name: str, pr_number: int) -> Optional[dict]:
-        sql = """
-        select *
-        from public.pr_review_jobs
-        where repo_full_name = %s and pr_number = %s
-        order by created_at desc
-        limit 1
-        """
-        return DB.fetch_one(sql, (repo_full_name, pr_number))
+# job -> report -> findings/tests numa query só; {job_filter} escolhe o job
+_PAYLOAD_SQL = """
+with job as (
+  select *
+  from public.pr_review_jobs
+  {job_filter}
+),
+report as (
+  select r.*
+  from public.pr_review_reports r
+  join job on r.job_id = job.id
+),
+findings as (
+  select f.*
+  from public.pr_review_findings f
+  join report on f.report_id = report.id
+),
+tests as (
+  select t.suggestion, t.created_at
+  from public.pr_review_test_suggestions t
+  join report on t.report_id = report.id
+)
+select
+  (select to_jsonb(job) from job) as job,
+  (select to_jsonb(report) from report) as report,
+  coalesce((
+    select jsonb_agg(to_jsonb(f) order by
+      case f.severity
+        when 'BLOCKER' then 1
+        when 'MAJOR' then 2
+        when 'MINOR' then 3
+        when 'NIT' then 4
+        else 5
+      end,
+      f.created_at asc)
+    from findings f
+  ), '[]'::jsonb) as findings,
+  coalesce((
+    select jsonb_agg(t.suggestion order by t.created_at asc)
+    from tests t
+  ), '[]'::jsonb) as tests_suggested
+"""
 
-    @staticmethod
-    def get_job(job_id: str) -> Optional[dict]:
-        sql = "select * from public.pr_review_jobs where id = %s"
-        return DB.fetch_one(sql, (job_id,))
 
-    @staticmethod
-    def get_report_by_job(job_id: str) -> Optional[dict]:
-        sql = "select * from public.pr_review_reports where job_id = %s"
-        return DB.fetch_one(sql, (job_id,))
+def _counts_by_severity(findings: list[dict]) -> dict:
+    counts = {s: 0 for s in SEVERITIES}
+    for f in findings:
+        counts[f["severity"]] = counts.get(f["severity"], 0) + 1
+    return counts
+
 
+class SupaBasePRReviewReadDB:
     @staticmethod
     def get_findings(report_id: str) -> list[dict]:
         sql = """
@@ -44,110 +75,100 @@ class SupaBasePRReviewReadDB:
         return DB.fetch_all(sql, (report_id,))
 
     @staticmethod
-    def get_test_suggestions(report_id: str) -> list[dict]:
-        sql = """
-        select *
-        from public.pr_review_test_suggestions
-        where report_id = %s
-        order by created_at asc
+    def get_review_payload(job_id: Optional[str] = None, repo_full_name: Optional[str] = None,
+                           pr_number: Optional[int] = None) -> Optional[dict]:
         """
-        return DB.fetch_all(sql, (report_id,))
+        Job + report + findings + sugestões de teste + contagem por severidade
+        em um round trip. Por job_id ou, sem ele, o job mais recente do PR.
+        Retorna None se o job não existe.
+        """
+        if job_id is not None:
+            sql = _PAYLOAD_SQL.format(job_filter="where id = %s")
+            params = (job_id,)
+        else:
+            sql = _PAYLOAD_SQL.format(
+                job_filter="where repo_full_name = %s and pr_number = %s order by created_at desc limit 1"
+            )
+            params = (repo_full_name, pr_number)
+
+        row = DB.fetch_one(sql, params)
+        if not row or row["job"] is None:
+            return None
+
+        findings = row["findings"] if row["report"] is not None else []
+        return {
+            "job": row["job"],
+            "report": row["report"],
+            "counts": _counts_by_severity(findings),
+            "findings": findings,
+            "tests_suggested": row["tests_suggested"],
+        }
 
     @staticmethod
-    def get_counts_by_severity(report_id: str) -> dict:
+    def get_review_version(job_id: Optional[str] = None, repo_full_name: Optional[str] = None,
+                           pr_number: Optional[int] = None) -> Optional[dict]:
+        """
+        Só o que identifica a versão do payload (para ETag), sem findings.
+        Mesmo critério de seleção do get_review_payload.
+        """
         sql = """
-        select severity, count(*)::int as count
-        from public.pr_review_findings
-        where report_id = %s
-        group by severity
+        select j.id as job_id, j.status, j.finished_at, r.id as report_id, r.created_at as report_created_at
+        from public.pr_review_jobs j
+        left join public.pr_review_reports r on r.job_id = j.id
         """
-        rows = DB.fetch_all(sql, (report_id,))
-        counts = {"BLOCKER": 0, "MAJOR": 0, "MINOR": 0, "NIT": 0}
-        for r in rows:
-            counts[r["severity"]] = r["count"]
-        return counts
+        if job_id is not None:
+            return DB.fetch_one(sql + " where j.id = %s", (job_id,))
+        return DB.fetch_one(
+            sql + " where j.repo_full_name = %s and j.pr_number = %s order by j.created_at desc limit 1",
+            (repo_full_name, pr_number),
+        )
 
     @staticmethod
-    def list_jobs(repo_full_name: str, pr_number: int, limit: int = 20, offset: int = 0) -> list[dict]:
-        sql = """
+    def list_jobs(repo_full_name: str, pr_number: int, limit: int = 20, offset: int = 0,
+                  after: Optional[tuple] = None) -> list[dict]:
+        """
+        Jobs do PR do mais novo para o mais velho. `after` = (created_at, id) da
+        última linha da página anterior (keyset); sem ele, usa offset.
+        """
+        keyset = "and (created_at, id) < (%s, %s)" if after else ""
+        sql = f"""
         select *
         from public.pr_review_jobs
         where repo_full_name = %s and pr_number = %s
-        order by created_at desc
+        {keyset}
+        order by created_at desc, id desc
         limit %s offset %s
         """
-        return DB.fetch_all(sql, (repo_full_name, pr_number, limit, offset))
-
+        params = (repo_full_name, pr_number, *(after or ()), limit, 0 if after else offset)
+        return DB.fetch_all(sql, params)
 
     @staticmethod
-    def list_reviewed_repos(limit: int = 50, offset: int = 0) -> list[dict]:
-        sql = """
-        with last_job as (
-        select distinct on (repo_full_name)
-            repo_full_name,
-            created_at as last_review_at,
-            status as last_status
-        from public.pr_review_jobs
-        order by repo_full_name, created_at desc
-        ),
-        counts as (
-        select
-            repo_full_name,
-            count(*)::int as jobs_total,
-            count(distinct pr_number)::int as prs_reviewed
-        from public.pr_review_jobs
-        group by repo_full_name
-        )
-        select
-        c.repo_full_name,
-        l.last_review_at,
-        l.last_status,
-        c.prs_reviewed,
-        c.jobs_total
-        from counts c
-        join last_job l using (repo_full_name)
-        order by l.last_review_at desc
+    def list_reviewed_repos(limit: int = 50, offset: int = 0, after: Optional[tuple] = None) -> list[dict]:
+        """
+        Lê de pr_review_repo_summary (mantida por trigger, migration 002).
+        `after` = (last_review_at, last_job_id) da última linha da página anterior.
+        """
+        keyset = "where (last_review_at, last_job_id) < (%s, %s)" if after else ""
+        sql = f"""
+        select repo_full_name, last_review_at, last_status, prs_reviewed, jobs_total, last_job_id
+        from public.pr_review_repo_summary
+        {keyset}
+        order by last_review_at desc, last_job_id desc
         limit %s offset %s;
         """
-        return DB.fetch_all(sql, (limit, offset))
-
+        return DB.fetch_all(sql, (*(after or ()), limit, 0 if after else offset))
 
     @staticmethod
-    def list_reviewed_prs_by_repo(repo_full_name: str, limit: int = 50, offset: int = 0) -> list[dict]:
-        sql = """
-        with last_job as (
-        select distinct on (repo_full_name, pr_number)
-            repo_full_name,
-            pr_number,
-            id as last_job_id,
-            head_sha as last_head_sha,
-            status as last_status,
-            created_at as last_review_at
-        from public.pr_review_jobs
-        where repo_full_name = %s
-        order by repo_full_name, pr_number, created_at desc
-        ),
-        counts as (
-        select
-            repo_full_name,
-            pr_number,
-            count(*)::int as jobs_total
-        from public.pr_review_jobs
+    def list_reviewed_prs_by_repo(repo_full_name: str, limit: int = 50, offset: int = 0,
+                                  after: Optional[tuple] = None) -> list[dict]:
+        """Lê de pr_review_pr_summary; `after` como em list_reviewed_repos."""
+        keyset = "and (last_review_at, last_job_id) < (%s, %s)" if after else ""
+        sql = f"""
+        select repo_full_name, pr_number, last_job_id, last_head_sha, last_status, last_review_at, jobs_total
+        from public.pr_review_pr_summary
         where repo_full_name = %s
-        group by repo_full_name, pr_number
-        )
-        select
-        l.repo_full_name,
-        l.pr_number,
-        l.last_job_id,
-        l.last_head_sha,
-        l.last_status,
-        l.last_review_at,
-        c.jobs_total
-        from last_job l
-        join counts c
-        on c.repo_full_name = l.repo_full_name and c.pr_number = l.pr_number
-        order by l.last_review_at desc
+        {keyset}
+        order by last_review_at desc, last_job_id desc
         limit %s offset %s;
         """
-        return DB.fetch_all(sql, (repo_full_name, repo_full_name, limit, offset))
+        return DB.fetch_all(sql, (repo_full_name, *(after or ()), limit, 0 if after else offset))
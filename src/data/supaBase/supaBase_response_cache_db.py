@@ -0,0 +1,54 @@
+from typing import Optional
+
+from src.data.supaBase.supaBase_async_db import AsyncDB
+
+
+class SupaBaseResponseCacheDB:
+
+    @staticmethod
+    async def get(key: str) -> Optional[str]:
+        """Resposta ainda válida para a chave (e conta o hit), ou None."""
+        sql = """
+        update public.llm_response_cache
+        set hits = hits + 1
+        where key = %s and expires_at > now()
+        returning response;
+        """
+        row = await AsyncDB.fetch_one(sql, (key,))
+        return row["response"] if row else None
+
+    @staticmethod
+    async def put(key: str, model: str, response: str, ttl_s: float) -> None:
+        sql = """
+        insert into public.llm_response_cache (key, model, response, expires_at)
+        values (%s, %s, %s, now() + make_interval(secs => %s))
+        on conflict (key) do update set
+            model = excluded.model,
+            response = excluded.response,
+            created_at = now(),
+            expires_at = excluded.expires_at;
+        """
+        await AsyncDB.execute(sql, (key, model, response, ttl_s))
+
+    @staticmethod
+    async def prune(max_rows: int) -> int:
+        """Remove entradas vencidas e as mais antigas além de `max_rows`."""
+        sql = """
+        with expired as (
+            delete from public.llm_response_cache
+            where expires_at <= now()
+            returning 1
+        ),
+        overflow as (
+            delete from public.llm_response_cache
+            where key in (
+                select key from public.llm_response_cache
+                order by created_at desc
+                offset %s
+            )
+            returning 1
+        )
+        select (select count(*) from expired) + (select count(*) from overflow) as removed;
+        """
+        row = await AsyncDB.fetch_one(sql, (max_rows,))
+        return int(row["removed"]) if row else 0
@@ -0,0 +1,155 @@
+from __future__ import annotations
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+from src.data.supaBase.supaBase_async_db import AsyncDB
+
+ROLLUP_KEY = ("granularity", "bucket_start", "agent_id", "model", "status")
+ROLLUP_SUMS = (
+    "runs", "prompt_tokens", "completion_tokens", "total_tokens", "cost_usd",
+    "duration_ms_sum", "invoke_ms_sum", "overhead_ms_sum",
+)
+ROLLUP_HISTS = ("duration_hist", "invoke_hist", "overhead_hist", "tokens_hist")
+
+ROLLUP_COLUMNS = ROLLUP_KEY + ROLLUP_SUMS + ROLLUP_HISTS
+
+# colunas de runs que o agregador (src/utils/run_rollups.py) usa
+RUN_ROLLUP_SOURCE = """
+    id, created_at, status, agent_id, model, duration_ms,
+    prompt_tokens, completion_tokens, total_tokens, cost_usd, metadata
+"""
+
+
+def _upsert_sql(rows: list[dict]) -> tuple[str, list]:
+    placeholders = "(" + ", ".join(["%s"] * len(ROLLUP_COLUMNS)) + ")"
+    updates = [f"{c} = r.{c} + excluded.{c}" for c in ROLLUP_SUMS]
+    updates += [f"{c} = public.int8_array_add(r.{c}, excluded.{c})" for c in ROLLUP_HISTS]
+    sql = f"""
+    insert into public.run_rollups as r
+        ({", ".join(ROLLUP_COLUMNS)})
+    values
+        {", ".join([placeholders] * len(rows))}
+    on conflict ({", ".join(ROLLUP_KEY)}) do update set
+        {", ".join(updates)};
+    """
+    params = [row[c] for row in rows for c in ROLLUP_COLUMNS]
+    return sql, params
+
+
+class SupaBaseRollupDB:
+
+    @staticmethod
+    async def upsert_rollups(rows: list[dict]) -> None:
+        """
+        Soma os agregados nos buckets existentes (INSERT multi-row + ON CONFLICT).
+        As chaves de `rows` precisam ser únicas (o agregador já junta por chave).
+        """
+        if not rows:
+            return
+        sql, params = _upsert_sql(rows)
+        await AsyncDB.execute(sql, params)
+
+    @staticmethod
+    async def rebuild_range(since: datetime, until: datetime, build: Callable[[list[dict]], list[dict]]) -> int:
+        """
+        Recalcula os buckets de [since, until) a partir de public.runs numa transação:
+        apaga os buckets do intervalo, relê as runs terminadas e regrava.
+        `since`/`until` devem estar alinhados ao dia (para não cortar buckets diários).
+        Retorna quantas runs entraram.
+        """
+        async with AsyncDB.cursor(dict_cursor=True) as (_, cur):
+            await cur.execute(
+                "delete from public.run_rollups where bucket_start >= %s and bucket_start < %s;",
+                (since, until),
+            )
+            await cur.execute(
+                f"""
+                select {RUN_ROLLUP_SOURCE}
+                from public.runs
+                where created_at >= %s and created_at < %s
+                and status in ('success', 'error');
+                """,
+                (since, until),
+            )
+            runs = await cur.fetchall()
+            rows = build(runs)
+            if rows:
+                sql, params = _upsert_sql(rows)
+                await cur.execute(sql, params)
+            return len(runs)
+
+    @staticmethod
+    async def timeseries(
+        granularity: str,
+        since: datetime,
+        until: datetime,
+        group_by: Optional[str] = None,
+        agent_id: Optional[str] = None,
+        model: Optional[str] = None,
+        status: Optional[str] = None,
+    ) -> list[dict]:
+        """
+        Série por bucket (e opcionalmente por agent_id/model/status).
+        `group_by` precisa ser validado por quem chama (entra no SQL).
+        """
+        group_col = f", {group_by}" if group_by else ""
+        where = ["granularity = %s", "bucket_start >= %s", "bucket_start < %s"]
+        params: list[Any] = [granularity, since, until]
+        for col, val in (("agent_id", agent_id), ("model", model), ("status", status)):
+            if val is not None:
+                where.append(f"{col} = %s")
+                params.append(val)
+
+        sql = f"""
+        select
+            bucket_start{group_col},
+            sum(runs)::bigint as runs,
+            coalesce(sum(runs) filter (where status = 'error'), 0)::bigint as errors,
+            sum(prompt_tokens)::bigint as prompt_tokens,
+            sum(completion_tokens)::bigint as completion_tokens,
+            sum(total_tokens)::bigint as total_tokens,
+            sum(cost_usd)::float8 as cost_usd,
+            sum(duration_ms_sum)::bigint as duration_ms_sum,
+            public.int8_array_sum(duration_hist) as duration_hist
+        from public.run_rollups
+        where {" and ".join(where)}
+        group by bucket_start{group_col}
+        order by bucket_start{group_col};
+        """
+        return await AsyncDB.fetch_all(sql, params)
+
+    @staticmethod
+    async def distributions(
+        granularity: str,
+        since: datetime,
+        until: datetime,
+        group_by: tuple[str, ...] = (),
+        agent_id: Optional[str] = None,
+        model: Optional[str] = None,
+    ) -> list[dict]:
+        """
+        Histogramas somados na janela, por grupo (colunas de `group_by`,
+        validadas por quem chama). Só runs com status success.
+        """
+        cols = "".join(f"{c}, " for c in group_by)
+        where = ["granularity = %s", "bucket_start >= %s", "bucket_start < %s", "status = 'success'"]
+        params: list[Any] = [granularity, since, until]
+        for col, val in (("agent_id", agent_id), ("model", model)):
+            if val is not None:
+                where.append(f"{col} = %s")
+                params.append(val)
+
+        sql = f"""
+        select
+            {cols}
+            sum(runs)::bigint as runs,
+            sum(duration_ms_sum)::bigint as duration_ms_sum,
+            sum(invoke_ms_sum)::bigint as invoke_ms_sum,
+            sum(overhead_ms_sum)::bigint as overhead_ms_sum,
+            {", ".join(f"public.int8_array_sum({h}) as {h}" for h in ROLLUP_HISTS)}
+        from public.run_rollups
+        where {" and ".join(where)}
+        {"group by " + ", ".join(group_by) if group_by else ""}
+        {"order by " + ", ".join(group_by) if group_by else ""};
+        """
+        return await AsyncDB.fetch_all(sql, params)
@@ -5,7 +5,7 @@ from datetime import date
 from typing import Any, Dict, List, Optional, Tuple
 from uuid import UUID, uuid4
 from dateutil.relativedelta import relativedelta
-from src.data.supaBase.supaBase_db import DB
+from src.data.supaBase.supaBase_async_db import AsyncDB
 
 
 def _uuid(v: str | UUID) -> str:
@@ -15,7 +15,7 @@ def _uuid(v: str | UUID) -> str:
 class SupaBaseFinanceDB:
 
     @staticmethod
-    def create_transaction(
+    async def create_transaction(
         *,
         user_id: str | UUID,
         type: str,  # 'expense' | 'income'
@@ -57,11 +57,11 @@ class SupaBaseFinanceDB:
             _uuid(installment_group_id) if installment_group_id else None,
             bool(is_transfer),
         )
-        row = DB.fetch_one(sql, params)
+        row = await AsyncDB.fetch_one(sql, params)
         return dict(row)
 
     @staticmethod
-    def soft_delete_transaction(*, user_id: str | UUID, transaction_id: str | UUID) -> bool:
+    async def soft_delete_transaction(*, user_id: str | UUID, transaction_id: str | UUID) -> bool:
         sql = """
         update public.finance_transactions
            set deleted_at = now(),
@@ -70,11 +70,11 @@ class SupaBaseFinanceDB:
            and user_id = %s
            and deleted_at is null;
         """
-        rows = DB.execute(sql, (_uuid(transaction_id), _uuid(user_id)))
+        rows = await AsyncDB.execute(sql, (_uuid(transaction_id), _uuid(user_id)))
         return rows > 0
 
     @staticmethod
-    def update_transaction(
+    async def update_transaction(
         *,
         user_id: str | UUID,
         transaction_id: str | UUID,
@@ -112,21 +112,21 @@ class SupaBaseFinanceDB:
         returning *;
         """
         params.extend([_uuid(transaction_id), _uuid(user_id)])
-        row = DB.fetch_one(sql, tuple(params))
+        row = await AsyncDB.fetch_one(sql, tuple(params))
         return dict(row) if row else None
 
     @staticmethod
-    def get_transaction(*, user_id: str | UUID, transaction_id: str | UUID) -> Optional[Dict[str, Any]]:
+    async def get_transaction(*, user_id: str | UUID, transaction_id: str | UUID) -> Optional[Dict[str, Any]]:
         sql = """
         select *
           from public.finance_transactions
          where id = %s and user_id = %s;
         """
-        row = DB.fetch_one(sql, (_uuid(transaction_id), _uuid(user_id)))
+        row = await AsyncDB.fetch_one(sql, (_uuid(transaction_id), _uuid(user_id)))
         return dict(row) if row else None
 
     @staticmethod
-    def list_transactions(
+    async def list_transactions(
         *,
         user_id: str | UUID,
         date_from: Optional[date] = None,
@@ -173,11 +173,11 @@ class SupaBaseFinanceDB:
          limit %s offset %s;
         """
         params.extend([int(limit), int(offset)])
-        rows = DB.fetch_all(sql, tuple(params))
+        rows = await AsyncDB.fetch_all(sql, tuple(params))
         return [dict(r) for r in rows]
 
     @staticmethod
-    def create_credit_installments(
+    async def create_credit_installments(
         *,
         user_id: str | UUID,
         card_id: str | UUID,
@@ -220,7 +220,7 @@ class SupaBaseFinanceDB:
             # ex: compra em 15/02 → parcela 1: 15/02, parcela 2: 15/03, etc.
             installment_date = txn_date + relativedelta(months=i - 1)
 
-            row = SupaBaseFinanceDB.create_transaction(
+            row = await SupaBaseFinanceDB.create_transaction(
                 user_id=user_id,
                 type=type,
                 amount_cents=amt,
@@ -254,18 +254,18 @@ class SupaBaseFinanceDB:
 
 
     @staticmethod
-    def get_account_balances(*, user_id: str | UUID) -> List[Dict[str, Any]]:
+    async def get_account_balances(*, user_id: str | UUID) -> List[Dict[str, Any]]:
         sql = """
         select *
           from public.vw_finance_account_balance
          where user_id = %s
          order by name asc;
         """
-        rows = DB.fetch_all(sql, (_uuid(user_id),))
+        rows = await AsyncDB.fetch_all(sql, (_uuid(user_id),))
         return [dict(r) for r in rows]
 
     @staticmethod
-    def list_card_invoices(
+    async def list_card_invoices(
         *,
         user_id: str | UUID,
         card_id: Optional[str | UUID] = None,
@@ -292,11 +292,11 @@ class SupaBaseFinanceDB:
          limit %s offset %s;
         """
         params.extend([int(limit), int(offset)])
-        rows = DB.fetch_all(sql, tuple(params))
+        rows = await AsyncDB.fetch_all(sql, tuple(params))
         return [dict(r) for r in rows]
 
     @staticmethod
-    def list_card_invoice_items(
+    async def list_card_invoice_items(
         *,
         user_id: str | UUID,
         card_id: str | UUID,
@@ -313,14 +313,14 @@ class SupaBaseFinanceDB:
          order by txn_date asc, transaction_id asc
          limit %s offset %s;
         """
-        rows = DB.fetch_all(
+        rows = await AsyncDB.fetch_all(
             sql,
             (_uuid(user_id), _uuid(card_id), ref_month_start, int(limit), int(offset)),
         )
         return [dict(r) for r in rows]
 
     @staticmethod
-    def create_card(
+    async def create_card(
         user_id: str,
         name: str,
         closing_day: int,
@@ -337,7 +337,7 @@ class SupaBaseFinanceDB:
         returning
             id, user_id, name, brand, closing_day, due_day, limit_cents, currency, status, created_at;
         """
-        row = DB.fetch_one(
+        row = await AsyncDB.fetch_one(
             sql,
             (_uuid(user_id), name, brand, closing_day, due_day, limit_cents, currency),
         )
@@ -347,7 +347,7 @@ class SupaBaseFinanceDB:
         return dict(row)
 
     @staticmethod
-    def update_account(user_id: str, account_id: str, patch: dict) -> dict:
+    async def update_account(user_id: str, account_id: str, patch: dict) -> dict:
         allowed = {"name", "type", "starting_balance_cents", "currency"}
         sets = []
         values = []
@@ -374,7 +374,7 @@ class SupaBaseFinanceDB:
         """
         values.extend([account_id, user_id])
 
-        row = DB.fetch_one(sql, tuple(values))
+        row = await AsyncDB.fetch_one(sql, tuple(values))
         if not row:
             return {"error": "Conta não encontrada ou encerrada."}
         row["id"] = str(row["id"])
@@ -382,7 +382,7 @@ class SupaBaseFinanceDB:
         return dict(row)
 
     @staticmethod
-    def get_account_txn_sum(*, user_id: str | UUID, account_id: str) -> int:
+    async def get_account_txn_sum(*, user_id: str | UUID, account_id: str) -> int:
         """
         Soma líquida das transações de uma conta (income - expense).
         Usado para recalcular starting_balance_cents quando o usuário informa o saldo real.
@@ -397,11 +397,11 @@ class SupaBaseFinanceDB:
            and payment_method in ('pix', 'debit', 'transfer')
            and deleted_at is null;
         """
-        row = DB.fetch_one(sql, (_uuid(user_id), account_id))
+        row = await AsyncDB.fetch_one(sql, (_uuid(user_id), account_id))
         return int(row["net_cents"]) if row else 0
 
     @staticmethod
-    def create_card(
+    async def create_card(
         user_id: str,
         name: str,
         closing_day: int,
@@ -418,7 +418,7 @@ class SupaBaseFinanceDB:
         returning
             id, user_id, name, brand, closing_day, due_day, limit_cents, currency, status, created_at;
         """
-        row = DB.fetch_one(
+        row = await AsyncDB.fetch_one(
             sql,
             (_uuid(user_id), name, brand, closing_day, due_day, limit_cents, currency),
         )
@@ -428,7 +428,7 @@ class SupaBaseFinanceDB:
         return dict(row)
 
     @staticmethod
-    def update_card(user_id: str, card_id: str, patch: dict) -> dict:
+    async def update_card(user_id: str, card_id: str, patch: dict) -> dict:
         allowed = {"name", "brand", "closing_day", "due_day", "limit_cents"}
         sets = []
         values = []
@@ -456,7 +456,7 @@ class SupaBaseFinanceDB:
         """
         values.extend([card_id, user_id])
 
-        row = DB.fetch_one(sql, tuple(values))
+        row = await AsyncDB.fetch_one(sql, tuple(values))
         if not row:
             return {"error": "Cartão não encontrado ou encerrado."}
         row["id"] = str(row["id"])
@@ -465,7 +465,7 @@ class SupaBaseFinanceDB:
 
     
     @staticmethod
-    def resolve_account_id(
+    async def resolve_account_id(
         *,
         user_id: str | UUID,
         name: str,
@@ -479,12 +479,12 @@ class SupaBaseFinanceDB:
            and status = 'active'
          limit 1;
         """
-        row = DB.fetch_one(sql, (_uuid(user_id), name))
+        row = await AsyncDB.fetch_one(sql, (_uuid(user_id), name))
         if row:
             return str(row["id"])
         if not auto_create:
             return None
-        created = SupaBaseFinanceDB.create_account(
+        created = await SupaBaseFinanceDB.create_account(
             user_id=_uuid(user_id),
             name=name,
             type="checking",
@@ -494,7 +494,7 @@ class SupaBaseFinanceDB:
         return str(created["id"])
     
     @staticmethod
-    def resolve_card_id(
+    async def resolve_card_id(
         *,
         user_id: str | UUID,
         name: str,
@@ -510,12 +510,12 @@ class SupaBaseFinanceDB:
            and status = 'active'
          limit 1;
         """
-        row = DB.fetch_one(sql, (_uuid(user_id), name))
+        row = await AsyncDB.fetch_one(sql, (_uuid(user_id), name))
         if row:
             return str(row["id"])
         if not auto_create:
             return None
-        created = SupaBaseFinanceDB.create_card(
+        created = await SupaBaseFinanceDB.create_card(
             user_id=_uuid(user_id),
             name=name,
             brand="other",
@@ -527,7 +527,7 @@ class SupaBaseFinanceDB:
         return str(created["id"])
 
     @staticmethod
-    def list_accounts(
+    async def list_accounts(
         *,
         user_id: str | UUID,
         include_closed: bool = False,
@@ -543,7 +543,7 @@ class SupaBaseFinanceDB:
            {status_filter}
          order by name asc;
         """
-        rows = DB.fetch_all(sql, tuple(params))
+        rows = await AsyncDB.fetch_all(sql, tuple(params))
         return [dict(r) for r in rows]
 
     # ----------------------------------------------------------
@@ -551,7 +551,7 @@ class SupaBaseFinanceDB:
     # ----------------------------------------------------------
 
     @staticmethod
-    def list_cards(
+    async def list_cards(
         *,
         user_id: str | UUID,
         include_closed: bool = False,
@@ -567,14 +567,14 @@ class SupaBaseFinanceDB:
            {status_filter}
          order by name asc;
         """
-        rows = DB.fetch_all(sql, tuple(params))
+        rows = await AsyncDB.fetch_all(sql, tuple(params))
         return [dict(r) for r in rows]
     # ----------------------------------------------------------
     # RESUMO MENSAL
     # ----------------------------------------------------------
 
     @staticmethod
-    def get_monthly_summary(
+    async def get_monthly_summary(
         *,
         user_id: str | UUID,
         year: int,
@@ -600,7 +600,7 @@ class SupaBaseFinanceDB:
            and deleted_at is null
          group by type;
         """
-        rows_totals = DB.fetch_all(sql_totals, (_uuid(user_id), date_from, date_to))
+        rows_totals = await AsyncDB.fetch_all(sql_totals, (_uuid(user_id), date_from, date_to))
 
         income_cents = 0
         expense_cents = 0
@@ -626,7 +626,7 @@ class SupaBaseFinanceDB:
          group by c.name, t.type
          order by total_cents desc;
         """
-        rows_by_cat = DB.fetch_all(sql_by_cat, (_uuid(user_id), date_from, date_to))
+        rows_by_cat = await AsyncDB.fetch_all(sql_by_cat, (_uuid(user_id), date_from, date_to))
 
         # breakdown por método de pagamento
         sql_by_method = """
@@ -643,7 +643,7 @@ class SupaBaseFinanceDB:
          group by payment_method
          order by total_cents desc;
         """
-        rows_by_method = DB.fetch_all(sql_by_method, (_uuid(user_id), date_from, date_to))
+        rows_by_method = await AsyncDB.fetch_all(sql_by_method, (_uuid(user_id), date_from, date_to))
 
         return {
             "year": year,
@@ -658,7 +658,7 @@ class SupaBaseFinanceDB:
     
 
     @staticmethod
-    def get_card_invoice(
+    async def get_card_invoice(
         *,
         user_id: str | UUID,
         card_id: str,
@@ -679,11 +679,11 @@ class SupaBaseFinanceDB:
            and ref_month_start = %s
          limit 1;
         """
-        row = DB.fetch_one(sql, (_uuid(user_id), card_id, ref_month_start))
+        row = await AsyncDB.fetch_one(sql, (_uuid(user_id), card_id, ref_month_start))
         return dict(row) if row else None
 
     @staticmethod
-    def pay_card_invoice(
+    async def pay_card_invoice(
         *,
         user_id: str | UUID,
         card_id: str,
@@ -703,7 +703,7 @@ class SupaBaseFinanceDB:
         # 1) Cria a transação de débito na conta
         description = f"Pagamento fatura {card_name} {ref_month_start.strftime('%m/%Y')}"
 
-        txn = SupaBaseFinanceDB.create_transaction(
+        txn = await SupaBaseFinanceDB.create_transaction(
             user_id=user_id,
             type="expense",
             amount_cents=amount_cents,
@@ -738,7 +738,7 @@ class SupaBaseFinanceDB:
             id, card_id, ref_month_start, amount_cents, currency,
             status, paid_at, transaction_id, account_id, created_at, updated_at;
         """
-        payment = DB.fetch_one(sql, (
+        payment = await AsyncDB.fetch_one(sql, (
             _uuid(user_id),
             card_id,
             ref_month_start,
@@ -762,7 +762,7 @@ class SupaBaseFinanceDB:
         }
 
     @staticmethod
-    def list_card_payments(
+    async def list_card_payments(
         *,
         user_id: str | UUID,
         card_id: Optional[str] = None,
@@ -812,5 +812,5 @@ class SupaBaseFinanceDB:
         """
         params.extend([limit, offset])
 
-        rows = DB.fetch_all(sql, tuple(params))
+        rows = await AsyncDB.fetch_all(sql, tuple(params))
         return [dict(r) for r in rows]
\ No newline at end of file
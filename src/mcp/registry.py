@@ -9,13 +9,22 @@ from langchain_core.tools import BaseTool
 
 TOOLS: Dict[str, BaseTool] = {}
 
+# incrementa a cada registro; agentes compilados guardam a versão com que foram montados
+_VERSION = 0
+
 
 def register_tool(tool_obj: BaseTool):
     """
     Registra uma tool do LangChain.
     O nome é tool_obj.name (estável e usado no cfg["tools"]).
     """
+    global _VERSION
     TOOLS[tool_obj.name] = tool_obj
+    _VERSION += 1
+
+
+def get_registry_version() -> int:
+    return _VERSION
 
 
 def get_all_tools() -> Dict[str, BaseTool]:
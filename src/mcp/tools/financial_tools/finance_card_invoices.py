@@ -38,7 +38,7 @@ async def _run(
 ) -> Dict[str, Any]:
     user_id = get_request_context().user_id
 
-    invoices = SupaBaseFinanceDB.list_card_invoices(
+    invoices = await SupaBaseFinanceDB.list_card_invoices(
         user_id=user_id,
         card_id=card_id,
         ref_month_start_from=ref_month_start_from,
@@ -52,7 +52,7 @@ async def _run(
 
     header = next((i for i in invoices if i.get("ref_month_start") == ref_month_start), None)
     if header is None:
-        only = SupaBaseFinanceDB.list_card_invoices(
+        only = await SupaBaseFinanceDB.list_card_invoices(
             user_id=user_id,
             card_id=card_id,
             ref_month_start_from=ref_month_start,
@@ -70,7 +70,7 @@ async def _run(
         use_card_id = header.get("card_id") or card_id
         if not use_card_id:
             return {"invoices": invoices, "invoice": header, "items": [], "warning": "card_id necessário para carregar itens"}
-        items = SupaBaseFinanceDB.list_card_invoice_items(
+        items = await SupaBaseFinanceDB.list_card_invoice_items(
             user_id=user_id,
             card_id=use_card_id,
             ref_month_start=ref_month_start,
@@ -38,7 +38,7 @@ class Args(BaseModel):
 async def _run(**kwargs) -> Dict[str, Any]:
     user_id = get_request_context().user_id
 
-    row = SupaBaseFinanceDB.create_account(
+    row = await SupaBaseFinanceDB.create_account(
         user_id=user_id,
         name=kwargs["name"],
         type=kwargs["type"],
@@ -51,7 +51,7 @@ class Args(BaseModel):
 async def _run(**kwargs) -> Dict[str, Any]:
     user_id = get_request_context().user_id
 
-    row = SupaBaseFinanceDB.create_card(
+    row = await SupaBaseFinanceDB.create_card(
         user_id=user_id,
         name=kwargs["name"],
         brand=kwargs.get("brand", "other"),
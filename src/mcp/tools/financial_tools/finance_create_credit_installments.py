@@ -58,7 +58,7 @@ async def _run(**kwargs) -> Dict[str, Any]:
     user_id = get_request_context().user_id
 
     # Resolve card_name → UUID
-    card_id = SupaBaseFinanceDB.resolve_card_id(
+    card_id = await SupaBaseFinanceDB.resolve_card_id(
         user_id=user_id,
         name=kwargs["card_name"],
         auto_create=False,
@@ -66,7 +66,7 @@ async def _run(**kwargs) -> Dict[str, Any]:
     if not card_id:
         return {"error": f"Cartão '{kwargs['card_name']}' não encontrado. Crie-o antes com finance_create_card."}
 
-    result = SupaBaseFinanceDB.create_credit_installments(
+    result = await SupaBaseFinanceDB.create_credit_installments(
         user_id=user_id,
         card_id=card_id,
         type=kwargs.get("type", "expense"),
@@ -71,7 +71,7 @@ async def _run(**kwargs) -> Dict[str, Any]:
     account_id = None
     account_name = kwargs.get("account_name")
     if account_name:
-        account_id = SupaBaseFinanceDB.resolve_account_id(
+        account_id = await SupaBaseFinanceDB.resolve_account_id(
             user_id=user_id,
             name=account_name,
             auto_create=True,
@@ -81,7 +81,7 @@ async def _run(**kwargs) -> Dict[str, Any]:
     card_id = None
     card_name = kwargs.get("card_name")
     if card_name:
-        card_id = SupaBaseFinanceDB.resolve_card_id(
+        card_id = await SupaBaseFinanceDB.resolve_card_id(
             user_id=user_id,
             name=card_name,
             auto_create=False,
@@ -89,7 +89,7 @@ async def _run(**kwargs) -> Dict[str, Any]:
         if not card_id:
             return {"error": f"Cartão '{card_name}' não encontrado. Crie-o antes com finance_create_card."}
 
-    row = SupaBaseFinanceDB.create_transaction(
+    row = await SupaBaseFinanceDB.create_transaction(
         user_id=user_id,
         type=kwargs["type"],
         amount_cents=kwargs["amount_cents"],
@@ -48,7 +48,7 @@ class Args(BaseModel):
 async def _run(**kwargs) -> Dict[str, Any]:
     user_id = get_request_context().user_id
 
-    account_id = SupaBaseFinanceDB.resolve_account_id(
+    account_id = await SupaBaseFinanceDB.resolve_account_id(
         user_id=user_id,
         name=kwargs["account_name"],
         auto_create=False,
@@ -69,7 +69,7 @@ async def _run(**kwargs) -> Dict[str, Any]:
     # Saldo atual informado pelo usuário:
     # recalcula starting_balance_cents = saldo_desejado - soma_das_transações
     if kwargs.get("new_current_balance_cents") is not None:
-        txn_sum = SupaBaseFinanceDB.get_account_txn_sum(
+        txn_sum = await SupaBaseFinanceDB.get_account_txn_sum(
             user_id=user_id,
             account_id=account_id,
         )
@@ -78,7 +78,7 @@ async def _run(**kwargs) -> Dict[str, Any]:
     if not patch:
         return {"error": "Nenhum campo para atualizar foi informado."}
 
-    row = SupaBaseFinanceDB.update_account(
+    row = await SupaBaseFinanceDB.update_account(
         user_id=user_id,
         account_id=account_id,
         patch=patch,
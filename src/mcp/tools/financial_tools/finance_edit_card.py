@@ -29,7 +29,7 @@ class Args(BaseModel):
 async def _run(**kwargs) -> Dict[str, Any]:
     user_id = get_request_context().user_id
 
-    card_id = SupaBaseFinanceDB.resolve_card_id(
+    card_id = await SupaBaseFinanceDB.resolve_card_id(
         user_id=user_id,
         name=kwargs["card_name"],
         auto_create=False,
@@ -53,7 +53,7 @@ async def _run(**kwargs) -> Dict[str, Any]:
     if not patch:
         return {"error": "Nenhum campo para atualizar foi informado."}
 
-    row = SupaBaseFinanceDB.update_card(
+    row = await SupaBaseFinanceDB.update_card(
         user_id=user_id,
         card_id=card_id,
         patch=patch,
@@ -15,7 +15,7 @@ class Args(BaseModel):
 
 async def _run(currency: Optional[str] = None) -> List[Dict[str, Any]]:
     user_id = get_request_context().user_id
-    rows = SupaBaseFinanceDB.get_account_balances(user_id=user_id)
+    rows = await SupaBaseFinanceDB.get_account_balances(user_id=user_id)
     if currency:
         rows = [r for r in rows if r.get("currency") == currency]
     return rows
@@ -44,7 +44,7 @@ async def _run(
 
     card_id = None
     if card_name:
-        card_id = SupaBaseFinanceDB.resolve_card_id(
+        card_id = await SupaBaseFinanceDB.resolve_card_id(
             user_id=user_id,
             name=card_name,
             auto_create=False,
@@ -52,7 +52,7 @@ async def _run(
         if not card_id:
             return {"error": f"Cartão '{card_name}' não encontrado.", "payments": []}
 
-    rows = SupaBaseFinanceDB.list_card_payments(
+    rows = await SupaBaseFinanceDB.list_card_payments(
         user_id=user_id,
         card_id=card_id,
         status=status,
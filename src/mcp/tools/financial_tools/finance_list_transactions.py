@@ -53,7 +53,7 @@ async def _run(
     # Resolve nomes → UUIDs sem auto_create (só filtra se existir)
     account_id = None
     if account_name:
-        account_id = SupaBaseFinanceDB.resolve_account_id(
+        account_id = await SupaBaseFinanceDB.resolve_account_id(
             user_id=user_id,
             name=account_name,
             auto_create=False,
@@ -63,7 +63,7 @@ async def _run(
 
     card_id = None
     if card_name:
-        card_id = SupaBaseFinanceDB.resolve_card_id(
+        card_id = await SupaBaseFinanceDB.resolve_card_id(
             user_id=user_id,
             name=card_name,
             auto_create=False,
@@ -71,7 +71,7 @@ async def _run(
         if not card_id:
             return {"error": f"Cartão '{card_name}' não encontrado.", "transactions": []}
 
-    rows = SupaBaseFinanceDB.list_transactions(
+    rows = await SupaBaseFinanceDB.list_transactions(
         user_id=user_id,
         date_from=date_from,
         date_to=date_to,
@@ -18,7 +18,7 @@ class Args(BaseModel):
 
 async def _run(year: int, month: int) -> Dict[str, Any]:
     user_id = get_request_context().user_id
-    return SupaBaseFinanceDB.get_monthly_summary(user_id=user_id, year=year, month=month)
+    return await SupaBaseFinanceDB.get_monthly_summary(user_id=user_id, year=year, month=month)
 
 
 TOOL = StructuredTool.from_function(
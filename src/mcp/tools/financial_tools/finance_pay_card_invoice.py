@@ -39,7 +39,7 @@ async def _run(**kwargs) -> Dict[str, Any]:
     user_id = get_request_context().user_id
 
     # Resolve cartão
-    card_id = SupaBaseFinanceDB.resolve_card_id(
+    card_id = await SupaBaseFinanceDB.resolve_card_id(
         user_id=user_id,
         name=kwargs["card_name"],
         auto_create=False,
@@ -48,7 +48,7 @@ async def _run(**kwargs) -> Dict[str, Any]:
         return {"error": f"Cartão '{kwargs['card_name']}' não encontrado."}
 
     # Resolve conta
-    account_id = SupaBaseFinanceDB.resolve_account_id(
+    account_id = await SupaBaseFinanceDB.resolve_account_id(
         user_id=user_id,
         name=kwargs["account_name"],
         auto_create=False,
@@ -60,7 +60,7 @@ async def _run(**kwargs) -> Dict[str, Any]:
     paid_at = kwargs.get("paid_at") or date.today()
 
     # Busca o total da fatura na view
-    invoice = SupaBaseFinanceDB.get_card_invoice(
+    invoice = await SupaBaseFinanceDB.get_card_invoice(
         user_id=user_id,
         card_id=card_id,
         ref_month_start=ref_month_start,
@@ -73,7 +73,7 @@ async def _run(**kwargs) -> Dict[str, Any]:
         return {"error": f"Fatura de {ref_month_start} está vazia (total = 0)."}
 
     # Registra o pagamento (cria/atualiza registro + gera transação na conta)
-    result = SupaBaseFinanceDB.pay_card_invoice(
+    result = await SupaBaseFinanceDB.pay_card_invoice(
         user_id=user_id,
         card_id=card_id,
         account_id=account_id,
@@ -17,7 +17,7 @@ class Args(BaseModel):
 
 async def _run(include_closed: bool = False) -> List[Dict[str, Any]]:
     user_id = get_request_context().user_id
-    return SupaBaseFinanceDB.list_accounts(user_id=user_id, include_closed=include_closed)
+    return await SupaBaseFinanceDB.list_accounts(user_id=user_id, include_closed=include_closed)
 
 
 TOOL = StructuredTool.from_function(
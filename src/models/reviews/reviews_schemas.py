@@ -5,9 +5,22 @@ class PRReviewRunRequest(BaseModel):
     pr_number: int
     head_sha: str
     base_sha: str
+    # True: responde 202 com o job_id e roda o review em background
+    async_mode: bool = False
+    # True: ignora o report já salvo para o mesmo head_sha e roda o review de novo
+    force: bool = False
+    # True: revisa só os arquivos alterados desde o último review concluído do PR
+    incremental: bool = False
 
 class PRReviewRunResponse(BaseModel):
     repo_full_name: str
     pr_number: int
     head_sha: str
     result: dict
+
+class PRReviewJobAccepted(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    # False quando já havia um job queued/running para o mesmo head_sha
+    enqueued: bool
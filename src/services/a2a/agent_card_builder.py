@@ -31,11 +31,11 @@ class AgentCardBuilder:
     """
 
     @staticmethod
-    def build(base_url: Optional[str] = None) -> AgentCard:
+    async def build(base_url: Optional[str] = None) -> AgentCard:
         url = base_url or getattr(settings, "A2A_BASE_URL", "http://localhost:8080")
 
         try:
-            agents = SupaBaseAgentDB.list_agents()
+            agents = await SupaBaseAgentDB.list_agents()
         except Exception as e:
             logger.error(f"[A2A] Erro ao listar agentes para Agent Card: {e}")
             agents = []
@@ -0,0 +1,47 @@
+"""
+Cache de agentes compilados.
+
+Montar o ChatOpenAI, resolver as tools e compilar o grafo do create_agent
+a cada mensagem é caro. O agente compilado não guarda estado da conversa
+(as mensagens entram no ainvoke), então pode ser reaproveitado enquanto a
+configuração do agente e o registry de tools não mudarem.
+
+Chave: (agent_id, hash da config, versão do registry).
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any, Callable
+
+from src.core.config import settings
+from src.mcp.registry import get_registry_version
+from src.utils.lru_cache import LRUCache
+
+# campos que mudam o agente compilado
+CONFIG_HASH_FIELDS = ("model", "temperature", "max_tokens", "prompt", "tools")
+
+
+def agent_config_hash(cfg: dict) -> str:
+    payload = {k: cfg.get(k) for k in CONFIG_HASH_FIELDS}
+    raw = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+class CompiledAgentCache:
+
+    _cache = LRUCache("compiled_agents", max_size=settings.AGENT_CACHE_MAX_SIZE)
+
+    @staticmethod
+    def get_or_build(agent_id: str, cfg: dict, build: Callable[[dict], Any]) -> Any:
+        key = (str(agent_id), agent_config_hash(cfg), get_registry_version())
+        return CompiledAgentCache._cache.get_or_set(key, lambda: build(cfg))
+
+    @staticmethod
+    def invalidate(agent_id: str) -> int:
+        agent_id = str(agent_id)
+        return CompiledAgentCache._cache.pop_where(lambda k: k[0] == agent_id)
+
+    @staticmethod
+    def clear() -> None:
+        CompiledAgentCache._cache.clear()
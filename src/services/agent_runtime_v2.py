@@ -1,11 +1,18 @@
 import inspect
 import time
+from datetime import datetime, timezone
 from src.mcp.registry import get_tools_by_names
 from src.core.config import settings
 from langchain_openai import ChatOpenAI
 from langchain.agents import create_agent
 from langchain_community.callbacks import get_openai_callback
 from src.data.supaBase.supaBase_memory_db import SupaBaseMemoryDB 
+from src.services.agent_cache import CompiledAgentCache
+from src.services.history_cache import SessionHistoryCache
+from src.services.history_window import count_messages, history_budget, select_history
+from src.services.session_summarizer import SessionSummarizer, summary_message
+from src.services.response_cache import ResponseCache, response_cache_key
+from src.utils.memory_writer import ChatMessageWriter
 class AgentRuntimeV2:
 
 
@@ -14,51 +21,89 @@ class AgentRuntimeV2:
         allowed = cfg.get("tools", [])
         return get_tools_by_names(allowed)
 
-
-
     @staticmethod
-    async def run_v2(user_prompt: str, cfg, user_id: str, agent_id: str, session_id: str | None = None, history_limit: int = 20):
+    def _build_agent_v2(cfg):
         """
-        Executa um agente LangChain baseado na configuração (cfg) e input.
+        Monta LLM + tools + grafo. Chamado só em cache miss (ver CompiledAgentCache).
         """
-
-        session_id = SupaBaseMemoryDB.get_or_create_session(
-            user_id=user_id,
-            agent_id=agent_id,
-            session_id=session_id,
-        )
-
-
-        SupaBaseMemoryDB.save_message(session_id, "user", user_prompt)
-
-        history = SupaBaseMemoryDB.load_history(session_id, limit=history_limit)
-
         #Criar LLM
         model = ChatOpenAI(
             model=cfg["model"],
             temperature=cfg["temperature"],
             max_tokens=cfg["max_tokens"],
             api_key=settings.OPENAI_API_KEY,
+            # usage também no modo streaming (get_openai_callback lê do último chunk)
+            stream_usage=True,
         )
 
         #Carregar tools
         tools = AgentRuntimeV2._load_tools_for_agent_v2(cfg)
 
         #Criar agente
-        agent = create_agent(
+        return create_agent(
             model=model,
             tools=tools,
             system_prompt=cfg["prompt"],
         )
 
-        messages = [{"role": m["role"], "content": m["content"]} for m in history]
 
-        invoke_start = time.perf_counter()
-        with get_openai_callback() as cb:
-            state = await agent.ainvoke({"messages": messages})
-        invoke_ms = int((time.perf_counter() - invoke_start) * 1000)
 
-        usage = {
+    @staticmethod
+    async def _prepare_v2(user_prompt: str, cfg, user_id: str, agent_id: str, session_id: str | None, history_limit: int | None):
+        """
+        Parte comum de run_v2/stream_v2: sessão, mensagem do usuário, histórico e agente.
+        `history_limit` é o máximo de mensagens candidatas; o que entra no prompt é
+        decidido pelo orçamento de tokens (ver src/services/history_window.py).
+        Sessão + mensagem do usuário + histórico saem de uma query só (start_turn);
+        com o histórico da sessão no cache do processo, só grava a mensagem do usuário.
+        Sessões longas têm as mensagens antigas trocadas por um resumo (mensagem de sistema).
+        `history_limit=1`: só a mensagem atual, sem resumo (chamadas sem estado, como
+        as do review de PR; o ResponseCache vê o mesmo prompt a cada re-execução).
+        """
+        history_limit = history_limit or settings.HISTORY_MAX_MESSAGES
+        stateless = history_limit == 1
+        # mesmo relógio da resposta (ChatMessageWriter): a ordem no histórico segue a aplicação
+        now = datetime.now(timezone.utc)
+        cached = SessionHistoryCache.recent(session_id, user_id, agent_id, history_limit - 1)
+        if cached is not None:
+            summary, previous = cached
+            await SupaBaseMemoryDB.save_messages([(session_id, "user", user_prompt, now)])
+            history = previous + [SessionHistoryCache.append(session_id, "user", user_prompt)]
+        else:
+            session_id, history, summary = await SupaBaseMemoryDB.start_turn(
+                user_id=user_id,
+                agent_id=agent_id,
+                session_id=session_id,
+                content=user_prompt,
+                created_at=now,
+                history_limit=history_limit,
+            )
+            # menos mensagens que o pedido: o banco devolveu a sessão inteira
+            SessionHistoryCache.store(
+                session_id, user_id, agent_id, summary, history, complete=len(history) < history_limit
+            )
+
+        #Agente compilado (reaproveitado enquanto config e registry não mudarem)
+        agent = CompiledAgentCache.get_or_build(agent_id, cfg, AgentRuntimeV2._build_agent_v2)
+
+        model = cfg["model"]
+        prefix = [summary_message(summary)] if summary and not stateless else []
+        # tokeniza o que ainda não tem contagem fora do event loop; daqui pra baixo só lê
+        tokens = await count_messages(prefix + history, model)
+        # cauda não resumida grande (ou janela de candidatas cheia): resumir depois do turno
+        if not stateless and (len(history) >= history_limit or sum(tokens[len(prefix):]) > settings.SUMMARY_TRIGGER_TOKENS):
+            SessionSummarizer.request(session_id)
+
+        budget = await history_budget(agent_id, cfg)
+        if prefix:
+            budget = max(0, budget - tokens[0])
+        history = select_history(history, model, budget)
+        messages = prefix + [{"role": m["role"], "content": m["content"]} for m in history]
+        return session_id, agent, messages
+
+    @staticmethod
+    def _usage_from_callback(cb, cfg, invoke_ms: int) -> dict:
+        return {
             "prompt_tokens": cb.prompt_tokens,
             "completion_tokens": cb.completion_tokens,
             "total_tokens": cb.total_tokens,
@@ -66,13 +111,140 @@ class AgentRuntimeV2:
             "invoke_ms": invoke_ms,
             "model": cfg["model"],
         }
-        
-        #Pegar resposta final
-        messages = state.get("messages", [])
-        final_msg = messages[-1].content if messages else ""
+
+    @staticmethod
+    def _cached_usage(cfg) -> dict:
+        """Usage de uma resposta servida do ResponseCache: sem chamada ao LLM."""
+        return {
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "cost_usd": 0.0,
+            "invoke_ms": None,
+            "model": cfg["model"],
+            "cache_hit": True,
+        }
+
+    @staticmethod
+    async def save_answer(session_id: str, answer: str) -> None:
+        # em lote, fora da request (ver src/utils/memory_writer.py)
+        await ChatMessageWriter.save(session_id, "assistant", answer)
+        SessionHistoryCache.append(session_id, "assistant", answer)
+        SessionSummarizer.kick(session_id)
+
+    @staticmethod
+    async def run_v2(user_prompt: str, cfg, user_id: str, agent_id: str, session_id: str | None = None, history_limit: int | None = None):
+        """
+        Executa um agente LangChain baseado na configuração (cfg) e input.
+        """
+
+        session_id, agent, messages = await AgentRuntimeV2._prepare_v2(
+            user_prompt, cfg, user_id, agent_id, session_id, history_limit
+        )
+
+        cache_key = response_cache_key(cfg, messages)
+        cached = await ResponseCache.get(cache_key) if cache_key else None
+        if cached is not None:
+            final_msg = cached
+            usage = AgentRuntimeV2._cached_usage(cfg)
+        else:
+            invoke_start = time.perf_counter()
+            try:
+                with get_openai_callback() as cb:
+                    state = await agent.ainvoke({"messages": messages})
+            except BaseException:
+                # erro ou timeout (cancelamento): o turno não chega no save_answer/kick
+                SessionSummarizer.discard(session_id)
+                raise
+            invoke_ms = int((time.perf_counter() - invoke_start) * 1000)
+
+            usage = AgentRuntimeV2._usage_from_callback(cb, cfg, invoke_ms)
+
+            #Pegar resposta final
+            messages = state.get("messages", [])
+            final_msg = messages[-1].content if messages else ""
+            if cache_key:
+                ResponseCache.put(cache_key, cfg["model"], final_msg)
 
         #salvar resposta
-        SupaBaseMemoryDB.save_message(session_id, "assistant", final_msg)
+        await AgentRuntimeV2.save_answer(session_id, final_msg)
 
 
         return {"session_id": session_id, "answer": final_msg, "usage": usage}
+
+    @staticmethod
+    async def stream_v2(user_prompt: str, cfg, user_id: str, agent_id: str, session_id: str | None = None,
+                        history_limit: int | None = None, result: dict | None = None):
+        """
+        Versão streaming do run_v2 (astream_events do grafo). Gera dicts {"event", "data"}:
+          session    -> {"session_id"}
+          token      -> {"delta"}
+          tool_start -> {"run_id", "name", "input"}
+          tool_end   -> {"run_id", "name", "output"}
+
+        `result` é preenchido durante o stream (session_id, answer, usage) e continua
+        válido se o consumidor parar no meio (cliente desconectou). Não salva a
+        resposta: quem consome decide quando persistir (ver AgentManagerV2.stream_agent_v2).
+        """
+        result = result if result is not None else {}
+
+        session_id, agent, messages = await AgentRuntimeV2._prepare_v2(
+            user_prompt, cfg, user_id, agent_id, session_id, history_limit
+        )
+        result["session_id"] = session_id
+        result["answer"] = ""
+        yield {"event": "session", "data": {"session_id": session_id}}
+
+        cache_key = response_cache_key(cfg, messages)
+        cached = await ResponseCache.get(cache_key) if cache_key else None
+        if cached is not None:
+            result["answer"] = cached
+            result["usage"] = AgentRuntimeV2._cached_usage(cfg)
+            yield {"event": "token", "data": {"delta": cached}}
+            return
+
+        # texto da chamada de LLM corrente; a resposta final é a da última chamada
+        parts: list[str] = []
+        completed = False
+        invoke_start = time.perf_counter()
+        with get_openai_callback() as cb:
+            try:
+                async for ev in agent.astream_events({"messages": messages}, version="v2"):
+                    kind = ev["event"]
+
+                    if kind == "on_chat_model_start":
+                        parts = []
+
+                    elif kind == "on_chat_model_stream":
+                        content = ev["data"]["chunk"].content
+                        delta = content if isinstance(content, str) else "".join(
+                            c.get("text", "") for c in content if isinstance(c, dict)
+                        )
+                        if delta:
+                            parts.append(delta)
+                            result["answer"] = "".join(parts)
+                            yield {"event": "token", "data": {"delta": delta}}
+
+                    elif kind == "on_tool_start":
+                        yield {"event": "tool_start", "data": {
+                            "run_id": ev.get("run_id"),
+                            "name": ev.get("name"),
+                            "input": ev["data"].get("input"),
+                        }}
+
+                    elif kind == "on_tool_end":
+                        output = ev["data"].get("output")
+                        output = getattr(output, "content", output)
+                        yield {"event": "tool_end", "data": {
+                            "run_id": ev.get("run_id"),
+                            "name": ev.get("name"),
+                            "output": output if isinstance(output, (str, dict, list)) else str(output),
+                        }}
+                completed = True
+            finally:
+                invoke_ms = int((time.perf_counter() - invoke_start) * 1000)
+                result["usage"] = AgentRuntimeV2._usage_from_callback(cb, cfg, invoke_ms)
+
+        # só resposta completa entra no cache (não a parcial de um cliente que desconectou)
+        if cache_key and completed:
+            ResponseCache.put(cache_key, cfg["model"], result["answer"])
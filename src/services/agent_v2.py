@@ -4,18 +4,28 @@ from langchain.agents import create_agent
 from langchain_openai import ChatOpenAI
 from src.models.agent_models import AgentConfig, AgentRunRequestV2
 from src.services.agent_runtime_v2 import AgentRuntimeV2
+from src.services.session_summarizer import SessionSummarizer
 from src.mcp.registry import get_all_tools
 from src.data.supaBase.supaBase_agent_db import SupaBaseAgentDB
 from src.utils.log import start_run, finish_run_error, finish_run_success
+from src.utils.background import spawn
+from contextlib import aclosing
+import asyncio
 import os
 
 
 class AgentManagerV2:
 
     @staticmethod
-    async def run_agent_v2(run_request: AgentRunRequestV2) -> dict:
+    async def run_agent_v2(run_request: AgentRunRequestV2, timeout_s: float | None = None,
+                           history_limit: int | None = None) -> dict:
+        """
+        `timeout_s`: limite da execução do agente. O timeout é tratado aqui dentro
+        para a run ser fechada como erro (cancelar de fora deixaria a run em `running`).
+        `history_limit`: repassado ao AgentRuntimeV2.run_v2 (1 = sem histórico).
+        """
 
-        run_ctx = start_run(
+        run_ctx = await start_run(
             agent_id=run_request.agent_id,
             user_id=run_request.user_id,
             session_id=run_request.session_id,
@@ -28,9 +38,9 @@ class AgentManagerV2:
 
     
         try:
-            cfg = SupaBaseAgentDB.get_agent(run_request.agent_id)
+            cfg = await SupaBaseAgentDB.get_agent(run_request.agent_id)
         except Exception as e:
-            finish_run_error(
+            await finish_run_error(
                 run_id=run_ctx["run_id"],
                 start_perf=run_ctx["start_perf"],
                 error_type="ConfigLoadError",
@@ -41,13 +51,27 @@ class AgentManagerV2:
 
     
         try:
-            final_output = await AgentRuntimeV2.run_v2(user_prompt = run_request.message, 
+            final_output = await asyncio.wait_for(
+                AgentRuntimeV2.run_v2(user_prompt = run_request.message, 
                                                 cfg=cfg, 
                                                 user_id=run_request.user_id, 
                                                 agent_id=run_request.agent_id, 
-                                                session_id=run_request.session_id )
+                                                session_id=run_request.session_id,
+                                                history_limit=history_limit),
+                timeout=timeout_s,
+            )
+        except asyncio.TimeoutError:
+            await finish_run_error(
+                run_id=run_ctx["run_id"],
+                start_perf=run_ctx["start_perf"],
+                error_type="AgentTimeout",
+                error_message=f"timeout after {timeout_s}s",
+                session_id=run_request.session_id,
+                model=cfg.get("model"),
+            )
+            return {"error": f"timeout after {timeout_s}s", "agent_id": run_request.agent_id}
         except Exception as e:
-            finish_run_error(
+            await finish_run_error(
                 run_id=run_ctx["run_id"],
                 start_perf=run_ctx["start_perf"],
                 error_type="AgentExecutionError",
@@ -58,7 +82,7 @@ class AgentManagerV2:
             return {"error": f"Agent execution error: {e}", "agent_id": run_request.agent_id}
         
         usage = final_output.get("usage") or {}
-        finish_run_success(
+        await finish_run_success(
             run_id=run_ctx["run_id"],
             start_perf=run_ctx["start_perf"],
             session_id=final_output.get("session_id"),
@@ -69,8 +93,109 @@ class AgentManagerV2:
             cost_usd=usage.get("cost_usd"),
             metadata_patch={
                 "invoke_ms": usage.get("invoke_ms"),
+                "cache_hit": usage.get("cache_hit", False),
             },
         )
 
         # 3. Retorna resultado padronizado
         return {"response": final_output["answer"], "session_id": final_output["session_id"]}
+
+    @staticmethod
+    async def stream_agent_v2(run_request: AgentRunRequestV2):
+        """
+        Igual ao run_agent_v2, mas gera eventos do AgentRuntimeV2.stream_v2 e um
+        evento final "usage". A resposta e a telemetria são gravadas numa task
+        separada quando o stream termina, falha ou o cliente desconecta
+        (com a resposta parcial, nesse caso).
+        """
+        run_ctx = await start_run(
+            agent_id=run_request.agent_id,
+            user_id=run_request.user_id,
+            session_id=run_request.session_id,
+            agent_version=None,
+            model=None,
+            metadata={
+                "route": "/agent/run/v2/stream",
+            },
+        )
+
+        try:
+            cfg = await SupaBaseAgentDB.get_agent(run_request.agent_id)
+        except Exception as e:
+            await finish_run_error(
+                run_id=run_ctx["run_id"],
+                start_perf=run_ctx["start_perf"],
+                error_type="ConfigLoadError",
+                error_message=str(e),
+                session_id=run_request.session_id,
+            )
+            yield {"event": "error", "data": {"error": f"Failed to load agent config: {e}", "agent_id": run_request.agent_id}}
+            return
+
+        result: dict = {}
+        outcome = {"status": "disconnected", "error": None}
+        try:
+            async with aclosing(AgentRuntimeV2.stream_v2(
+                user_prompt=run_request.message,
+                cfg=cfg,
+                user_id=run_request.user_id,
+                agent_id=run_request.agent_id,
+                session_id=run_request.session_id,
+                result=result,
+            )) as events:
+                async for ev in events:
+                    yield ev
+            outcome["status"] = "completed"
+        except Exception as e:
+            outcome.update(status="error", error=e)
+            yield {"event": "error", "data": {"error": f"Agent execution error: {e}", "agent_id": run_request.agent_id}}
+        finally:
+            # roda fora da request: sobrevive ao cancelamento quando o cliente desconecta
+            spawn(
+                AgentManagerV2._finish_stream(run_request, run_ctx, cfg, result, outcome),
+                name=f"finish-stream-{run_ctx['run_id']}",
+            )
+
+        if outcome["status"] == "completed":
+            yield {"event": "usage", "data": {"session_id": result.get("session_id"), **(result.get("usage") or {})}}
+
+    @staticmethod
+    async def _finish_stream(run_request: AgentRunRequestV2, run_ctx: dict, cfg: dict, result: dict, outcome: dict) -> None:
+        session_id = result.get("session_id") or run_request.session_id
+        answer = result.get("answer") or ""
+        usage = result.get("usage") or {}
+
+        if outcome["status"] == "error" or not answer:
+            # sem resposta gravada não há passe de resumo a disparar
+            SessionSummarizer.discard(session_id)
+
+        if outcome["status"] == "error":
+            await finish_run_error(
+                run_id=run_ctx["run_id"],
+                start_perf=run_ctx["start_perf"],
+                error_type="AgentExecutionError",
+                error_message=str(outcome["error"]),
+                session_id=session_id,
+                model=(cfg or {}).get("model"),
+            )
+            return
+
+        if session_id and answer:
+            await AgentRuntimeV2.save_answer(session_id, answer)
+
+        await finish_run_success(
+            run_id=run_ctx["run_id"],
+            start_perf=run_ctx["start_perf"],
+            session_id=session_id,
+            model=usage.get("model") or cfg.get("model"),
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            total_tokens=usage.get("total_tokens"),
+            cost_usd=usage.get("cost_usd"),
+            metadata_patch={
+                "invoke_ms": usage.get("invoke_ms"),
+                "cache_hit": usage.get("cache_hit", False),
+                "stream": True,
+                "client_disconnected": outcome["status"] == "disconnected",
+            },
+        )
@@ -0,0 +1,130 @@
+"""
+Cache do histórico recente por sessão (memória conversacional).
+
+O worker que atendeu o turno anterior já tem as últimas mensagens da sessão:
+guardamos um deque por sessão (LRU sobre sessões) atualizado write-through a
+cada mensagem gravada, e o próximo turno não precisa reler chat_messages.
+Miss (sessão nova para o worker, evictada, vencida ou com dono diferente)
+cai no SupaBaseMemoryDB.start_turn, que já devolve o histórico para repovoar.
+
+Com vários workers a sessão pode receber mensagens em outro processo:
+- balanceador com afinidade por sessão (sticky) mantém cada conversa num worker;
+- HISTORY_CACHE_TTL_S limita por quanto tempo uma entrada é usada sem reler o banco;
+- HISTORY_CACHE_NOTIFY_ENABLED=true: cada escrita faz pg_notify em
+  SESSION_CHANGED_CHANNEL e os outros workers evictam a sessão.
+"""
+from __future__ import annotations
+
+import os
+import uuid
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+from src.core.config import settings
+from src.data.supaBase.supaBase_memory_db import SupaBaseMemoryDB
+from src.utils.background import spawn
+from src.utils.lru_cache import LRUCache
+
+SESSION_CHANGED_CHANNEL = "chat_session_changed"
+
+# identifica este processo no payload do notify (ignora as próprias notificações)
+_WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+
+class _SessionHistory:
+    __slots__ = ("user_id", "agent_id", "summary", "messages", "complete")
+
+    def __init__(self, user_id: str, agent_id: str, summary: Optional[str], messages: List[Dict[str, str]], complete: bool):
+        self.user_id = user_id
+        self.agent_id = agent_id
+        # resumo das mensagens anteriores à janela (ver src/services/session_summarizer.py)
+        self.summary = summary
+        self.messages: deque = deque(messages, maxlen=settings.HISTORY_CACHE_MESSAGES)
+        # True: o deque tem a sessão inteira (serve qualquer limite)
+        self.complete = complete and len(messages) <= settings.HISTORY_CACHE_MESSAGES
+
+
+class SessionHistoryCache:
+
+    _cache = LRUCache(
+        "session_history",
+        max_size=settings.HISTORY_CACHE_MAX_SESSIONS,
+        ttl_s=settings.HISTORY_CACHE_TTL_S,
+    )
+
+    @staticmethod
+    def recent(
+        session_id: Optional[str], user_id: str, agent_id: str, limit: int
+    ) -> Optional[Tuple[Optional[str], List[Dict[str, str]]]]:
+        """(resumo, últimas `limit` mensagens em ordem cronológica) ou None se o cache não consegue responder."""
+        if not settings.HISTORY_CACHE_ENABLED or not session_id:
+            return None
+        entry: Optional[_SessionHistory] = SessionHistoryCache._cache.get(str(session_id))
+        if entry is None or entry.user_id != str(user_id) or entry.agent_id != str(agent_id):
+            return None
+        if len(entry.messages) < limit and not entry.complete:
+            return None
+        return entry.summary, list(entry.messages)[-limit:] if limit > 0 else []
+
+    @staticmethod
+    def store(
+        session_id: str,
+        user_id: str,
+        agent_id: str,
+        summary: Optional[str],
+        messages: List[Dict[str, str]],
+        complete: bool,
+    ) -> None:
+        """Repovoa a sessão com o histórico lido do banco (após gravar a mensagem do usuário)."""
+        if settings.HISTORY_CACHE_ENABLED:
+            SessionHistoryCache._cache.set(
+                str(session_id),
+                _SessionHistory(str(user_id), str(agent_id), summary, list(messages), complete),
+            )
+        SessionHistoryCache._publish(session_id)
+
+    @staticmethod
+    def append(session_id: str, role: str, content: str) -> Dict[str, str]:
+        """
+        Write-through: chamado a cada mensagem gravada na sessão. Retorna o dict
+        guardado, para quem monta o prompt usar o mesmo objeto (a contagem de
+        tokens anotada nele vale para os próximos turnos).
+        """
+        message = {"role": role, "content": content}
+        if settings.HISTORY_CACHE_ENABLED:
+            entry: Optional[_SessionHistory] = SessionHistoryCache._cache.get(str(session_id))
+            if entry is not None:
+                if len(entry.messages) == entry.messages.maxlen:
+                    entry.complete = False
+                entry.messages.append(message)
+        SessionHistoryCache._publish(session_id)
+        return message
+
+    @staticmethod
+    def _publish(session_id: str) -> None:
+        """Avisa os outros workers (fora da request) que a sessão mudou."""
+        if settings.HISTORY_CACHE_NOTIFY_ENABLED:
+            spawn(
+                SupaBaseMemoryDB.notify_session_changed(SESSION_CHANGED_CHANNEL, f"{session_id}:{_WORKER_ID}"),
+                name=f"notify-session-{session_id}",
+            )
+
+    @staticmethod
+    def on_notify(payload: str) -> None:
+        session_id, _, origin = payload.rpartition(":")
+        if origin != _WORKER_ID:
+            SessionHistoryCache.evict(session_id)
+
+    @staticmethod
+    def invalidate(session_id: str) -> None:
+        """Descarta a sessão aqui e nos outros workers (ex.: depois de um resumo)."""
+        SessionHistoryCache.evict(session_id)
+        SessionHistoryCache._publish(session_id)
+
+    @staticmethod
+    def evict(session_id: str) -> None:
+        SessionHistoryCache._cache.pop(str(session_id))
+
+    @staticmethod
+    def clear() -> None:
+        SessionHistoryCache._cache.clear()
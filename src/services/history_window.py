@@ -0,0 +1,78 @@
+"""
+Janela de histórico por orçamento de tokens.
+
+Em vez de um número fixo de mensagens, as mais recentes entram enquanto
+couberem em `history_budget(cfg)`: janela de contexto do modelo menos
+max_tokens, o system prompt e uma folga (tools, formatação), limitado a
+HISTORY_MAX_TOKENS. A contagem de cada mensagem fica guardada no próprio dict
+(os dicts do SessionHistoryCache são reaproveitados entre turnos), então cada
+mensagem é tokenizada uma vez por modelo; a do system prompt fica num LRU por
+config do agente (mesmo hash do CompiledAgentCache).
+
+Tokenizar um texto grande bloqueia: as contagens que faltam rodam em threadpool
+(`history_budget` e `count_messages`), fora do event loop.
+"""
+from __future__ import annotations
+
+from typing import Dict, List
+
+from starlette.concurrency import run_in_threadpool
+
+from src.core.config import settings
+from src.services.agent_cache import agent_config_hash
+from src.utils.lru_cache import LRUCache
+from src.utils.tokens import context_window, count_tokens
+
+# tokens de formatação por mensagem no formato de chat da OpenAI (role + separadores)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+# tokens do system prompt por (agent_id, hash da config)
+_prompt_tokens = LRUCache("prompt_tokens", max_size=settings.AGENT_CACHE_MAX_SIZE)
+
+
+async def history_budget(agent_id: str, cfg: dict) -> int:
+    model = cfg["model"]
+    key = (str(agent_id), agent_config_hash(cfg))
+    prompt_tokens = _prompt_tokens.get(key)
+    if prompt_tokens is None:
+        prompt_tokens = await run_in_threadpool(count_tokens, cfg.get("prompt") or "", model)
+        _prompt_tokens.set(key, prompt_tokens)
+    budget = (
+        context_window(model)
+        - int(cfg.get("max_tokens") or 0)
+        - prompt_tokens
+        - settings.HISTORY_RESERVE_TOKENS
+    )
+    return max(0, min(budget, settings.HISTORY_MAX_TOKENS))
+
+
+def message_tokens(message: Dict, model: str) -> int:
+    counts = message.setdefault("_tokens", {})
+    n = counts.get(model)
+    if n is None:
+        n = counts[model] = count_tokens(message.get("content") or "", model) + MESSAGE_OVERHEAD_TOKENS
+    return n
+
+
+async def count_messages(messages: List[Dict], model: str) -> List[int]:
+    """message_tokens de cada mensagem; as ainda não contadas para `model` vão para o threadpool."""
+    if any(model not in m.get("_tokens", {}) for m in messages):
+        return await run_in_threadpool(lambda: [message_tokens(m, model) for m in messages])
+    return [message_tokens(m, model) for m in messages]
+
+
+def select_history(messages: List[Dict], model: str, budget: int) -> List[Dict]:
+    """
+    Sufixo mais longo de `messages` (cronológico) que cabe em `budget`.
+    A última mensagem (a do usuário) entra sempre.
+    """
+    used = 0
+    start = len(messages)
+    for i in range(len(messages) - 1, -1, -1):
+        n = message_tokens(messages[i], model)
+        if used + n > budget and start < len(messages):
+            break
+        used += n
+        start = i
+    return messages[start:]
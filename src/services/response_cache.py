@@ -0,0 +1,93 @@
+"""
+Cache de respostas exatas do LLM para chamadas determinísticas.
+
+Só entra agente com temperature 0 (e, por padrão, sem tools: uma tool pode
+consultar dados que mudam ou ter efeito colateral). A chave é o hash de
+modelo, system prompt, tools, max_tokens, temperatura e a lista de mensagens
+que vai para o LLM (histórico incluído), então só repete a resposta para um
+prompt byte a byte igual: re-run do review no mesmo head SHA, pergunta
+repetida numa sessão nova etc.
+
+Backends (RESPONSE_CACHE_BACKEND):
+- "memory": LRU no processo (aparece em GET /cache/stats como `llm_responses`)
+- "postgres": tabela public.llm_response_cache (migration 006), compartilhada
+  entre workers; gravação e limpeza (TTL + teto de linhas) fora da request
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from typing import Dict, List, Optional
+
+from src.core.config import settings
+from src.data.supaBase.supaBase_response_cache_db import SupaBaseResponseCacheDB
+from src.utils.background import spawn
+from src.utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+# a cada N gravações no Postgres roda uma limpeza
+_PRUNE_EVERY = 100
+
+
+def response_cache_key(cfg: dict, messages: List[Dict[str, str]]) -> Optional[str]:
+    """Chave da chamada ou None se ela não pode ser cacheada."""
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+    # só temperatura 0 explícita: config sem temperatura usa o default do provedor (não determinístico)
+    if cfg.get("temperature") != 0:
+        return None
+    tools = sorted(cfg.get("tools") or [])
+    if tools and not settings.RESPONSE_CACHE_ALLOW_TOOLS:
+        return None
+
+    payload = {
+        "model": cfg.get("model"),
+        "prompt": cfg.get("prompt"),
+        "tools": tools,
+        "temperature": 0,
+        "max_tokens": cfg.get("max_tokens"),
+        "messages": [[m["role"], m["content"]] for m in messages],
+    }
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+
+    _memory = LRUCache(
+        "llm_responses",
+        max_size=settings.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_s=settings.RESPONSE_CACHE_TTL_S,
+    )
+    _puts = 0
+
+    @staticmethod
+    async def get(key: str) -> Optional[str]:
+        if settings.RESPONSE_CACHE_BACKEND != "postgres":
+            return ResponseCache._memory.get(key)
+        try:
+            return await SupaBaseResponseCacheDB.get(key)
+        except Exception as e:
+            # cache fora do ar não derruba a execução: segue como miss
+            logger.warning(f"[RESPONSE_CACHE] Falha na leitura: {type(e).__name__}: {e}")
+            return None
+
+    @staticmethod
+    def put(key: str, model: str, response: str) -> None:
+        if not isinstance(response, str) or not response:
+            return
+        if settings.RESPONSE_CACHE_BACKEND != "postgres":
+            ResponseCache._memory.set(key, response)
+            return
+        spawn(ResponseCache._put_postgres(key, model, response), name="response-cache-put")
+
+    @staticmethod
+    async def _put_postgres(key: str, model: str, response: str) -> None:
+        await SupaBaseResponseCacheDB.put(key, model, response, settings.RESPONSE_CACHE_TTL_S)
+        ResponseCache._puts += 1
+        if ResponseCache._puts % _PRUNE_EVERY == 0:
+            removed = await SupaBaseResponseCacheDB.prune(settings.RESPONSE_CACHE_MAX_ENTRIES)
+            if removed:
+                logger.info(f"[RESPONSE_CACHE] {removed} entradas removidas")
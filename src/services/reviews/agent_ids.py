@@ -4,3 +4,13 @@ PR_REVIEW_AGENT_IDS = {
     "security": "3fd40191-75b5-4725-9aa2-0c4afc49d1ca",
     "aggregator": "cb52145f-205c-4f31-8d42-769c2f2df10c",
 }
+
+# Especialistas que rodam (em paralelo) antes do aggregator: (agent_name, agent_id).
+# Para adicionar um revisor basta incluir aqui (e o id em PR_REVIEW_AGENT_IDS).
+PR_REVIEW_SPECIALISTS = [
+    ("pr_review_correctness", PR_REVIEW_AGENT_IDS["correctness"]),
+    ("pr_review_maintainability", PR_REVIEW_AGENT_IDS["maintainability"]),
+    ("pr_review_security", PR_REVIEW_AGENT_IDS["security"]),
+]
+
+PR_REVIEW_AGGREGATOR = ("pr_review_aggregator", PR_REVIEW_AGENT_IDS["aggregator"])
@@ -0,0 +1,93 @@
+"""
+Empacota os FileDiff em chunks que cabem num orçamento de tokens.
+
+Arquivos entram inteiros quando cabem; arquivo maior que o orçamento é
+quebrado por hunk (repetindo o cabeçalho do arquivo), e hunk maior que o
+orçamento é cortado com marcador. A ordem dos arquivos do diff é mantida.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from src.services.reviews.diff_parser import FileDiff, Hunk
+from src.utils.tokens import count_tokens
+
+TRUNCATED_HUNK_MARKER = "[TRUNCATED_HUNK]"
+
+
+@dataclass
+class DiffChunk:
+    index: int
+    files: list[str] = field(default_factory=list)
+    parts: list[str] = field(default_factory=list)
+    tokens: int = 0
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.parts)
+
+    def to_dict(self) -> dict:
+        return {"index": self.index, "files": self.files, "text": self.text, "tokens": self.tokens}
+
+
+def _truncate_hunk(hunk: Hunk, budget: int, model: str) -> tuple[str, int]:
+    kept = [hunk.header]
+    used = count_tokens(hunk.header, model) + count_tokens(TRUNCATED_HUNK_MARKER, model)
+    for line in hunk.lines:
+        n = count_tokens(line, model) + 1
+        if used + n > budget:
+            break
+        kept.append(line)
+        used += n
+    kept.append(TRUNCATED_HUNK_MARKER)
+    return "\n".join(kept), used
+
+
+def _file_pieces(fd: FileDiff, budget: int, model: str) -> list[tuple[str, int]]:
+    """(texto, tokens) do arquivo: 1 peça se couber, senão uma por grupo de hunks."""
+    text = fd.text()
+    tokens = count_tokens(text, model)
+    if tokens <= budget:
+        return [(text, tokens)]
+
+    header = fd.header()
+    header_tokens = count_tokens(header, model)
+    hunk_budget = max(budget - header_tokens, 1)
+
+    pieces: list[tuple[str, int]] = []
+    group: list[str] = []
+    group_tokens = 0
+    for hunk in fd.hunks:
+        h_text = hunk.text()
+        h_tokens = count_tokens(h_text, model)
+        if h_tokens > hunk_budget:
+            h_text, h_tokens = _truncate_hunk(hunk, hunk_budget, model)
+
+        if group and group_tokens + h_tokens > hunk_budget:
+            pieces.append(("\n".join([header, *group]), header_tokens + group_tokens))
+            group, group_tokens = [], 0
+        group.append(h_text)
+        group_tokens += h_tokens
+
+    if group:
+        pieces.append(("\n".join([header, *group]), header_tokens + group_tokens))
+    return pieces
+
+
+def pack_diff(files: list[FileDiff], budget_tokens: int, model: str) -> list[DiffChunk]:
+    chunks: list[DiffChunk] = []
+    current = DiffChunk(index=0)
+
+    for fd in files:
+        for text, tokens in _file_pieces(fd, budget_tokens, model):
+            if current.parts and current.tokens + tokens > budget_tokens:
+                chunks.append(current)
+                current = DiffChunk(index=len(chunks))
+            current.parts.append(text)
+            current.tokens += tokens
+            if fd.path not in current.files:
+                current.files.append(fd.path)
+
+    if current.parts:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,153 @@
+"""
+Parser de unified diff (formato do GitHub: `application/vnd.github.v3.diff`).
+
+Consome linhas uma a uma (`iter_file_diffs`) e devolve um FileDiff por arquivo,
+com os hunks e a contagem de linhas adicionadas/removidas. Também classifica
+arquivos que não valem prompt de LLM (lockfiles, gerados, binários).
+"""
+from __future__ import annotations
+
+import fnmatch
+import re
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
+
+_HUNK_RE = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_DIFF_GIT_RE = re.compile(r"^diff --git a/(.*) b/(.*)$")
+
+LOCKFILES = {
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "npm-shrinkwrap.json",
+    "poetry.lock", "Pipfile.lock", "uv.lock", "Cargo.lock", "go.sum",
+    "composer.lock", "Gemfile.lock", "packages.lock.json", "pubspec.lock",
+}
+
+GENERATED_PATTERNS = (
+    "*.min.js", "*.min.css", "*.map", "*_pb2.py", "*_pb2_grpc.py", "*.pb.go",
+    "*.snap", "*.svg", "*.ipynb",
+    "dist/*", "build/*", "vendor/*", "node_modules/*", "*/__snapshots__/*",
+)
+
+
+@dataclass
+class Hunk:
+    header: str
+    old_start: int
+    old_lines: int
+    new_start: int
+    new_lines: int
+    lines: list[str] = field(default_factory=list)
+    added: int = 0
+    removed: int = 0
+
+    def text(self) -> str:
+        return "\n".join([self.header, *self.lines])
+
+
+@dataclass
+class FileDiff:
+    path: str
+    old_path: str
+    status: str = "modified"  # added | deleted | renamed | modified
+    is_binary: bool = False
+    header_lines: list[str] = field(default_factory=list)
+    hunks: list[Hunk] = field(default_factory=list)
+
+    @property
+    def added(self) -> int:
+        return sum(h.added for h in self.hunks)
+
+    @property
+    def removed(self) -> int:
+        return sum(h.removed for h in self.hunks)
+
+    def header(self) -> str:
+        return "\n".join(self.header_lines)
+
+    def text(self) -> str:
+        return "\n".join([self.header(), *(h.text() for h in self.hunks)])
+
+    def summary(self) -> dict:
+        return {
+            "path": self.path,
+            "old_path": self.old_path,
+            "status": self.status,
+            "is_binary": self.is_binary,
+            "hunks": len(self.hunks),
+            "added": self.added,
+            "removed": self.removed,
+        }
+
+
+def iter_file_diffs(lines: Iterable[str]) -> Iterator[FileDiff]:
+    current: Optional[FileDiff] = None
+    hunk: Optional[Hunk] = None
+
+    for raw in lines:
+        line = raw.rstrip("\n").rstrip("\r")
+
+        m = _DIFF_GIT_RE.match(line)
+        if m:
+            if current is not None:
+                yield current
+            current = FileDiff(path=m.group(2), old_path=m.group(1), header_lines=[line])
+            hunk = None
+            continue
+
+        if current is None:
+            # lixo antes do primeiro "diff --git"
+            continue
+
+        if hunk is None or not line or line[0] not in " +-\\":
+            m = _HUNK_RE.match(line)
+            if m:
+                hunk = Hunk(
+                    header=line,
+                    old_start=int(m.group(1)),
+                    old_lines=int(m.group(2) or 1),
+                    new_start=int(m.group(3)),
+                    new_lines=int(m.group(4) or 1),
+                )
+                current.hunks.append(hunk)
+                continue
+
+        if hunk is not None:
+            hunk.lines.append(line)
+            if line.startswith("+"):
+                hunk.added += 1
+            elif line.startswith("-"):
+                hunk.removed += 1
+            continue
+
+        # cabeçalho do arquivo (index, mode, ---/+++, rename, Binary files ...)
+        current.header_lines.append(line)
+        if line.startswith("new file mode"):
+            current.status = "added"
+        elif line.startswith("deleted file mode"):
+            current.status = "deleted"
+        elif line.startswith("rename to "):
+            current.status = "renamed"
+        elif line.startswith("Binary files ") or line.startswith("GIT binary patch"):
+            current.is_binary = True
+
+    if current is not None:
+        yield current
+
+
+def parse_diff(diff_text: str) -> list[FileDiff]:
+    return list(iter_file_diffs(diff_text.splitlines()))
+
+
+def skip_reason(fd: FileDiff) -> Optional[str]:
+    """Motivo para não mandar o arquivo ao LLM (ou None se deve ir)."""
+    if fd.is_binary:
+        return "binary"
+    name = fd.path.rsplit("/", 1)[-1]
+    if name in LOCKFILES:
+        return "lockfile"
+    for pattern in GENERATED_PATTERNS:
+        if fnmatch.fnmatch(fd.path, pattern) or fnmatch.fnmatch(fd.path, f"*/{pattern}"):
+            return "generated"
+    if fd.status == "deleted":
+        # só remoção: o conteúdo apagado não precisa de review linha a linha
+        return "deleted"
+    return None
@@ -1,10 +1,62 @@
+"""
+Cliente da API do GitHub usado pelo pipeline de review.
+
+Um único httpx.AsyncClient por processo (keep-alive, HTTP/2 quando o pacote
+`h2` está instalado) em vez de abrir conexão/TLS a cada chamada. GETs usam
+ETag/If-None-Match: se o recurso não mudou o GitHub responde 304 (não conta
+no rate limit) e devolvemos o corpo guardado.
+
+A URL base vem de GITHUB_API_URL, o que permite apontar para um GitHub fake local.
+"""
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+from typing import Any, Optional
+
 import httpx
 
-GITHUB_API = "https://api.github.com"
+from src.core.config import settings
+from src.utils.lru_cache import LRUCache
+
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+_client: Optional[httpx.AsyncClient] = None
+
+# (path, accept) -> (etag, corpo). Sem o token na chave: o token do workflow muda
+# a cada job e o GitHub reautoriza a request condicional (sem acesso não há 304).
+# Corpos acima de GITHUB_ETAG_MAX_BODY_BYTES não são guardados (diffs enormes).
+_etags = LRUCache("github_etag", max_size=settings.GITHUB_ETAG_CACHE_MAX_SIZE)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            base_url=settings.GITHUB_API_URL,
+            http2=_HTTP2,
+            timeout=httpx.Timeout(60.0, connect=10.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60.0),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
 
 class GitHubClient:
-    def __init__(self, token: str):
+    def __init__(self, token: str, client: Optional[httpx.AsyncClient] = None):
         self.token = token
+        # injetável (testes / GitHub fake); por padrão, o cliente compartilhado
+        self._client = client
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self._client or get_http_client()
 
     def _headers(self, accept: str = "application/vnd.github+json"):
         return {
@@ -14,16 +66,42 @@ class GitHubClient:
             "User-Agent": "pr-review-agent",
         }
 
+    async def _get(self, path: str, accept: str = "application/vnd.github+json", as_json: bool = True) -> Any:
+        key = (path, accept)
+        cached = _etags.get(key)
+
+        headers = self._headers(accept=accept)
+        if cached:
+            headers["If-None-Match"] = cached[0]
+
+        r = await self.client.get(path, headers=headers)
+        if r.status_code == 304 and cached:
+            return cached[1]
+        r.raise_for_status()
+
+        body = r.json() if as_json else r.text
+        etag = r.headers.get("ETag")
+        if etag and len(r.content) <= settings.GITHUB_ETAG_MAX_BODY_BYTES:
+            _etags.set(key, (etag, body))
+        return body
+
     async def get_pr(self, repo_full_name: str, pr_number: int) -> dict:
-        url = f"{GITHUB_API}/repos/{repo_full_name}/pulls/{pr_number}"
-        async with httpx.AsyncClient(timeout=30) as client:
-            r = await client.get(url, headers=self._headers())
-            r.raise_for_status()
-            return r.json()
+        return await self._get(f"/repos/{repo_full_name}/pulls/{pr_number}")
 
     async def get_pr_diff(self, repo_full_name: str, pr_number: int) -> str:
-        url = f"{GITHUB_API}/repos/{repo_full_name}/pulls/{pr_number}"
-        async with httpx.AsyncClient(timeout=60) as client:
-            r = await client.get(url, headers=self._headers(accept="application/vnd.github.v3.diff"))
-            r.raise_for_status()
-            return r.text
+        return await self._get(
+            f"/repos/{repo_full_name}/pulls/{pr_number}",
+            accept="application/vnd.github.v3.diff",
+            as_json=False,
+        )
+
+    async def get_pr_and_diff(self, repo_full_name: str, pr_number: int) -> tuple[dict, str]:
+        """Metadados e diff do PR em paralelo."""
+        return await asyncio.gather(
+            self.get_pr(repo_full_name, pr_number),
+            self.get_pr_diff(repo_full_name, pr_number),
+        )
+
+    async def compare(self, repo_full_name: str, base: str, head: str) -> dict:
+        """Compare entre dois commits (status ahead/behind/diverged/identical + files)."""
+        return await self._get(f"/repos/{repo_full_name}/compare/{base}...{head}")
@@ -0,0 +1,104 @@
+"""
+Execução assíncrona de reviews de PR (modo `async_mode` do POST /pr/run).
+
+O endpoint grava o job como 'queued' e devolve 202 na hora; o grafo roda aqui,
+em background, limitado a REVIEW_JOB_CONCURRENCY reviews simultâneos e
+REVIEW_JOB_QUEUE_MAX jobs pendentes por processo. O cliente acompanha por
+GET /api/v1/reviews/jobs/{job_id}.
+
+O job não é retomado depois de um crash (o token do GitHub só existe na
+request), então no startup os jobs abandonados são marcados como 'failed'.
+Um job que ficou órfão depois disso (outro processo caiu) não bloqueia o
+re-review: enqueue_job assume o job parado há mais de REVIEW_JOB_STALE_AFTER_S.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from src.core.config import settings
+from src.data.supaBase.supaBase_pr_review_db import SupaBasePRReviewDB
+from src.utils import background
+
+logger = logging.getLogger(__name__)
+
+
+class ReviewQueueFull(Exception):
+    pass
+
+
+class ReviewJobRunner:
+
+    _semaphore: Optional[asyncio.Semaphore] = None
+    _tasks: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def _sem() -> asyncio.Semaphore:
+        if ReviewJobRunner._semaphore is None:
+            ReviewJobRunner._semaphore = asyncio.Semaphore(settings.REVIEW_JOB_CONCURRENCY)
+        return ReviewJobRunner._semaphore
+
+    @staticmethod
+    def has_capacity() -> bool:
+        return len(ReviewJobRunner._tasks) < settings.REVIEW_JOB_QUEUE_MAX
+
+    @staticmethod
+    def submit(graph: Any, job_id: str, initial_state: dict) -> None:
+        if not ReviewJobRunner.has_capacity():
+            raise ReviewQueueFull(f"{len(ReviewJobRunner._tasks)} review jobs pendentes")
+
+        task = background.spawn(
+            ReviewJobRunner._run(graph, job_id, initial_state),
+            name=f"review-job-{job_id}",
+        )
+        ReviewJobRunner._tasks[job_id] = task
+        task.add_done_callback(lambda _: ReviewJobRunner._tasks.pop(job_id, None))
+
+    @staticmethod
+    async def _run(graph: Any, job_id: str, initial_state: dict) -> None:
+        try:
+            async with ReviewJobRunner._sem():
+                await run_in_threadpool(SupaBasePRReviewDB.mark_job_status, job_id, "running")
+                # persist_report grava o status final (completed/failed)
+                final_state = await graph.ainvoke(initial_state)
+                if final_state.get("cache_hit"):
+                    # cache hit termina antes do persist_report: o job re-enfileirado fecha aqui
+                    await run_in_threadpool(SupaBasePRReviewDB.mark_job_status, job_id, "completed")
+        except asyncio.CancelledError:
+            await ReviewJobRunner._mark_failed(job_id, "cancelled: server shutting down")
+            raise
+        except Exception as e:
+            logger.error(f"[REVIEW_JOB] Job {job_id} falhou: {type(e).__name__}: {e}")
+            await ReviewJobRunner._mark_failed(job_id, f"{type(e).__name__}: {e}")
+
+    @staticmethod
+    async def _mark_failed(job_id: str, error: str) -> None:
+        try:
+            await run_in_threadpool(SupaBasePRReviewDB.mark_job_status, job_id, "failed", error)
+        except Exception as e:
+            logger.error(f"[REVIEW_JOB] Não foi possível marcar job {job_id} como failed: {e}")
+
+    @staticmethod
+    async def recover_stale() -> None:
+        """Startup: falha jobs que ficaram queued/running de um processo que caiu."""
+        try:
+            rows = await run_in_threadpool(SupaBasePRReviewDB.fail_stale_jobs, settings.REVIEW_JOB_STALE_AFTER_S)
+            if rows:
+                logger.warning(f"[REVIEW_JOB] {len(rows)} jobs abandonados marcados como failed")
+        except Exception as e:
+            logger.error(f"[REVIEW_JOB] Falha ao recuperar jobs abandonados: {e}")
+
+    @staticmethod
+    async def shutdown(timeout_s: float = 10.0) -> None:
+        """Espera os reviews em andamento; os que sobrarem são cancelados e marcados failed."""
+        pending = list(ReviewJobRunner._tasks.values())
+        if not pending:
+            return
+        _, still_running = await asyncio.wait(pending, timeout=timeout_s)
+        for t in still_running:
+            t.cancel()
+        if still_running:
+            await asyncio.wait(still_running, timeout=timeout_s)
@@ -1,8 +1,11 @@
 from langgraph.graph import StateGraph, END
 
 from src.services.reviews.pipeline.state import ReviewState
+from src.services.reviews.pipeline.nodes.check_cache import check_cache, route_after_cache
+from src.services.reviews.pipeline.nodes.incremental import plan_incremental, carry_forward
 from src.services.reviews.pipeline.nodes.ingest_pr import ingest_pr
 from src.services.reviews.pipeline.nodes.run_specialists import run_specialists
+from src.services.reviews.pipeline.nodes.map_reduce import map_specialists, reduce_findings, route_after_ingest
 from src.services.reviews.pipeline.nodes.aggregate import aggregate
 from src.services.reviews.pipeline.nodes.persist_report import persist_report
 
@@ -10,15 +13,30 @@ from src.services.reviews.pipeline.nodes.persist_report import persist_report
 def build_review_graph():
     g = StateGraph(ReviewState)
 
+    g.add_node("check_cache", check_cache)
+    g.add_node("plan_incremental", plan_incremental)
     g.add_node("ingest_pr", ingest_pr)
     g.add_node("run_specialists", run_specialists)
+    g.add_node("map_specialists", map_specialists)
+    g.add_node("reduce_findings", reduce_findings)
     g.add_node("aggregate", aggregate)
+    g.add_node("carry_forward", carry_forward)
 
-    g.set_entry_point("ingest_pr")
-    g.add_edge("ingest_pr", "run_specialists")
+    g.set_entry_point("check_cache")
+    g.add_conditional_edges("check_cache", route_after_cache, {"hit": END, "miss": "plan_incremental"})
+    g.add_edge("plan_incremental", "ingest_pr")
+    # PR com mais de um chunk de diff: especialistas por chunk + merge
+    g.add_conditional_edges("ingest_pr", route_after_ingest, {
+        "single": "run_specialists",
+        "map": "map_specialists",
+        "skip": "carry_forward",  # incremental sem arquivo revisável alterado
+    })
     g.add_edge("run_specialists", "aggregate")
+    g.add_edge("map_specialists", "reduce_findings")
+    g.add_edge("reduce_findings", "aggregate")
     g.add_node("persist_report", persist_report)
-    g.add_edge("aggregate", "persist_report")
+    g.add_edge("aggregate", "carry_forward")
+    g.add_edge("carry_forward", "persist_report")
     g.add_edge("aggregate", END)
 
     return g.compile()
@@ -1,7 +1,10 @@
+import logging
+
 from starlette.concurrency import run_in_threadpool
 
+from src.core.config import settings
 from src.models.agent_models import AgentRunRequestV2
-from src.services.reviews.agent_ids import PR_REVIEW_AGENT_IDS
+from src.services.reviews.agent_ids import PR_REVIEW_AGGREGATOR
 from src.services.reviews.prompt_builder import build_aggregator_prompt
 from src.services.reviews.pipeline.state import ReviewState
 from src.services.reviews.pipeline.nodes._json_parse import safe_parse_json
@@ -9,6 +12,8 @@ from src.services.reviews.session_id import pr_session_uuid
 # Ajuste o import conforme seu projeto
 from src.services.agent_v2 import AgentManagerV2
 
+logger = logging.getLogger(__name__)
+
 
 async def aggregate(state: ReviewState) -> dict:
     repo = state["repo_full_name"]
@@ -26,17 +31,19 @@ async def aggregate(state: ReviewState) -> dict:
     )
 
     run_req = AgentRunRequestV2(
-        agent_id=PR_REVIEW_AGENT_IDS["aggregator"],
+        agent_id=PR_REVIEW_AGGREGATOR[1],
         user_id=user_id,
-        session_id=pr_session_uuid(repo, pr_number, head_sha, "pr_review_aggregator"),
+        session_id=pr_session_uuid(repo, pr_number, head_sha, PR_REVIEW_AGGREGATOR[0]),
         message=agg_prompt,
     )
 
-    raw = await AgentManagerV2.run_agent_v2(run_req)
-    print("RAW_AGENT_OUTPUT =", raw)  # <-- debug
+    # sem histórico da sessão (fixa por head_sha) e com o mesmo timeout dos especialistas
+    raw = await AgentManagerV2.run_agent_v2(
+        run_req, timeout_s=settings.REVIEW_SPECIALIST_TIMEOUT_S, history_limit=1
+    )
     text = raw.get("response", "")
-    print("RAW_TEXT_LEN =", len(text))
+    logger.debug(f"[REVIEW] {PR_REVIEW_AGGREGATOR[0]}: resposta com {len(text)} caracteres")
 
-    final_report = safe_parse_json(raw.get("response", ""))
+    final_report = safe_parse_json(text)
 
     return {"final_report": final_report}
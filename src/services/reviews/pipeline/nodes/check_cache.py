@@ -0,0 +1,59 @@
+import hashlib
+import json
+
+from starlette.concurrency import run_in_threadpool
+
+from src.data.supaBase.supaBase_agent_db import SupaBaseAgentDB
+from src.data.supaBase.supaBase_pr_review_db import SupaBasePRReviewDB
+from src.services.agent_cache import agent_config_hash
+from src.services.reviews.agent_ids import PR_REVIEW_SPECIALISTS, PR_REVIEW_AGGREGATOR
+from src.services.reviews.pipeline.state import ReviewState
+
+
+async def review_config_hash() -> str:
+    """
+    Hash combinado das configs de todos os agentes do review.
+    Mudou prompt/modelo/tools de qualquer um => hash novo => cache não vale.
+    """
+    parts = []
+    for agent_name, agent_id in [*PR_REVIEW_SPECIALISTS, PR_REVIEW_AGGREGATOR]:
+        cfg = await SupaBaseAgentDB.get_agent(agent_id)
+        parts.append([agent_name, agent_id, agent_config_hash(cfg) if cfg else None])
+    raw = json.dumps(parts, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+
+async def check_cache(state: ReviewState) -> dict:
+    config_hash = await review_config_hash()
+    if state.get("force"):
+        return {"agents_config_hash": config_hash, "cache_hit": False}
+
+    report = await run_in_threadpool(
+        SupaBasePRReviewDB.get_cached_report,
+        state["repo_full_name"],
+        state["pr_number"],
+        state["head_sha"],
+        config_hash,
+        # só report em que todos os agentes rodaram
+        [name for name, _ in [*PR_REVIEW_SPECIALISTS, PR_REVIEW_AGGREGATOR]],
+    )
+    if not report:
+        return {"agents_config_hash": config_hash, "cache_hit": False}
+
+    # o job não é tocado aqui; no modo assíncrono o ReviewJobRunner fecha o job re-enfileirado
+
+    return {
+        "agents_config_hash": config_hash,
+        "cache_hit": True,
+        "final_report": report["result_json"],
+        "db": {
+            "job_id": report["job_id"],
+            "report_id": report["id"],
+            "status": "completed",
+            "cache_hit": True,
+        },
+    }
+
+
+def route_after_cache(state: ReviewState) -> str:
+    return "hit" if state.get("cache_hit") else "miss"
@@ -0,0 +1,110 @@
+"""
+Re-review incremental: num novo push do PR, só os arquivos alterados desde o
+último head revisado vão para os especialistas; os findings do review anterior
+nos arquivos não tocados são reaproveitados.
+
+Volta para o review completo quando não há review anterior, quando o novo
+head não descende do anterior (force-push/rebase) ou quando o compare do
+GitHub vem truncado.
+"""
+import logging
+
+from starlette.concurrency import run_in_threadpool
+
+from src.data.supaBase.supaBase_pr_review_db import SupaBasePRReviewDB
+from src.data.supaBase.supaBase_pr_review_read_db import SupaBasePRReviewReadDB
+from src.services.reviews.github_client import GitHubClient
+from src.services.reviews.pipeline.state import ReviewState
+
+logger = logging.getLogger(__name__)
+
+# o compare do GitHub lista no máximo 300 arquivos
+_COMPARE_FILES_LIMIT = 300
+
+FINDING_FIELDS = ("severity", "title", "file", "line_range", "evidence", "recommendation", "confidence", "source_agent")
+
+
+async def plan_incremental(state: ReviewState) -> dict:
+    if not state.get("incremental"):
+        return {}
+
+    repo = state["repo_full_name"]
+    prev = await run_in_threadpool(
+        SupaBasePRReviewDB.get_previous_completed, repo, state["pr_number"], state["head_sha"]
+    )
+    if not prev:
+        return {"incremental_plan": {"mode": "full", "reason": "no previous review"}}
+
+    gh = GitHubClient(token=state["github_token"])
+    try:
+        cmp = await gh.compare(repo, prev["head_sha"], state["head_sha"])
+    except Exception as e:
+        logger.warning(f"[REVIEW] compare {prev['head_sha']}...{state['head_sha']} falhou: {e}")
+        return {"incremental_plan": {"mode": "full", "reason": "compare failed"}}
+
+    files = cmp.get("files") or []
+    if cmp.get("status") != "ahead":
+        return {"incremental_plan": {"mode": "full", "reason": f"compare status {cmp.get('status')}"}}
+    if len(files) >= _COMPARE_FILES_LIMIT:
+        return {"incremental_plan": {"mode": "full", "reason": "compare truncated"}}
+
+    changed = sorted({f["filename"] for f in files} | {f["previous_filename"] for f in files if f.get("previous_filename")})
+
+    rows = await run_in_threadpool(SupaBasePRReviewReadDB.get_findings, prev["report_id"])
+    previous_findings = [{k: r.get(k) for k in FINDING_FIELDS} for r in rows]
+
+    return {
+        "incremental_plan": {
+            "mode": "incremental",
+            "previous_head_sha": prev["head_sha"],
+            "previous_job_id": str(prev["id"]),
+            "changed_files": changed,
+        },
+        "previous_findings": previous_findings,
+    }
+
+
+def changed_files_filter(state: ReviewState) -> set[str] | None:
+    """Arquivos a revisar no modo incremental (None = review completo)."""
+    plan = state.get("incremental_plan") or {}
+    if plan.get("mode") != "incremental":
+        return None
+    return set(plan["changed_files"])
+
+
+async def carry_forward(state: ReviewState) -> dict:
+    """
+    Junta ao final_report os findings anteriores de arquivos que seguem no PR
+    e não foram tocados no novo push. Findings sem arquivo não são levados
+    (o aggregator já reavaliou o PR como um todo).
+    """
+    plan = state.get("incremental_plan") or {}
+    if plan.get("mode") != "incremental":
+        return {}
+
+    changed = set(plan["changed_files"])
+    in_pr = {f["path"] for f in state.get("diff_files") or []}
+    carried = [
+        {**f, "carried_from": plan["previous_head_sha"]}
+        for f in state.get("previous_findings") or []
+        if f.get("file") and f["file"] in in_pr and f["file"] not in changed
+    ]
+
+    if state.get("final_report") is None:
+        # nenhum arquivo revisável mudou: especialistas/aggregator nem rodaram
+        final_report = {
+            "summary_md": f"Nenhum arquivo revisável alterado desde {plan['previous_head_sha']}; findings anteriores mantidos.",
+            "findings": [],
+            "tests_suggested": [],
+        }
+    else:
+        final_report = dict(state["final_report"])
+    if final_report.get("agent") in ("parse_error", "runtime_error"):
+        return {}
+    final_report["findings"] = list(final_report.get("findings") or []) + carried
+    final_report["incremental"] = {
+        "previous_head_sha": plan["previous_head_sha"],
+        "reviewed_files": sorted(changed & in_pr),
+        "carried_findings": len(carried),
+    }
+    return {"final_report": final_report}
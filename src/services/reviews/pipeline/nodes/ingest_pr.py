@@ -1,27 +1,86 @@
+from starlette.concurrency import run_in_threadpool
+
+from src.core.config import settings
+from src.data.supaBase.supaBase_agent_db import SupaBaseAgentDB
+from src.services.reviews.agent_ids import PR_REVIEW_SPECIALISTS
+from src.services.reviews.diff_packer import pack_diff
+from src.services.reviews.diff_parser import parse_diff, skip_reason
 from src.services.reviews.github_client import GitHubClient
+from src.services.reviews.prompt_builder import format_skipped_files
 from src.services.reviews.pipeline.state import ReviewState
+from src.services.reviews.pipeline.nodes.incremental import changed_files_filter
+from src.utils.tokens import context_window, count_tokens
+
+
+async def chunk_budget() -> tuple[int, str]:
+    """
+    Orçamento de tokens de diff por chunk: o menor entre os especialistas
+    (janela do modelo - max_tokens - system prompt - reserva), limitado a
+    REVIEW_CHUNK_MAX_TOKENS. Retorna (orçamento, modelo usado na contagem).
+    """
+    budgets = []
+    for _, agent_id in PR_REVIEW_SPECIALISTS:
+        cfg = await SupaBaseAgentDB.get_agent(agent_id) or {}
+        model = cfg.get("model") or settings.MODEL_NAME
+        # tiktoken (e o primeiro load do encoding) fora do event loop
+        prompt_tokens = await run_in_threadpool(count_tokens, cfg.get("prompt") or "", model)
+        reserve = (cfg.get("max_tokens") or 0) + prompt_tokens + settings.REVIEW_PROMPT_RESERVE_TOKENS
+        budgets.append((context_window(model) - reserve, model))
+
+    budget, model = min(budgets)
+    return max(min(budget, settings.REVIEW_CHUNK_MAX_TOKENS), 1000), model
+
+
+def _split_diff(diff_text: str, only, budget: int, model: str):
+    """Parse + filtro + empacotamento do diff (CPU: roda no threadpool)."""
+    files = parse_diff(diff_text)
+    reviewable = []
+    skipped_files = []
+    for fd in files:
+        reason = skip_reason(fd)
+        if reason:
+            skipped_files.append({**fd.summary(), "reason": reason})
+        elif only is None or fd.path in only or fd.old_path in only:
+            reviewable.append(fd)
+    return files, reviewable, skipped_files, pack_diff(reviewable, budget, model)
+
 
 async def ingest_pr(state: ReviewState) -> dict:
     gh = GitHubClient(token=state["github_token"])
-    pr = await gh.get_pr(state["repo_full_name"], state["pr_number"])
-    diff_text = await gh.get_pr_diff(state["repo_full_name"], state["pr_number"])
+    pr, diff_text = await gh.get_pr_and_diff(state["repo_full_name"], state["pr_number"])
+
+    budget, model = await chunk_budget()
+    # diff inteiro no tiktoken bloquearia o event loop (SSE, outras requests)
+    files, reviewable, skipped_files, chunks = await run_in_threadpool(
+        _split_diff, diff_text, changed_files_filter(state), budget, model
+    )
 
-    # MVP: corte simples para evitar prompt gigante
-    MAX_CHARS = 120_000
-    truncated = False
-    if len(diff_text) > MAX_CHARS:
-        diff_text = diff_text[:MAX_CHARS] + "\n\n[TRUNCATED_DIFF]\n"
-        truncated = True
+    # diff de um prompt só: primeiro chunk + resumo do que ficou de fora
+    diff_text = chunks[0].text if chunks else ""
+    if skipped_files:
+        diff_text += "\n\n" + format_skipped_files(skipped_files)
+    if len(chunks) > 1:
+        omitted = [f for c in chunks[1:] for f in c.files]
+        diff_text += f"\n\n[TRUNCATED_DIFF] {len(chunks) - 1} chunks omitidos: {', '.join(omitted)}\n"
 
     patch = {
         "pr_title": pr.get("title", "") or "",
         "pr_body": pr.get("body", "") or "",
         "diff_text": diff_text,
+        "diff_files": [fd.summary() for fd in files],
+        "diff_chunks": [c.to_dict() for c in chunks],
+        "skipped_files": skipped_files,
         "diff_stats": {
             "head_sha": state["head_sha"],
             "base_sha": state["base_sha"],
             "diff_chars": len(diff_text),
-            "truncated": truncated,
+            "truncated": len(chunks) > 1,
+            "chunks": len(chunks),
+            "chunk_budget_tokens": budget,
+            "diff_tokens": sum(c.tokens for c in chunks),
+            "skipped_files": len(skipped_files),
+            "reviewed_files": len(reviewable),
+            "incremental_from": (state.get("incremental_plan") or {}).get("previous_head_sha"),
             "files_changed": pr.get("changed_files"),
             "additions": pr.get("additions"),
             "deletions": pr.get("deletions"),
@@ -0,0 +1,140 @@
+"""
+Modo map-reduce para PRs grandes (mais de um chunk de diff).
+
+map_specialists: cada especialista roda em cada chunk, em paralelo, sob um
+semáforo global do processo (REVIEW_MAP_CONCURRENCY) — vale para todos os
+reviews em andamento, protegendo o rate limit da OpenAI.
+
+reduce_findings: junta os outputs de cada especialista entre os chunks,
+removendo findings duplicados, e entrega `specialist_outputs` no mesmo
+formato do modo de chamada única para o aggregate.
+"""
+import asyncio
+from typing import Optional
+
+from src.core.config import settings
+from src.models.agent_models import AgentRunRequestV2
+from src.services.reviews.agent_ids import PR_REVIEW_SPECIALISTS
+from src.services.reviews.normalize import normalize_line_range
+from src.services.reviews.prompt_builder import build_specialist_prompt
+from src.services.reviews.pipeline.state import ReviewState
+from src.services.reviews.pipeline.nodes.run_specialists import run_specialist
+from src.services.reviews.session_id import pr_session_uuid
+
+SEVERITY_RANK = {"BLOCKER": 0, "MAJOR": 1, "MINOR": 2, "NIT": 3}
+
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def _map_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(settings.REVIEW_MAP_CONCURRENCY)
+    return _semaphore
+
+
+def route_after_ingest(state: ReviewState) -> str:
+    if not state.get("diff_chunks") and (state.get("incremental_plan") or {}).get("mode") == "incremental":
+        return "skip"
+    if settings.REVIEW_MAP_REDUCE_ENABLED and len(state.get("diff_chunks") or []) > 1:
+        return "map"
+    return "single"
+
+
+async def _run_chunk(agent_name: str, chunk_index: int, run_req: AgentRunRequestV2) -> dict:
+    out, err = await run_specialist(agent_name, run_req, _map_semaphore(), settings.REVIEW_SPECIALIST_TIMEOUT_S)
+    if err is None and out.get("agent") == "parse_error":
+        err = {"agent": agent_name, "error": "parse_error"}
+        out = None
+    if err is not None:
+        # falha de um chunk não derruba o especialista (ver reduce_findings)
+        err.update(stage="map_specialists", chunk=chunk_index)
+    return {"agent": agent_name, "chunk": chunk_index, "output": out, "error": err}
+
+
+async def map_specialists(state: ReviewState) -> dict:
+    repo = state["repo_full_name"]
+    pr_number = state["pr_number"]
+    head_sha = state["head_sha"]
+    user_id = state.get("user_id") or "github-actions"
+
+    all_chunks = state.get("diff_chunks") or []
+    chunks = all_chunks[: settings.REVIEW_MAX_CHUNKS]
+    errors = []
+    if len(all_chunks) > len(chunks):
+        omitted = [f for c in all_chunks[len(chunks):] for f in c["files"]]
+        errors.append({"stage": "map_specialists", "error": f"{len(omitted)} arquivos acima de REVIEW_MAX_CHUNKS não revisados", "files": omitted})
+
+    calls = []
+    for agent_name, agent_id in PR_REVIEW_SPECIALISTS:
+        for chunk in chunks:
+            user_prompt = build_specialist_prompt(
+                agent_name=agent_name,
+                pr_title=state.get("pr_title", ""),
+                pr_body=state.get("pr_body", ""),
+                diff_text=chunk["text"],
+                chunk_label=f"{chunk['index'] + 1}/{len(all_chunks)} — arquivos: {', '.join(chunk['files'])}",
+            )
+            run_req = AgentRunRequestV2(
+                agent_id=agent_id,
+                user_id=user_id,
+                session_id=pr_session_uuid(repo, pr_number, head_sha, f"{agent_name}:chunk{chunk['index']}"),
+                message=user_prompt,
+            )
+            calls.append(_run_chunk(agent_name, chunk["index"], run_req))
+
+    results = await asyncio.gather(*calls)
+
+    errors += [r["error"] for r in results if r["error"] is not None]
+    chunk_outputs = [r for r in results if r["output"] is not None]
+
+    return {"chunk_outputs": chunk_outputs, "errors": errors}
+
+
+def _finding_key(f: dict) -> tuple:
+    return (
+        (f.get("file") or "").strip(),
+        normalize_line_range(f.get("line_range")),
+        (f.get("title") or "").strip().lower(),
+    )
+
+
+def _merge_findings(findings: list[dict]) -> list[dict]:
+    """Dedupe por arquivo+linhas+título; fica a versão de maior severidade."""
+    best: dict[tuple, dict] = {}
+    for f in findings:
+        key = _finding_key(f)
+        cur = best.get(key)
+        if cur is None or SEVERITY_RANK.get(f.get("severity"), 99) < SEVERITY_RANK.get(cur.get("severity"), 99):
+            best[key] = f
+    return sorted(best.values(), key=lambda f: SEVERITY_RANK.get(f.get("severity"), 99))
+
+
+async def reduce_findings(state: ReviewState) -> dict:
+    by_agent: dict[str, list[dict]] = {}
+    for r in sorted(state.get("chunk_outputs") or [], key=lambda r: r["chunk"]):
+        by_agent.setdefault(r["agent"], []).append(r["output"])
+
+    outputs = []
+    failed = []
+    # mesma ordem de PR_REVIEW_SPECIALISTS que o modo de chamada única
+    for agent_name, _ in PR_REVIEW_SPECIALISTS:
+        chunk_outs = by_agent.get(agent_name)
+        if not chunk_outs:
+            failed.append({"stage": "run_specialists", "agent": agent_name, "error": "all chunks failed"})
+            continue
+
+        tests: list = []
+        for o in chunk_outs:
+            for t in o.get("tests_suggested") or []:
+                if t not in tests:
+                    tests.append(t)
+
+        outputs.append({
+            "agent": chunk_outs[0].get("agent") or agent_name,
+            "findings": _merge_findings([f for o in chunk_outs for f in o.get("findings") or []]),
+            "tests_suggested": tests,
+            "chunks_reviewed": len(chunk_outs),
+        })
+
+    return {"specialist_outputs": outputs, "errors": failed}
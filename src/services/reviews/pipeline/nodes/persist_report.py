@@ -1,15 +1,26 @@
+from starlette.concurrency import run_in_threadpool
+
 from src.services.reviews.pipeline.state import ReviewState
 from src.data.supaBase.supaBase_pr_review_db import SupaBasePRReviewDB
 from src.services.reviews.normalize import normalize_findings
+from src.services.reviews.agent_ids import PR_REVIEW_SPECIALISTS, PR_REVIEW_AGGREGATOR
 
 def _extract_agents_executed(state: ReviewState) -> list[str]:
-    # você pode melhorar depois. MVP: hardcoded
-    return [
-        "pr_review_correctness",
-        "pr_review_maintainability",
-        "pr_review_security",
-        "pr_review_aggregator",
-    ]
+    """
+    Agentes que revisaram o diff inteiro (o cache de review exige todos).
+    Ficam de fora: especialista com erro em qualquer etapa (timeout, parse_error,
+    chunk que falhou) e, se chunks foram cortados por REVIEW_MAX_CHUNKS (erro
+    sem "agent"), todos os especialistas; o aggregator só entra com report válido.
+    """
+    errors = state.get("errors") or []
+    if any(not e.get("agent") for e in errors if e.get("stage") == "map_specialists"):
+        names = []
+    else:
+        failed = {e.get("agent") for e in errors}
+        names = [name for name, _ in PR_REVIEW_SPECIALISTS if name not in failed]
+    if (state.get("final_report") or {}).get("agent") not in ("parse_error", "runtime_error"):
+        names.append(PR_REVIEW_AGGREGATOR[0])
+    return names
 
 async def persist_report(state: ReviewState) -> dict:
     repo = state["repo_full_name"]
@@ -31,7 +42,9 @@ async def persist_report(state: ReviewState) -> dict:
         status = "failed"
         error = str(final_report)
 
-    job = SupaBasePRReviewDB.upsert_job(
+    # tudo numa transação: o report nunca fica sem os findings
+    ids = await run_in_threadpool(
+        SupaBasePRReviewDB.persist_review,
         repo_full_name=repo,
         pr_number=pr_number,
         head_sha=head_sha,
@@ -39,24 +52,20 @@ async def persist_report(state: ReviewState) -> dict:
         status=status,
         trigger="github_action",
         error=error,
-    )
-
-    report = SupaBasePRReviewDB.upsert_report(
-        job_id=job["id"],
         summary_md=summary_md,
         result_json=final_report,
         agents_executed=_extract_agents_executed(state),
+        agents_config_hash=state.get("agents_config_hash"),
+        findings=findings,
+        tests=tests,
         duration_ms=None,  # depois podemos medir
     )
 
-    SupaBasePRReviewDB.replace_findings(report_id=report["id"], findings=findings)
-    SupaBasePRReviewDB.replace_test_suggestions(report_id=report["id"], tests=tests)
-
     # devolve ids no state (útil pro front e debug)
     return {
         "db": {
-            "job_id": job["id"],
-            "report_id": report["id"],
+            "job_id": ids["job_id"],
+            "report_id": ids["report_id"],
             "findings_count": len(findings),
             "tests_count": len(tests),
             "status": status,
@@ -1,7 +1,9 @@
-from starlette.concurrency import run_in_threadpool
+import asyncio
+import logging
 
+from src.core.config import settings
 from src.models.agent_models import AgentRunRequestV2
-from src.services.reviews.agent_ids import PR_REVIEW_AGENT_IDS
+from src.services.reviews.agent_ids import PR_REVIEW_SPECIALISTS
 from src.services.reviews.prompt_builder import build_specialist_prompt
 from src.services.reviews.pipeline.state import ReviewState
 from src.services.reviews.pipeline.nodes._json_parse import safe_parse_json
@@ -9,24 +11,50 @@ from src.services.reviews.session_id import pr_session_uuid
 # Ajuste o import conforme seu projeto
 from src.services.agent_v2 import AgentManagerV2
 
+logger = logging.getLogger(__name__)
+
+
+async def run_specialist(
+    agent_name: str,
+    run_req: AgentRunRequestV2,
+    semaphore: asyncio.Semaphore,
+    timeout_s: float,
+) -> tuple[dict | None, dict | None]:
+    """
+    Roda um especialista respeitando o semáforo e o timeout.
+    Retorna (output_parseado, None) ou (None, erro) — nunca levanta.
+    """
+    async with semaphore:
+        try:
+            # timeout dentro do run_agent_v2: a run do especialista é fechada como erro.
+            # history_limit=1: a sessão é fixa por head_sha; o prompt não leva a execução
+            # anterior como histórico (re-execução com force acerta o ResponseCache)
+            raw = await AgentManagerV2.run_agent_v2(run_req, timeout_s=timeout_s, history_limit=1)
+        except Exception as e:
+            return None, {"stage": "run_specialists", "agent": agent_name, "error": f"{type(e).__name__}: {e}"}
+
+    # run_agent_v2 devolve {"error": ...} em vez de levantar
+    if raw.get("error"):
+        return None, {"stage": "run_specialists", "agent": agent_name, "error": raw["error"]}
+
+    text = raw.get("response", "")
+    logger.debug(f"[REVIEW] {agent_name}: resposta com {len(text)} caracteres")
+
+    return safe_parse_json(text), None
+
 
 async def run_specialists(state: ReviewState) -> dict:
     repo = state["repo_full_name"]
     pr_number = state["pr_number"]
     head_sha = state["head_sha"]
 
-    base_session = f"pr:{repo}:{pr_number}:{head_sha}"
     user_id = state.get("user_id") or "github-actions"
 
-    specialist_runs = [
-        ("pr_review_correctness", PR_REVIEW_AGENT_IDS["correctness"]),
-        ("pr_review_maintainability", PR_REVIEW_AGENT_IDS["maintainability"]),
-        ("pr_review_security", PR_REVIEW_AGENT_IDS["security"]),
-    ]
-
-    outputs: list[dict] = []
+    semaphore = asyncio.Semaphore(settings.REVIEW_SPECIALIST_CONCURRENCY)
+    timeout_s = settings.REVIEW_SPECIALIST_TIMEOUT_S
 
-    for agent_name, agent_id in specialist_runs:
+    calls = []
+    for agent_name, agent_id in PR_REVIEW_SPECIALISTS:
         user_prompt = build_specialist_prompt(
             agent_name=agent_name,
             pr_title=state.get("pr_title", ""),
@@ -40,15 +68,18 @@ async def run_specialists(state: ReviewState) -> dict:
             session_id=pr_session_uuid(repo, pr_number, head_sha, agent_name),
             message=user_prompt,
         )
+        calls.append(run_specialist(agent_name, run_req, semaphore, timeout_s))
 
-        # roda o agente sem bloquear o event loop
-        raw = await AgentManagerV2.run_agent_v2(run_req)
+    # gather preserva a ordem de PR_REVIEW_SPECIALISTS
+    results = await asyncio.gather(*calls)
 
-        print("RAW_AGENT_OUTPUT =", raw)  # <-- debug
-        text = raw.get("response", "")
-        print("RAW_TEXT_LEN =", len(text))
-        
-        parsed = safe_parse_json(raw.get("response", ""))
-        outputs.append(parsed)
+    outputs = [out for out, _ in results if out is not None]
+    errors = [err for _, err in results if err is not None]
+    # JSON inválido segue para o aggregator, mas o especialista não conta como executado
+    errors += [
+        {"stage": "run_specialists", "agent": agent_name, "error": "parse_error"}
+        for (agent_name, _), (out, _) in zip(PR_REVIEW_SPECIALISTS, results)
+        if out is not None and out.get("agent") == "parse_error"
+    ]
 
-    return {"specialist_outputs": outputs}
+    return {"specialist_outputs": outputs, "errors": errors}
@@ -1,4 +1,5 @@
-from typing import TypedDict, Optional, Any
+import operator
+from typing import Annotated, TypedDict, Optional, Any
 
 class ReviewState(TypedDict, total=False):
     # input inicial do endpoint
@@ -8,18 +9,34 @@ class ReviewState(TypedDict, total=False):
     head_sha: str
     base_sha: str
     user_id: str
+    force: bool  # ignora o cache de review
+    incremental: bool  # revisa só o que mudou desde o último head revisado
+
+    # preenchido no check_cache
+    agents_config_hash: str
+    cache_hit: bool
+
+    # preenchido no plan_incremental
+    incremental_plan: dict         # {"mode": "full"|"incremental", ...}
+    previous_findings: list[dict]  # findings do review anterior (modo incremental)
 
     # preenchido no ingest_pr
     pr_title: str
     pr_body: str
     diff_text: str
     diff_stats: dict
+    diff_files: list[dict]    # resumo por arquivo (FileDiff.summary)
+    diff_chunks: list[dict]   # DiffChunk.to_dict, cada um cabe no orçamento de tokens
+    skipped_files: list[dict] # lockfiles/gerados/binários/removidos, com "reason"
+
+    # preenchido no map_specialists (modo map-reduce): {"agent", "chunk", "output"}
+    chunk_outputs: list[dict]
 
-    # preenchido no run_specialists
+    # preenchido no run_specialists (ou no reduce_findings)
     specialist_outputs: list[dict]
 
     # preenchido no aggregate
     final_report: dict
 
-    # diagnóstico/erros
-    errors: list[dict]
+    # diagnóstico/erros (acumulado: cada nó devolve só os erros novos)
+    errors: Annotated[list[dict], operator.add]
@@ -1,5 +1,7 @@
-def build_specialist_prompt(agent_name: str, pr_title: str, pr_body: str, diff_text: str) -> str:
+def build_specialist_prompt(agent_name: str, pr_title: str, pr_body: str, diff_text: str, chunk_label: str | None = None) -> str:
     body = pr_body or ""
+    # modo map-reduce: o especialista vê só uma parte do diff
+    chunk = f"\n[CHUNK]\n{chunk_label}\n" if chunk_label else ""
     return f"""
 [AGENT]
 {agent_name}
@@ -7,7 +9,7 @@ def build_specialist_prompt(agent_name: str, pr_title: str, pr_body: str, diff_t
 [PR]
 title: {pr_title}
 description: {body}
-
+{chunk}
 [DIFF]
 {diff_text}
 """.strip()
@@ -25,3 +27,8 @@ description: {body}
 [SPECIALIST_OUTPUTS_JSON]
 {specialist_outputs}
 """.strip()
+
+
+def format_skipped_files(skipped_files: list[dict]) -> str:
+    lines = [f"- {f['path']} ({f['reason']}, +{f['added']}/-{f['removed']})" for f in skipped_files]
+    return "[SKIPPED_FILES]\n" + "\n".join(lines)
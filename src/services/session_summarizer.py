@@ -0,0 +1,212 @@
+"""
+Resumo incremental de sessões longas, fora do caminho da request.
+
+Durante o turno, _prepare_v2 marca a sessão (`request`) quando a cauda ainda
+não resumida passa de SUMMARY_TRIGGER_TOKENS (ou enche a janela de
+HISTORY_MAX_MESSAGES candidatas). Depois que a resposta é gravada, `kick` dispara um passe em
+background (no máximo um por sessão por vez no processo):
+
+1. lê o resumo atual e a cauda não resumida (mais antigas primeiro);
+2. mantém literal a parte mais recente (SUMMARY_KEEP_TOKENS, no máximo metade de
+   HISTORY_MAX_MESSAGES) e dobra no resumo
+   até SUMMARY_MAX_INPUT_TOKENS das mensagens anteriores a ela;
+3. grava o novo resumo com summarized_until = created_at da última mensagem
+   dobrada (só se outro worker não avançou a sessão antes).
+
+Cada passe só lê as mensagens novas desde o último resumo. O resumo entra no
+prompt como mensagem de sistema e as mensagens dobradas saem da janela.
+
+A chamada ao LLM é registrada como run (agent_id="session-summarizer"), com
+tokens e custo, como as dos agentes. Turno que falha antes de gravar a resposta
+tira a sessão da fila (`discard`); a fila é limitada a SUMMARY_PENDING_MAX.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Set
+
+from langchain_community.callbacks import get_openai_callback
+from langchain_openai import ChatOpenAI
+
+from src.core.config import settings
+from src.data.supaBase.supaBase_memory_db import SupaBaseMemoryDB
+from src.services.history_cache import SessionHistoryCache
+from src.services.history_window import count_messages
+from src.utils.background import spawn
+from src.utils.log import finish_run_error, finish_run_success, start_run
+
+logger = logging.getLogger(__name__)
+
+SUMMARIZER_AGENT_ID = "session-summarizer"
+
+SUMMARY_PREFIX = "Resumo da conversa anterior (mensagens mais antigas que o histórico abaixo):\n"
+
+# mensagens lidas por passe (o resto fica para o próximo)
+_SCAN_LIMIT = 200
+
+_SUMMARY_SYSTEM_PROMPT = (
+    "Você mantém o resumo de uma conversa entre um usuário e um assistente. "
+    "Atualize o resumo existente incorporando as novas mensagens. Preserve fatos, "
+    "decisões, preferências e dados informados pelo usuário, perguntas em aberto e "
+    "compromissos do assistente. Seja conciso, escreva no idioma da conversa e "
+    "responda apenas com o resumo atualizado."
+)
+
+
+def summary_message(summary: str) -> Dict[str, str]:
+    return {"role": "system", "content": SUMMARY_PREFIX + summary}
+
+
+def _transcript(messages: List[Dict]) -> str:
+    return "\n\n".join(f"{m['role']}: {m['content']}" for m in messages)
+
+
+class SessionSummarizer:
+
+    # ordem de marcação: acima de SUMMARY_PENDING_MAX sai a mais antiga
+    _pending: "OrderedDict[str, None]" = OrderedDict()
+    _inflight: Set[str] = set()
+
+    @staticmethod
+    def request(session_id: str) -> None:
+        if not settings.SUMMARY_ENABLED:
+            return
+        pending = SessionSummarizer._pending
+        pending[str(session_id)] = None
+        pending.move_to_end(str(session_id))
+        while len(pending) > settings.SUMMARY_PENDING_MAX:
+            pending.popitem(last=False)
+
+    @staticmethod
+    def discard(session_id: str) -> None:
+        """Turno terminou sem gravar a resposta: não há passe a disparar."""
+        SessionSummarizer._pending.pop(str(session_id), None)
+
+    @staticmethod
+    def kick(session_id: str) -> None:
+        """Chamado depois que a resposta do turno foi gravada."""
+        session_id = str(session_id)
+        if session_id not in SessionSummarizer._pending or session_id in SessionSummarizer._inflight:
+            return
+        SessionSummarizer._pending.pop(session_id, None)
+        SessionSummarizer._inflight.add(session_id)
+        spawn(SessionSummarizer._run(session_id), name=f"summarize-{session_id}")
+
+    @staticmethod
+    async def _run(session_id: str) -> None:
+        try:
+            await SessionSummarizer.summarize(session_id)
+        except Exception as e:
+            logger.error(f"[SUMMARY] Falha ao resumir sessão {session_id}: {type(e).__name__}: {e}")
+        finally:
+            SessionSummarizer._inflight.discard(session_id)
+
+    @staticmethod
+    async def summarize(session_id: str) -> int:
+        """Um passe de resumo. Retorna quantas mensagens foram dobradas."""
+        model = settings.SUMMARY_MODEL
+        state = await SupaBaseMemoryDB.load_unsummarized(session_id, limit=_SCAN_LIMIT)
+        messages = state["messages"]
+        tokens = await count_messages(messages, model)
+        # muitas mensagens curtas também passam da janela de candidatas (HISTORY_MAX_MESSAGES)
+        if sum(tokens) <= settings.SUMMARY_TRIGGER_TOKENS and len(messages) < settings.HISTORY_MAX_MESSAGES:
+            return 0
+
+        # cauda recente fica literal
+        keep_from = len(messages)
+        kept = 0
+        keep_max = settings.HISTORY_MAX_MESSAGES // 2
+        while (
+            keep_from > 0
+            and len(messages) - keep_from < keep_max
+            and kept + tokens[keep_from - 1] <= settings.SUMMARY_KEEP_TOKENS
+        ):
+            keep_from -= 1
+            kept += tokens[keep_from]
+
+        # o que vem antes dela é dobrado, até o teto de entrada do passe
+        fold_until = 0
+        used = 0
+        while fold_until < keep_from and (fold_until == 0 or used + tokens[fold_until] <= settings.SUMMARY_MAX_INPUT_TOKENS):
+            used += tokens[fold_until]
+            fold_until += 1
+        fold = messages[:fold_until]
+        if not fold:
+            return 0
+
+        previous = state["summary"] or "(vazio)"
+        summary = await SessionSummarizer._invoke(
+            session_id,
+            model,
+            [
+                {"role": "system", "content": _SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": f"Resumo atual:\n{previous}\n\nNovas mensagens:\n{_transcript(fold)}"},
+            ],
+            fold=len(fold),
+        )
+        if not summary:
+            return 0
+
+        saved = await SupaBaseMemoryDB.save_summary(
+            session_id,
+            summary,
+            summarized_until=fold[-1]["created_at"],
+            summarized_messages=state["summarized_messages"] + len(fold),
+            model=model,
+            previous_until=state["summarized_until"],
+        )
+        if not saved:
+            logger.info(f"[SUMMARY] Sessão {session_id}: resumo já avançado por outro worker")
+            return 0
+
+        # a janela em cache ainda tem as mensagens dobradas: o próximo turno relê do banco
+        SessionHistoryCache.invalidate(session_id)
+        logger.info(f"[SUMMARY] Sessão {session_id}: {len(fold)} mensagens dobradas ({used} tokens)")
+        return len(fold)
+
+    @staticmethod
+    async def _invoke(session_id: str, model: str, messages: List[Dict[str, str]], fold: int) -> str:
+        """Chamada ao LLM registrada como run (tokens e custo no dashboard)."""
+        run_ctx = await start_run(
+            agent_id=SUMMARIZER_AGENT_ID,
+            user_id=None,
+            session_id=session_id,
+            model=model,
+            metadata={"route": "memory/summarize", "folded_messages": fold},
+        )
+        llm = ChatOpenAI(
+            model=model,
+            temperature=0,
+            max_tokens=settings.SUMMARY_MAX_TOKENS,
+            api_key=settings.OPENAI_API_KEY,
+        )
+        invoke_start = time.perf_counter()
+        try:
+            with get_openai_callback() as cb:
+                reply = await llm.ainvoke(messages)
+        except Exception as e:
+            await finish_run_error(
+                run_id=run_ctx["run_id"],
+                start_perf=run_ctx["start_perf"],
+                error_type=type(e).__name__,
+                error_message=str(e),
+                session_id=session_id,
+                model=model,
+            )
+            raise
+
+        await finish_run_success(
+            run_id=run_ctx["run_id"],
+            start_perf=run_ctx["start_perf"],
+            session_id=session_id,
+            model=model,
+            prompt_tokens=cb.prompt_tokens,
+            completion_tokens=cb.completion_tokens,
+            total_tokens=cb.total_tokens,
+            cost_usd=float(getattr(cb, "total_cost", 0.0) or 0.0),
+            metadata_patch={"invoke_ms": int((time.perf_counter() - invoke_start) * 1000)},
+        )
+        content = reply.content if isinstance(reply.content, str) else str(reply.content)
+        return content.strip()
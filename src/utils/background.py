@@ -0,0 +1,36 @@
+"""
+Tarefas "fire-and-forget" fora do ciclo da request.
+Guarda referência das tasks (o event loop só mantém weakrefs) e loga exceções.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Coroutine, Set
+
+logger = logging.getLogger(__name__)
+
+_TASKS: Set[asyncio.Task] = set()
+
+
+def spawn(coro: Coroutine, name: str | None = None) -> asyncio.Task:
+    task = asyncio.get_running_loop().create_task(coro, name=name)
+    _TASKS.add(task)
+    task.add_done_callback(_done)
+    return task
+
+
+def _done(task: asyncio.Task) -> None:
+    _TASKS.discard(task)
+    if task.cancelled():
+        return
+    exc = task.exception()
+    if exc is not None:
+        logger.error(f"[BACKGROUND] Task {task.get_name()} falhou: {type(exc).__name__}: {exc}")
+
+
+async def drain(timeout_s: float = 10.0) -> None:
+    """Espera as tasks pendentes terminarem (usado no shutdown)."""
+    pending = [t for t in _TASKS if not t.done()]
+    if pending:
+        await asyncio.wait(pending, timeout=timeout_s)
@@ -0,0 +1,161 @@
+"""
+Escritor em lote assíncrono: fila em memória limitada + worker que agrupa
+itens e chama `flush(batch)` quando junta `batch_size` itens ou passa
+`flush_interval_s` desde o primeiro item pendente.
+
+Política de overflow (fila cheia):
+- "drop_newest": descarta o item novo
+- "drop_oldest": descarta o item mais antigo da fila para abrir espaço
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest")
+
+_WRITERS: Dict[str, "BatchWriter"] = {}
+
+_STOP = object()
+
+
+class BatchWriter:
+    def __init__(
+        self,
+        name: str,
+        flush: Callable[[List[Any]], Awaitable[None]],
+        *,
+        max_queue: int,
+        batch_size: int,
+        flush_interval_s: float,
+        overflow_policy: str = "drop_newest",
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow_policy inválida: {overflow_policy} (use {OVERFLOW_POLICIES})")
+        self.name = name
+        self._flush = flush
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.overflow_policy = overflow_policy
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+        self.counters = {
+            "submitted": 0,
+            "dropped": 0,
+            "flushed_items": 0,
+            "batches": 0,
+            "flush_errors": 0,
+            "failed_items": 0,
+        }
+        _WRITERS[name] = self
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done() and not self._stopping
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._task = asyncio.create_task(self._run(), name=f"batch-writer-{self.name}")
+
+    async def stop(self, timeout_s: float = 10.0) -> None:
+        """Para de aceitar itens, drena a fila e faz o último flush."""
+        if self._task is None:
+            return
+        self._stopping = True
+        try:
+            await asyncio.wait_for(self._queue.put(_STOP), timeout=timeout_s)
+            await asyncio.wait_for(self._task, timeout=timeout_s)
+        except asyncio.TimeoutError:
+            logger.error(f"[BATCH:{self.name}] Timeout no flush final; {self._queue.qsize()} itens perdidos")
+            self._task.cancel()
+        self._task = None
+        self._queue = None
+
+    def submit(self, item: Any) -> bool:
+        """Enfileira sem bloquear. Retorna False se o item foi descartado."""
+        if not self.running:
+            self.counters["dropped"] += 1
+            return False
+
+        self.counters["submitted"] += 1
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            pass
+
+        self.counters["dropped"] += 1
+        if self.overflow_policy == "drop_newest":
+            return False
+
+        try:
+            self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        self._queue.put_nowait(item)
+        return True
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            first = await queue.get()
+            if first is _STOP:
+                return
+
+            batch = [first]
+            stop_after = False
+            deadline = time.monotonic() + self.flush_interval_s
+            while len(batch) < self.batch_size:
+                # get_nowait + sleep curto: wait_for(queue.get()) pode perder item no timeout (py<3.12)
+                try:
+                    item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    await asyncio.sleep(min(remaining, 0.05))
+                    continue
+                if item is _STOP:
+                    stop_after = True
+                    break
+                batch.append(item)
+
+            await self._flush_batch(batch)
+            if stop_after:
+                return
+
+    async def _flush_batch(self, batch: List[Any]) -> None:
+        try:
+            await self._flush(batch)
+            self.counters["flushed_items"] += len(batch)
+            self.counters["batches"] += 1
+        except Exception as e:
+            self.counters["flush_errors"] += 1
+            self.counters["failed_items"] += len(batch)
+            logger.error(f"[BATCH:{self.name}] Falha no flush de {len(batch)} itens: {type(e).__name__}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queue_size": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue": self.max_queue,
+            "batch_size": self.batch_size,
+            "flush_interval_s": self.flush_interval_s,
+            "overflow_policy": self.overflow_policy,
+            **self.counters,
+        }
+
+
+def writer_stats() -> Dict[str, dict]:
+    return {name: w.stats() for name, w in sorted(_WRITERS.items())}
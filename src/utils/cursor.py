@@ -0,0 +1,35 @@
+"""
+Cursor opaco para paginação keyset: (timestamp, id) da última linha da página
+em JSON + base64 url-safe. O cliente só devolve o `next_cursor` recebido.
+"""
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+
+def encode_cursor(ts: datetime, row_id: Any) -> str:
+    raw = json.dumps([ts.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[tuple[datetime, str]]:
+    """None se não veio cursor; ValueError se o cursor é inválido."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ts, row_id = json.loads(raw)
+        return datetime.fromisoformat(ts), str(row_id)
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+
+
+def next_cursor(rows: list[dict], limit: int, ts_key: str, id_key: str) -> Optional[str]:
+    """Cursor da próxima página (rows buscadas com limit + 1), ou None se acabou."""
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_cursor(last[ts_key], last[id_key])
@@ -0,0 +1,75 @@
+"""
+Histograma log-bucketed de tamanho fixo, mergeável por soma elemento a elemento
+(dá para somar em Python ou no Postgres com int8_array_add).
+
+Bucket 0: valores < 1. Bucket i >= 1: [GROWTH^(i-1), GROWTH^i). Com GROWTH = 2^(1/4)
+o erro relativo do percentil estimado (média geométrica do bucket) fica abaixo
+de ~10%, cobrindo até ~14 milhões (ms ou tokens) em 96 buckets.
+"""
+from __future__ import annotations
+
+import math
+from typing import Iterable, Optional
+
+GROWTH = 2 ** 0.25
+BUCKETS = 96
+_LOG_GROWTH = math.log(GROWTH)
+
+
+def empty() -> list[int]:
+    return [0] * BUCKETS
+
+
+def bucket_index(value: float) -> int:
+    if value < 1:
+        return 0
+    return min(BUCKETS - 1, 1 + int(math.log(value) / _LOG_GROWTH))
+
+
+def bucket_bounds(i: int) -> tuple[float, float]:
+    if i == 0:
+        return 0.0, 1.0
+    return GROWTH ** (i - 1), GROWTH ** i
+
+
+def add(hist: list[int], value: Optional[float]) -> None:
+    if value is None or value < 0:
+        return
+    hist[bucket_index(value)] += 1
+
+
+def merge(hists: Iterable[Optional[list[int]]]) -> list[int]:
+    out = empty()
+    for h in hists:
+        if not h:
+            continue
+        for i, c in enumerate(h[:BUCKETS]):
+            out[i] += int(c or 0)
+    return out
+
+
+def count(hist: list[int]) -> int:
+    return sum(hist)
+
+
+def percentile(hist: list[int], q: float) -> Optional[float]:
+    """Estimativa do percentil q (0-100); None se o histograma está vazio."""
+    total = sum(hist)
+    if total == 0:
+        return None
+    rank = max(1, math.ceil(total * q / 100.0))
+    seen = 0
+    for i, c in enumerate(hist):
+        seen += c
+        if seen >= rank:
+            lo, hi = bucket_bounds(i)
+            return round(math.sqrt(lo * hi) if lo > 0 else hi / 2, 2)
+    return None
+
+
+def summary(hist: list[int], qs: Iterable[float] = (50, 90, 99)) -> dict:
+    """{"count": n, "p50": ..., "p90": ..., "p99": ...}"""
+    out: dict = {"count": count(hist)}
+    for q in qs:
+        out[f"p{q:g}"] = percentile(hist, q)
+    return out
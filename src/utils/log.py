@@ -4,6 +4,8 @@ from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
 from src.data.supaBase.supaBase_log_db import SupaBaseRunsDB
+from src.utils.telemetry_sink import RunsTelemetrySink
+from src.utils.run_rollups import RunRollups
 
 def now_utc():
     return datetime.now(timezone.utc).isoformat()
@@ -14,13 +16,23 @@ def ms_since(start_perf: float) -> int:
 def hash_error(msg: str) -> str:
     return hashlib.sha256(msg.encode("utf-8")).hexdigest()[:16]
 
-def start_run(*, agent_id: str, user_id: Optional[str], session_id: Optional[str],
+async def _write_finish(run_id: str, patch: Dict[str, Any]) -> None:
+    if RunsTelemetrySink.running() and RunsTelemetrySink.record_finish(run_id, patch):
+        return
+    # fila cheia com o start ainda nela: o UPDATE não acharia a linha
+    if RunsTelemetrySink.defer_finish(run_id, patch):
+        return
+    row = await SupaBaseRunsDB.update_run(run_id, patch)
+    if row:
+        await RunRollups.record([row])
+
+async def start_run(*, agent_id: str, user_id: Optional[str], session_id: Optional[str],
             agent_version: Optional[str] = None, model: Optional[str] = None,
             provider: str = "openai", metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     run_id = str(uuid.uuid4())
     start_perf = time.perf_counter()
 
-    SupaBaseRunsDB.insert_run({
+    row = {
         "id": run_id,
         "created_at": now_utc(),
         "status": "running",
@@ -31,11 +43,15 @@ def start_run(*, agent_id: str, user_id: Optional[str], session_id: Optional[str
         "provider": provider,
         "model": model,
         "metadata": metadata or {},
-    })
+    }
+
+    # com o sink rodando a gravação sai do caminho da request; senão (scripts) grava direto
+    if not (RunsTelemetrySink.running() and RunsTelemetrySink.record_start(row)):
+        await SupaBaseRunsDB.insert_run(row)
 
     return {"run_id": run_id, "start_perf": start_perf}
 
-def finish_run_success(*, run_id: str, start_perf: float, session_id: Optional[str],
+async def finish_run_success(*, run_id: str, start_perf: float, session_id: Optional[str],
                     model: Optional[str], prompt_tokens: Optional[int],
                     completion_tokens: Optional[int], total_tokens: Optional[int],
                     cost_usd: Optional[float], prompt_tokens_cached: Optional[int] = None,
@@ -58,9 +74,9 @@ def finish_run_success(*, run_id: str, start_perf: float, session_id: Optional[s
     if metadata_patch:
         patch["metadata"] = {"telemetry": metadata_patch}
 
-    SupaBaseRunsDB.update_run(run_id, patch)
+    await _write_finish(run_id, patch)
 
-def finish_run_error(*, run_id: str, start_perf: float, error_type: str, error_message: str,
+async def finish_run_error(*, run_id: str, start_perf: float, error_type: str, error_message: str,
                     session_id: Optional[str] = None, model: Optional[str] = None,
                     metadata_patch: Optional[Dict[str, Any]] = None) -> None:
 
@@ -78,4 +94,4 @@ def finish_run_error(*, run_id: str, start_perf: float, error_type: str, error_m
     if metadata_patch:
         patch["metadata"] = {"telemetry": metadata_patch}
 
-    SupaBaseRunsDB.update_run(run_id, patch)
+    await _write_finish(run_id, patch)
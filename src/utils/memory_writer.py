@@ -0,0 +1,71 @@
+"""
+Gravação das respostas do assistente fora do caminho da request.
+
+A mensagem do usuário entra junto com a leitura do histórico
+(SupaBaseMemoryDB.start_turn); a resposta vai para um BatchWriter que grava
+em lote com o created_at do momento em que foi gerada. Se o writer não está
+rodando ou a fila está cheia, grava direto (mensagem de conversa não é descartada).
+Se o INSERT do lote falha, regrava linha a linha: uma mensagem ruim (ex.: sessão
+apagada) não leva o lote junto; as que falharem de novo ficam no log.
+
+Um turno seguinte que chegue antes do flush não vê a resposta no histórico:
+mantenha MEMORY_WRITER_FLUSH_INTERVAL_S curto.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime, timezone
+from typing import List, Tuple
+
+from src.core.config import settings
+from src.data.supaBase.supaBase_memory_db import SupaBaseMemoryDB
+from src.utils.batch_writer import BatchWriter
+
+logger = logging.getLogger(__name__)
+
+
+async def _save_batch(rows: List[Tuple[str, str, str, datetime]]) -> None:
+    try:
+        await SupaBaseMemoryDB.save_messages(rows)
+        return
+    except Exception as e:
+        if len(rows) == 1:
+            raise
+        logger.warning(f"[MEMORY] Falha no lote de {len(rows)} mensagens, regravando uma a uma: {type(e).__name__}: {e}")
+
+    for row in rows:
+        try:
+            await SupaBaseMemoryDB.save_messages([row])
+        except Exception as e:
+            logger.error(f"[MEMORY] Mensagem perdida (sessão {row[0]}, {row[1]}, {row[3].isoformat()}): {type(e).__name__}: {e}")
+
+
+class ChatMessageWriter:
+
+    writer = BatchWriter(
+        "chat_messages",
+        _save_batch,
+        max_queue=settings.MEMORY_WRITER_QUEUE_MAX,
+        batch_size=settings.MEMORY_WRITER_BATCH_SIZE,
+        flush_interval_s=settings.MEMORY_WRITER_FLUSH_INTERVAL_S,
+    )
+
+    @staticmethod
+    async def save(session_id: str, role: str, content: str) -> None:
+        row = (session_id, role, content, datetime.now(timezone.utc))
+        if ChatMessageWriter.writer.submit(row):
+            return
+        await SupaBaseMemoryDB.save_messages([row])
+
+    @staticmethod
+    def start() -> None:
+        if settings.MEMORY_WRITER_ENABLED:
+            ChatMessageWriter.writer.start()
+
+    @staticmethod
+    async def stop() -> None:
+        await ChatMessageWriter.writer.stop()
+
+    @staticmethod
+    def stats() -> dict:
+        return ChatMessageWriter.writer.stats()
@@ -0,0 +1,172 @@
+"""
+Rollups de runs por bucket de tempo (minute/hour/day) x agente x modelo x status.
+
+Quando uma run termina (finish_run_success/finish_run_error, direto ou pelo sink
+de telemetria), a linha final da run vira incrementos nos três buckets de
+public.run_rollups. O dashboard (/dashboard/timeseries) lê só os rollups, então
+o custo não cresce com o número de runs.
+
+Backfill do histórico (recalcula dia a dia, idempotente):
+
+    python -m src.utils.run_rollups --since 2025-01-01 [--until 2025-06-01]
+
+Sem --until vai até o início do dia atual (UTC). Rode depois que o deploy com
+os rollups ao vivo já estiver no ar: dias recalculados são substituídos por
+inteiro a partir de public.runs.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Optional
+
+from src.data.supaBase.supaBase_rollup_db import SupaBaseRollupDB
+from src.utils import histogram
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("minute", "hour", "day")
+GRANULARITY_STEP = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+}
+FINISHED_STATUSES = ("success", "error")
+
+
+def _parse_ts(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def truncate(ts: datetime, granularity: str) -> datetime:
+    if granularity == "minute":
+        return ts.replace(second=0, microsecond=0)
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _telemetry(run: dict) -> dict:
+    return (run.get("metadata") or {}).get("telemetry") or {}
+
+
+def _invoke_ms(run: dict) -> Optional[int]:
+    value = _telemetry(run).get("invoke_ms")
+    return int(value) if isinstance(value, (int, float)) else None
+
+
+def build_rollups(runs: Iterable[dict]) -> list[dict]:
+    """Agrega runs terminadas em linhas de run_rollups (uma por chave)."""
+    acc: dict[tuple, dict] = {}
+    for run in runs:
+        status = run.get("status")
+        ts = _parse_ts(run.get("created_at"))
+        if status not in FINISHED_STATUSES or ts is None:
+            continue
+
+        agent_id = str(run.get("agent_id") or "")
+        model = run.get("model") or ""
+        duration_ms = run.get("duration_ms")
+        invoke_ms = _invoke_ms(run)
+        # hit do ResponseCache: sem chamada ao LLM, não entra nas distribuições de latência/tokens
+        cache_hit = bool(_telemetry(run).get("cache_hit"))
+        # overhead = tudo que não é a chamada ao LLM (DB, memória, tools locais, serialização)
+        overhead_ms = max(duration_ms - invoke_ms, 0) if duration_ms is not None and invoke_ms is not None else None
+        for g in GRANULARITIES:
+            key = (g, truncate(ts, g), agent_id, model, status)
+            row = acc.get(key)
+            if row is None:
+                row = acc[key] = {
+                    "granularity": g,
+                    "bucket_start": key[1],
+                    "agent_id": agent_id,
+                    "model": model,
+                    "status": status,
+                    "runs": 0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "total_tokens": 0,
+                    "cost_usd": 0.0,
+                    "duration_ms_sum": 0,
+                    "invoke_ms_sum": 0,
+                    "overhead_ms_sum": 0,
+                    "duration_hist": histogram.empty(),
+                    "invoke_hist": histogram.empty(),
+                    "overhead_hist": histogram.empty(),
+                    "tokens_hist": histogram.empty(),
+                }
+            row["runs"] += 1
+            row["prompt_tokens"] += run.get("prompt_tokens") or 0
+            row["completion_tokens"] += run.get("completion_tokens") or 0
+            row["total_tokens"] += run.get("total_tokens") or 0
+            row["cost_usd"] += float(run.get("cost_usd") or 0)
+            row["duration_ms_sum"] += duration_ms or 0
+            if invoke_ms is not None:
+                row["invoke_ms_sum"] += invoke_ms
+            if overhead_ms is not None:
+                row["overhead_ms_sum"] += overhead_ms
+            if cache_hit:
+                continue
+            histogram.add(row["duration_hist"], duration_ms)
+            if invoke_ms is not None:
+                histogram.add(row["invoke_hist"], invoke_ms)
+            if overhead_ms is not None:
+                histogram.add(row["overhead_hist"], overhead_ms)
+            histogram.add(row["tokens_hist"], run.get("total_tokens"))
+    return list(acc.values())
+
+
+class RunRollups:
+
+    @staticmethod
+    async def record(runs: list[dict]) -> None:
+        """Soma runs terminadas nos rollups. Falha só é logada (o backfill corrige)."""
+        rows = build_rollups(runs)
+        if not rows:
+            return
+        try:
+            await SupaBaseRollupDB.upsert_rollups(rows)
+        except Exception as e:
+            logger.error(f"[ROLLUPS] Falha ao gravar {len(rows)} buckets: {type(e).__name__}: {e}")
+
+    @staticmethod
+    async def backfill(since: datetime, until: datetime) -> int:
+        day = truncate(_parse_ts(since), "day")
+        end = truncate(_parse_ts(until), "day")
+        total = 0
+        while day < end:
+            n = await SupaBaseRollupDB.rebuild_range(day, day + timedelta(days=1), build_rollups)
+            logger.info(f"[ROLLUPS] {day.date()}: {n} runs")
+            total += n
+            day += timedelta(days=1)
+        return total
+
+
+async def _main(argv: Optional[list[str]] = None) -> None:
+    from src.data.supaBase.supaBase_async_db import AsyncDB
+
+    parser = argparse.ArgumentParser(description="Recalcula public.run_rollups a partir de public.runs")
+    parser.add_argument("--since", required=True, help="data inicial (YYYY-MM-DD, UTC)")
+    parser.add_argument("--until", help="data final exclusiva (padrão: hoje, UTC)")
+    args = parser.parse_args(argv)
+
+    since = datetime.fromisoformat(args.since)
+    until = datetime.fromisoformat(args.until) if args.until else datetime.now(timezone.utc)
+    try:
+        total = await RunRollups.backfill(since, until)
+        print(f"backfill ok: {total} runs")
+    finally:
+        await AsyncDB.close_pool()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main())
@@ -0,0 +1,96 @@
+"""
+Cache assíncrono com stale-while-revalidate e coalescência de requisições.
+
+- idade < ttl_s: devolve do cache
+- ttl_s <= idade < ttl_s + stale_s: devolve o valor velho e dispara (uma) atualização em background
+- sem valor ou velho demais: busca agora; requisições simultâneas da mesma chave
+  esperam a mesma busca (uma query por chave, não uma por cliente)
+
+Os valores ficam num LRUCache (aparece em GET /cache/stats) e são compartilhados
+entre requisições: não devem ser alterados por quem lê.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from src.utils.lru_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+_SWR_CACHES: Dict[str, "SWRCache"] = {}
+
+
+class SWRCache:
+    def __init__(self, name: str, max_size: int):
+        self.name = name
+        self._store = LRUCache(name, max_size=max_size)
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.counters = {"fresh": 0, "stale": 0, "loads": 0, "coalesced": 0, "refreshes": 0, "refresh_errors": 0}
+        _SWR_CACHES[name] = self
+
+    async def get(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl_s: float,
+        stale_s: float = 0.0,
+    ) -> Any:
+        entry = self._store.get(key, _MISSING)
+        if entry is not _MISSING:
+            value, fetched_at = entry
+            age = time.monotonic() - fetched_at
+            if age < ttl_s:
+                self.counters["fresh"] += 1
+                return value
+            if age < ttl_s + stale_s:
+                self.counters["stale"] += 1
+                if key not in self._inflight:
+                    self.counters["refreshes"] += 1
+                    self._start_load(key, loader).add_done_callback(self._log_refresh_error)
+                return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.counters["coalesced"] += 1
+        else:
+            self.counters["loads"] += 1
+            task = self._start_load(key, loader)
+        # shield: um cliente que desconecta não cancela a busca dos outros
+        return await asyncio.shield(task)
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        async def run():
+            try:
+                value = await loader()
+                self._store.set(key, (value, time.monotonic()))
+                return value
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.create_task(run(), name=f"swr-{self.name}")
+        self._inflight[key] = task
+        return task
+
+    def _log_refresh_error(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        exc = task.exception()
+        if exc is not None:
+            # mantém o valor velho; a próxima leitura tenta de novo
+            self.counters["refresh_errors"] += 1
+            logger.warning(f"[SWR:{self.name}] Falha ao atualizar em background: {type(exc).__name__}: {exc}")
+
+    def clear(self) -> None:
+        self._store.clear()
+
+    def stats(self) -> dict:
+        return {"inflight": len(self._inflight), **self.counters, **self._store.stats()}
+
+
+def swr_stats() -> Dict[str, dict]:
+    return {name: c.stats() for name, c in sorted(_SWR_CACHES.items())}
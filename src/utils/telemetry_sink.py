@@ -0,0 +1,177 @@
+"""
+Sink de telemetria de runs fora do caminho crítico da request.
+
+start_run/finish_run_* (src/utils/log.py) só enfileiram eventos; um BatchWriter
+junta os eventos e grava as runs num INSERT multi-row com upsert por id.
+
+Como o upsert precisa da linha completa, o sink guarda em memória a linha de
+cada run iniciada até ela terminar (`_open_runs`, limitado). Um finish cuja
+linha não está mais lá (start descartado por overflow, ou evictado) cai no
+UPDATE simples.
+
+Um finish que não coube na fila enquanto o start ainda não foi gravado
+(`_unflushed`) não pode ir para o UPDATE direto (não acharia a linha, e o
+upsert do start gravaria `running` por cima): fica em `_deferred` e é
+aplicado no flush do start.
+
+Se o INSERT do lote falha, as runs são regravadas uma a uma (as que falharem
+de novo ficam no log) e os finishes adiados continuam sendo aplicados.
+
+As runs que terminam no lote também alimentam os rollups do dashboard
+(src/utils/run_rollups.py).
+"""
+from __future__ import annotations
+
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from src.core.config import settings
+from src.data.supaBase.supaBase_log_db import SupaBaseRunsDB
+from src.utils.batch_writer import BatchWriter
+from src.utils.run_rollups import FINISHED_STATUSES, RunRollups
+
+logger = logging.getLogger(__name__)
+
+
+class RunsTelemetrySink:
+
+    _open_runs: "OrderedDict[str, dict]" = OrderedDict()
+    # starts enfileirados e ainda não gravados / finishes que chegaram por fora da fila
+    _unflushed: "OrderedDict[str, None]" = OrderedDict()
+    _deferred: Dict[str, dict] = {}
+
+    @staticmethod
+    async def _flush(batch: List[tuple]) -> None:
+        open_runs = RunsTelemetrySink._open_runs
+        deferred = RunsTelemetrySink._deferred
+        pending: Dict[str, dict] = {}
+        orphan_patches: List[tuple[str, dict]] = []
+        started: List[str] = []
+
+        for kind, run_id, payload in batch:
+            if kind == "start":
+                started.append(run_id)
+                row = dict(payload)
+                late = deferred.pop(run_id, None)
+                if late is not None:
+                    row = _merge(row, late)
+                else:
+                    open_runs[run_id] = row
+                    while len(open_runs) > settings.TELEMETRY_OPEN_RUNS_MAX:
+                        open_runs.popitem(last=False)
+                pending[run_id] = row
+                continue
+
+            base = open_runs.pop(run_id, None)
+            if base is None:
+                orphan_patches.append((run_id, payload))
+                continue
+            pending[run_id] = _merge(base, payload)
+
+        written = await _upsert_rows(list(pending.values()))
+
+        late_patches = []
+        for run_id in started:
+            RunsTelemetrySink._unflushed.pop(run_id, None)
+            late = deferred.pop(run_id, None)
+            if late is not None:
+                # chegou durante o upsert: a linha já existe, vale o UPDATE
+                open_runs.pop(run_id, None)
+                late_patches.append((run_id, late))
+
+        finished = [row for row in written if row.get("status") in FINISHED_STATUSES]
+        for run_id, patch in orphan_patches + late_patches:
+            try:
+                row = await SupaBaseRunsDB.update_run(run_id, patch)
+            except Exception as e:
+                logger.error(f"[TELEMETRY] Falha no finish da run {run_id}: {type(e).__name__}: {e}")
+                continue
+            if row:
+                finished.append(row)
+
+        await RunRollups.record(finished)
+
+    writer = BatchWriter(
+        "runs_telemetry",
+        _flush,
+        max_queue=settings.TELEMETRY_QUEUE_MAX,
+        batch_size=settings.TELEMETRY_BATCH_SIZE,
+        flush_interval_s=settings.TELEMETRY_FLUSH_INTERVAL_S,
+        overflow_policy=settings.TELEMETRY_OVERFLOW_POLICY,
+    )
+
+    @staticmethod
+    def running() -> bool:
+        return RunsTelemetrySink.writer.running
+
+    @staticmethod
+    def record_start(row: dict) -> bool:
+        if not RunsTelemetrySink.writer.submit(("start", row["id"], row)):
+            return False
+        unflushed = RunsTelemetrySink._unflushed
+        unflushed[row["id"]] = None
+        # start descartado da fila (drop_oldest) nunca sai daqui: limita como _open_runs
+        while len(unflushed) > settings.TELEMETRY_OPEN_RUNS_MAX:
+            run_id, _ = unflushed.popitem(last=False)
+            RunsTelemetrySink._deferred.pop(run_id, None)
+        return True
+
+    @staticmethod
+    def record_finish(run_id: str, patch: dict) -> bool:
+        return RunsTelemetrySink.writer.submit(("finish", run_id, patch))
+
+    @staticmethod
+    def defer_finish(run_id: str, patch: dict) -> bool:
+        """
+        Finish que não entrou na fila: se o start ainda não foi gravado, guarda o
+        patch para o flush do start. False = o start já está no banco (use UPDATE).
+        """
+        if run_id not in RunsTelemetrySink._unflushed:
+            return False
+        RunsTelemetrySink._deferred[run_id] = patch
+        return True
+
+    @staticmethod
+    def start() -> None:
+        if settings.TELEMETRY_SINK_ENABLED:
+            RunsTelemetrySink.writer.start()
+
+    @staticmethod
+    async def stop() -> None:
+        await RunsTelemetrySink.writer.stop()
+
+    @staticmethod
+    def stats() -> dict:
+        return {**RunsTelemetrySink.writer.stats(), "open_runs": len(RunsTelemetrySink._open_runs)}
+
+
+async def _upsert_rows(rows: List[dict]) -> List[dict]:
+    """
+    Upsert do lote; se falha, regrava linha a linha (uma run ruim não leva o lote
+    junto, como no ChatMessageWriter). Retorna as linhas gravadas.
+    """
+    try:
+        await SupaBaseRunsDB.upsert_runs(rows)
+        return rows
+    except Exception as e:
+        if len(rows) == 1:
+            logger.error(f"[TELEMETRY] Run perdida ({rows[0].get('id')}): {type(e).__name__}: {e}")
+            return []
+        logger.warning(f"[TELEMETRY] Falha no lote de {len(rows)} runs, regravando uma a uma: {type(e).__name__}: {e}")
+
+    written = []
+    for row in rows:
+        try:
+            await SupaBaseRunsDB.upsert_runs([row])
+            written.append(row)
+        except Exception as e:
+            logger.error(f"[TELEMETRY] Run perdida ({row.get('id')}): {type(e).__name__}: {e}")
+    return written
+
+
+def _merge(base: dict, patch: Dict[str, Any]) -> dict:
+    row = {**base, **{k: v for k, v in patch.items() if k != "metadata"}}
+    if "metadata" in patch:
+        row["metadata"] = {**(base.get("metadata") or {}), **(patch["metadata"] or {})}
+    return row
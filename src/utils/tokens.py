@@ -0,0 +1,74 @@
+"""
+Contagem de tokens com tiktoken (encodings em cache por modelo) e janelas
+de contexto conhecidas dos modelos OpenAI.
+
+Se o tiktoken não conseguir carregar o encoding (ex.: sem rede para baixar o
+BPE), cai numa estimativa de ~4 caracteres por token.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+import tiktoken
+
+from src.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_FALLBACK_ENCODING = "o200k_base"
+
+_ENCODINGS: Dict[str, Optional[Any]] = {}
+_LOCK = threading.Lock()
+
+# prefixo do nome do modelo -> janela de contexto (tokens). O prefixo mais longo ganha.
+CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16_385,
+    "gpt-4": 8_192,
+    "gpt-4-turbo": 128_000,
+    "gpt-4o": 128_000,
+    "gpt-4.1": 1_047_576,
+    "gpt-5": 400_000,
+    "o1": 200_000,
+    "o3": 200_000,
+    "o4-mini": 200_000,
+}
+
+
+def _encoding(model: str):
+    enc = _ENCODINGS.get(model, False)
+    if enc is not False:
+        return enc
+
+    with _LOCK:
+        if model in _ENCODINGS:
+            return _ENCODINGS[model]
+        try:
+            try:
+                enc = tiktoken.encoding_for_model(model)
+            except KeyError:
+                enc = tiktoken.get_encoding(_FALLBACK_ENCODING)
+        except Exception as e:
+            logger.warning(f"[TOKENS] tiktoken indisponível para {model}, usando estimativa: {e}")
+            enc = None
+        _ENCODINGS[model] = enc
+        return enc
+
+
+def count_tokens(text: str, model: str) -> int:
+    if not text:
+        return 0
+    enc = _encoding(model)
+    if enc is None:
+        return (len(text) + 3) // 4
+    # disallowed_special=(): diffs podem conter "<|endoftext|>" literal
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def context_window(model: str) -> int:
+    best = None
+    for prefix in CONTEXT_WINDOWS:
+        if model.startswith(prefix) and (best is None or len(prefix) > len(best)):
+            best = prefix
+    return CONTEXT_WINDOWS[best] if best else settings.DEFAULT_CONTEXT_WINDOW
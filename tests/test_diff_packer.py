@@ -0,0 +1,50 @@
+"""
+Empacotamento do diff em chunks por orçamento de tokens.
+"""
+from src.services.reviews.diff_packer import TRUNCATED_HUNK_MARKER, pack_diff
+from src.services.reviews.diff_parser import parse_diff
+from src.utils.tokens import count_tokens
+
+MODEL = "gpt-4o-mini"
+
+
+def _file(path: str, hunks: list[list[str]]) -> str:
+    out = [f"diff --git a/{path} b/{path}", f"--- a/{path}", f"+++ b/{path}"]
+    for i, lines in enumerate(hunks):
+        out.append(f"@@ -{i * 100 + 1},{len(lines)} +{i * 100 + 1},{len(lines)} @@")
+        out.extend(lines)
+    return "\n".join(out)
+
+
+def test_small_files_share_a_chunk_in_diff_order():
+    files = parse_diff("\n".join([_file("a.py", [["+a = 1"]]), _file("b.py", [["+b = 2"]])]))
+    (chunk,) = pack_diff(files, budget_tokens=1000, model=MODEL)
+    assert chunk.files == ["a.py", "b.py"]
+    assert chunk.text.index("a.py") < chunk.text.index("b.py")
+
+
+def test_large_file_is_split_by_hunk_with_header_repeated():
+    hunks = [[f"+value_{h}_{i} = {i}" for i in range(20)] for h in range(3)]
+    (fd,) = parse_diff(_file("big.py", hunks))
+    budget = count_tokens(fd.hunks[0].text(), MODEL) + count_tokens(fd.header(), MODEL) + 5
+
+    chunks = pack_diff([fd], budget_tokens=budget, model=MODEL)
+
+    assert len(chunks) == 3
+    for chunk in chunks:
+        assert chunk.files == ["big.py"]
+        assert chunk.text.startswith(fd.header())
+        assert TRUNCATED_HUNK_MARKER not in chunk.text
+
+
+def test_hunk_larger_than_budget_is_truncated_with_marker():
+    lines = [f"+line_{i} = '{'x' * 40}'" for i in range(200)]
+    (fd,) = parse_diff(_file("huge.py", [lines]))
+
+    (chunk,) = pack_diff([fd], budget_tokens=300, model=MODEL)
+
+    assert chunk.text.endswith(TRUNCATED_HUNK_MARKER)
+    assert fd.hunks[0].header in chunk.text
+    assert lines[0] in chunk.text
+    assert lines[-1] not in chunk.text
+    assert chunk.tokens <= 300
@@ -0,0 +1,61 @@
+"""
+Parser de unified diff: cabeçalhos, hunks e linhas de conteúdo que parecem cabeçalho.
+"""
+from src.services.reviews.diff_parser import parse_diff, skip_reason
+
+DIFF = """diff --git a/app/notes.md b/app/notes.md
+index 1111111..2222222 100644
+--- a/app/notes.md
++++ b/app/notes.md
+@@ -1,3 +1,3 @@
+ # Notas
+---- separador antigo
++++++ separador novo
+ fim
+diff --git a/app/new.py b/app/new.py
+new file mode 100644
+index 0000000..3333333
+--- /dev/null
++++ b/app/new.py
+@@ -0,0 +1,2 @@
++def f():
++    return 1
+"""
+
+
+def test_content_lines_starting_with_dashes_and_pluses_stay_in_the_hunk():
+    notes, new = parse_diff(DIFF)
+
+    assert notes.path == "app/notes.md"
+    assert notes.header_lines == [
+        "diff --git a/app/notes.md b/app/notes.md",
+        "index 1111111..2222222 100644",
+        "--- a/app/notes.md",
+        "+++ b/app/notes.md",
+    ]
+    assert len(notes.hunks) == 1
+    assert notes.hunks[0].lines == [" # Notas", "---- separador antigo", "+++++ separador novo", " fim"]
+    assert (notes.added, notes.removed) == (1, 1)
+
+    # o "---"/"+++" do arquivo seguinte volta a ser cabeçalho
+    assert new.status == "added"
+    assert new.header_lines[-2:] == ["--- /dev/null", "+++ b/app/new.py"]
+    assert (new.added, new.removed) == (2, 0)
+
+
+def test_hunk_header_without_counts_defaults_to_one_line():
+    diff = "diff --git a/x.py b/x.py\n--- a/x.py\n+++ b/x.py\n@@ -3 +3 @@\n-a\n+b\n"
+    (fd,) = parse_diff(diff)
+    hunk = fd.hunks[0]
+    assert (hunk.old_start, hunk.old_lines, hunk.new_start, hunk.new_lines) == (3, 1, 3, 1)
+
+
+def test_skip_reason():
+    diff = (
+        "diff --git a/web/package-lock.json b/web/package-lock.json\n--- a/web/package-lock.json\n+++ b/web/package-lock.json\n"
+        "diff --git a/logo.png b/logo.png\nBinary files a/logo.png and b/logo.png differ\n"
+        "diff --git a/static/app.min.js b/static/app.min.js\n--- a/static/app.min.js\n+++ b/static/app.min.js\n"
+        "diff --git a/old.py b/old.py\ndeleted file mode 100644\n--- a/old.py\n+++ /dev/null\n"
+        "diff --git a/src/main.py b/src/main.py\n--- a/src/main.py\n+++ b/src/main.py\n"
+    )
+    assert [skip_reason(fd) for fd in parse_diff(diff)] == ["lockfile", "binary", "generated", "deleted", None]
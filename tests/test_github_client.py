@@ -0,0 +1,69 @@
+"""
+GitHubClient contra um GitHub fake (httpx.MockTransport): revalidação por ETag.
+"""
+import asyncio
+
+import httpx
+
+from src.core.config import settings
+from src.services.reviews import github_client
+from src.services.reviews.github_client import GitHubClient
+
+DIFF = "diff --git a/x.py b/x.py\n--- a/x.py\n+++ b/x.py\n@@ -1 +1 @@\n-a\n+b\n"
+
+
+class FakeGitHub:
+    """Responde 200 com ETag e 304 quando recebe o If-None-Match certo."""
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        accept = request.headers["Accept"]
+        etag = '"diff-v1"' if "diff" in accept else '"pr-v1"'
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        if "diff" in accept:
+            return httpx.Response(200, text=DIFF, headers={"ETag": etag})
+        return httpx.Response(200, json={"number": 7, "title": "Fix"}, headers={"ETag": etag})
+
+
+def _client(fake: FakeGitHub) -> httpx.AsyncClient:
+    return httpx.AsyncClient(base_url="https://github.test", transport=httpx.MockTransport(fake))
+
+
+def setup_function():
+    github_client._etags.clear()
+
+
+def test_304_reuses_cached_body_across_tokens():
+    fake = FakeGitHub()
+
+    async def run():
+        async with _client(fake) as http:
+            first = await GitHubClient("token-job-1", client=http).get_pr_and_diff("acme/app", 7)
+            # token efêmero de outro job: mesma chave de cache
+            second = await GitHubClient("token-job-2", client=http).get_pr_and_diff("acme/app", 7)
+        return first, second
+
+    (pr1, diff1), (pr2, diff2) = asyncio.run(run())
+
+    assert pr2 == pr1 == {"number": 7, "title": "Fix"}
+    assert diff2 == diff1 == DIFF
+    # segunda rodada: as duas requests são condicionais e voltam 304
+    assert all(r.headers.get("If-None-Match") for r in fake.requests[2:])
+
+
+def test_large_body_is_not_cached(monkeypatch):
+    fake = FakeGitHub()
+    monkeypatch.setattr(settings, "GITHUB_ETAG_MAX_BODY_BYTES", 10)
+
+    async def run():
+        async with _client(fake) as http:
+            gh = GitHubClient("token", client=http)
+            await gh.get_pr_diff("acme/app", 7)
+            return await gh.get_pr_diff("acme/app", 7)
+
+    assert asyncio.run(run()) == DIFF
+    assert all("If-None-Match" not in r.headers for r in fake.requests)
@@ -0,0 +1,79 @@
+"""
+Modo map-reduce do review: corte por REVIEW_MAX_CHUNKS e junção dos findings por especialista.
+"""
+import asyncio
+
+from src.core.config import settings
+from src.services.reviews.agent_ids import PR_REVIEW_SPECIALISTS
+from src.services.reviews.pipeline.nodes import map_reduce
+
+SPECIALISTS = [name for name, _ in PR_REVIEW_SPECIALISTS]
+
+
+def _chunk(index: int, files: list[str]) -> dict:
+    return {"index": index, "files": files, "text": f"diff chunk {index}", "tokens": 10}
+
+
+def test_chunks_above_max_are_reported_and_not_reviewed(monkeypatch):
+    calls = []
+
+    async def fake_run_specialist(agent_name, run_req, semaphore, timeout_s):
+        calls.append((agent_name, run_req.message))
+        return {"agent": agent_name, "findings": [], "tests_suggested": []}, None
+
+    monkeypatch.setattr(map_reduce, "run_specialist", fake_run_specialist)
+    monkeypatch.setattr(settings, "REVIEW_MAX_CHUNKS", 1)
+    state = {
+        "repo_full_name": "acme/app",
+        "pr_number": 7,
+        "head_sha": "abc",
+        "diff_chunks": [_chunk(0, ["a.py"]), _chunk(1, ["b.py", "c.py"])],
+    }
+
+    out = asyncio.run(map_reduce.map_specialists(state))
+
+    assert len(calls) == len(SPECIALISTS)
+    assert all("diff chunk 0" in message for _, message in calls)
+    assert [r["chunk"] for r in out["chunk_outputs"]] == [0] * len(SPECIALISTS)
+    (error,) = out["errors"]
+    assert error["stage"] == "map_specialists"
+    assert "agent" not in error
+    assert error["files"] == ["b.py", "c.py"]
+
+
+def test_parse_error_chunk_becomes_an_error(monkeypatch):
+    async def fake_run_specialist(agent_name, run_req, semaphore, timeout_s):
+        return {"agent": "parse_error", "findings": []}, None
+
+    monkeypatch.setattr(map_reduce, "run_specialist", fake_run_specialist)
+    state = {"repo_full_name": "acme/app", "pr_number": 7, "head_sha": "abc", "diff_chunks": [_chunk(0, ["a.py"])]}
+
+    out = asyncio.run(map_reduce.map_specialists(state))
+
+    assert out["chunk_outputs"] == []
+    assert {(e["agent"], e["error"], e["chunk"]) for e in out["errors"]} == {(a, "parse_error", 0) for a in SPECIALISTS}
+
+
+def test_reduce_merges_findings_across_chunks():
+    first, second = SPECIALISTS[0], SPECIALISTS[1]
+    dup_minor = {"severity": "MINOR", "title": "Null check", "file": "a.py", "line_range": "10-12"}
+    dup_major = {"severity": "MAJOR", "title": "null check ", "file": "a.py", "line_range": "10-12"}
+    other = {"severity": "NIT", "title": "Naming", "file": "b.py", "line_range": "3"}
+    state = {
+        "chunk_outputs": [
+            {"agent": first, "chunk": 1, "output": {"agent": first, "findings": [dup_major], "tests_suggested": ["t2", "t1"]}},
+            {"agent": first, "chunk": 0, "output": {"agent": first, "findings": [other, dup_minor], "tests_suggested": ["t1"]}},
+            {"agent": second, "chunk": 0, "output": {"agent": second, "findings": [], "tests_suggested": []}},
+        ],
+    }
+
+    out = asyncio.run(map_reduce.reduce_findings(state))
+
+    merged = out["specialist_outputs"][0]
+    assert merged["agent"] == first
+    assert merged["findings"] == [dup_major, other]
+    assert merged["tests_suggested"] == ["t1", "t2"]
+    assert merged["chunks_reviewed"] == 2
+    # especialista sem nenhum chunk bem-sucedido vira erro (fica fora do agents_executed)
+    assert [o["agent"] for o in out["specialist_outputs"]] == [first, second]
+    assert out["errors"] == [{"stage": "run_specialists", "agent": a, "error": "all chunks failed"} for a in SPECIALISTS[2:]]
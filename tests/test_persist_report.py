@@ -0,0 +1,38 @@
+"""
+agents_executed do report: só agentes que revisaram o diff inteiro (base do cache de review).
+"""
+from src.services.reviews.agent_ids import PR_REVIEW_AGGREGATOR, PR_REVIEW_SPECIALISTS
+from src.services.reviews.pipeline.nodes.persist_report import _extract_agents_executed
+
+SPECIALISTS = [name for name, _ in PR_REVIEW_SPECIALISTS]
+AGGREGATOR = PR_REVIEW_AGGREGATOR[0]
+REPORT = {"agent": "pr_review_aggregator", "summary_md": "ok", "findings": []}
+
+
+def test_complete_review_lists_every_agent():
+    state = {"errors": [], "final_report": REPORT}
+    assert _extract_agents_executed(state) == SPECIALISTS + [AGGREGATOR]
+
+
+def test_chunks_dropped_by_max_chunks_leave_out_all_specialists():
+    state = {
+        "errors": [{"stage": "map_specialists", "error": "2 arquivos acima de REVIEW_MAX_CHUNKS não revisados", "files": ["b.py", "c.py"]}],
+        "final_report": REPORT,
+    }
+    assert _extract_agents_executed(state) == [AGGREGATOR]
+
+
+def test_failed_chunk_and_parse_error_leave_out_the_specialist():
+    state = {
+        "errors": [
+            {"stage": "map_specialists", "agent": SPECIALISTS[0], "error": "parse_error", "chunk": 1},
+            {"stage": "run_specialists", "agent": SPECIALISTS[2], "error": "parse_error"},
+        ],
+        "final_report": REPORT,
+    }
+    assert _extract_agents_executed(state) == [SPECIALISTS[1], AGGREGATOR]
+
+
+def test_aggregator_parse_error_is_not_executed():
+    state = {"errors": [], "final_report": {"agent": "parse_error", "findings": []}}
+    assert _extract_agents_executed(state) == SPECIALISTS